@@ -0,0 +1,205 @@
+"""
+Vectorized Box Operations
+NumPy kernels for IoU matrices, NMS and IoU matching shared by the fusion layers
+"""
+
+import importlib.util
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+# Optimal assignment solver (optional - greedy matching is used without it).
+# scipy.optimize takes ~0.5 s to import, so it is only imported on first use.
+SCIPY_AVAILABLE = importlib.util.find_spec("scipy") is not None
+
+
+@lru_cache(maxsize=None)
+def load_assignment_solver():
+    """scipy's linear_sum_assignment, imported once (None without SciPy)"""
+    if not SCIPY_AVAILABLE:
+        return None
+    from scipy.optimize import linear_sum_assignment
+    return linear_sum_assignment
+
+# Above this many boxes NMS switches from a dense IoU matrix to row-wise IoU
+DENSE_NMS_MAX_BOXES = 512
+
+
+def as_boxes(boxes) -> np.ndarray:
+    """Convert a list of [x1, y1, x2, y2] boxes to an (N, 4) float array"""
+    arr = np.asarray(boxes, dtype=np.float64)
+    if arr.size == 0:
+        return np.zeros((0, 4), dtype=np.float64)
+    return arr.reshape(-1, 4)
+
+
+def box_areas(boxes: np.ndarray) -> np.ndarray:
+    """Areas of (N, 4) xyxy boxes"""
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+
+def iou_matrix(boxes_a, boxes_b) -> np.ndarray:
+    """
+    Pairwise IoU between two sets of xyxy boxes
+
+    Args:
+        boxes_a: (N, 4) boxes
+        boxes_b: (M, 4) boxes
+
+    Returns:
+        (N, M) IoU matrix (0 where the union is empty)
+    """
+    a = as_boxes(boxes_a)
+    b = as_boxes(boxes_b)
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float64)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    union = box_areas(a)[:, None] + box_areas(b)[None, :] - intersection
+
+    iou = np.zeros_like(intersection)
+    np.divide(intersection, union, out=iou, where=union > 0)
+    return iou
+
+
+def nms(boxes, scores, iou_threshold: float = 0.45) -> np.ndarray:
+    """
+    Greedy Non-Maximum Suppression
+
+    Boxes are visited in descending score order (ties keep input order) and
+    every remaining box with IoU >= iou_threshold against a kept box is dropped.
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    boxes = as_boxes(boxes)
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    order = np.argsort(-scores, kind='stable')
+
+    if len(order) <= DENSE_NMS_MAX_BOXES:
+        # Small sets: one IoU matrix, then a cheap suppression sweep
+        overlaps = iou_matrix(boxes[order], boxes[order]) >= iou_threshold
+        suppressed = np.zeros(len(order), dtype=bool)
+        keep = []
+        for i in range(len(order)):
+            if suppressed[i]:
+                continue
+            keep.append(i)
+            suppressed |= overlaps[i]
+        return order[keep]
+
+    # Large sets: row-wise IoU against the survivors keeps memory at O(n)
+    areas = box_areas(boxes)
+    keep = []
+
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        if rest.size == 0:
+            break
+
+        x1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        union = areas[i] + areas[rest] - intersection
+
+        iou = np.zeros_like(intersection)
+        np.divide(intersection, union, out=iou, where=union > 0)
+        order = rest[iou < iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
+
+
+def batched_nms(boxes, scores, class_ids, iou_threshold: float = 0.45) -> np.ndarray:
+    """
+    Per-class NMS in a single pass
+
+    Boxes of different classes are shifted apart by a per-class offset so they
+    can never overlap, then one NMS runs over all of them.
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    boxes = as_boxes(boxes)
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    class_ids = np.asarray(class_ids).reshape(-1)
+    span = boxes.max() - min(boxes.min(), 0) + 1
+    offsets = class_ids.astype(np.float64)[:, None] * span
+    return nms(boxes + offsets, scores, iou_threshold)
+
+
+def greedy_match(iou: np.ndarray, iou_threshold: float = 0.5) -> List[Tuple[int, int, float]]:
+    """
+    Greedy row-by-row matching on an IoU matrix
+
+    Each row, in order, takes its highest-IoU unmatched column if that IoU is
+    strictly above the threshold.
+
+    Returns:
+        List of (row, col, iou) matches
+    """
+    if iou.size == 0:
+        return []
+
+    available = iou.astype(np.float64, copy=True)
+    matches = []
+    for row in range(available.shape[0]):
+        col = int(np.argmax(available[row]))
+        best = available[row, col]
+        if best > iou_threshold:
+            matches.append((row, col, float(iou[row, col])))
+            available[:, col] = -1.0
+    return matches
+
+
+def optimal_match(iou: np.ndarray, iou_threshold: float = 0.5) -> List[Tuple[int, int, float]]:
+    """
+    Order-independent matching that maximizes total IoU (Hungarian / LAPJV)
+
+    Pairs at or below the threshold are never matched. Falls back to
+    greedy_match when SciPy is not installed.
+
+    Returns:
+        List of (row, col, iou) matches sorted by row
+    """
+    if iou.size == 0:
+        return []
+    linear_sum_assignment = load_assignment_solver()
+    if linear_sum_assignment is None:
+        return greedy_match(iou, iou_threshold)
+
+    allowed = np.where(iou > iou_threshold, iou, 0.0)
+    rows, cols = linear_sum_assignment(allowed, maximize=True)
+    return [
+        (int(r), int(c), float(iou[r, c]))
+        for r, c in zip(rows, cols)
+        if iou[r, c] > iou_threshold
+    ]
+
+
+def best_match_indices(boxes_a, boxes_b, default: int = 0) -> np.ndarray:
+    """
+    For each box in boxes_a, index of the highest-IoU box in boxes_b
+
+    Rows with no positive overlap get `default`.
+    """
+    iou = iou_matrix(boxes_a, boxes_b)
+    if iou.shape[1] == 0:
+        return np.full(iou.shape[0], default, dtype=np.int64)
+    best = np.argmax(iou, axis=1)
+    best[iou[np.arange(len(best)), best] <= 0] = default
+    return best
@@ -0,0 +1,128 @@
+"""
+Layer 1 Cascade Scheduler
+Decides how the speed and accuracy YOLO models share a frame
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from .inference_service import InferenceService
+
+
+@dataclass
+class CascadePolicy:
+    """When the speed model's result is uncertain enough to escalate"""
+    confident_threshold: float = 0.5     # Detections below this are "uncertain"
+    max_uncertain_ratio: float = 0.3     # Escalate if more than this fraction is uncertain
+    min_count: int = 1                   # Escalate if fewer detections (e.g. empty frame)
+    max_count: int = 20                  # Escalate on crowded frames
+
+    def should_escalate(self, confidences: np.ndarray) -> Tuple[bool, str]:
+        count = len(confidences)
+        if count < self.min_count:
+            return True, "too_few_detections"
+        if count > self.max_count:
+            return True, "crowded_frame"
+        uncertain_ratio = float(np.mean(confidences < self.confident_threshold))
+        if uncertain_ratio > self.max_uncertain_ratio:
+            return True, "low_confidence"
+        return False, "confident"
+
+
+@dataclass
+class CascadeResult:
+    """Layer 1 output for one frame"""
+    results: Dict[str, list]   # model name -> ultralytics Results list; accuracy absent if skipped
+    mode: str
+    escalated: bool
+    reason: str
+    queue_wait_ms: float
+    batch_size: int
+
+
+class CascadeScheduler:
+    """
+    Two scheduling modes for the speed/accuracy model pair:
+
+    - "cascade": run the speed model, and run the accuracy model only when the
+      speed result is uncertain according to the CascadePolicy
+    - "parallel": run both models at once on their own worker threads
+
+    Layer 1 time becomes roughly the speed model's time (cascade, confident
+    frames) or max(speed, accuracy) (parallel) instead of their sum.
+    """
+    MODES = ('cascade', 'parallel')
+
+    def __init__(self,
+                 service: InferenceService,
+                 mode: str = 'parallel',
+                 policy: Optional[CascadePolicy] = None,
+                 speed_model: str = 'speed',
+                 accuracy_model: str = 'accuracy'):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown scheduler mode: {mode}. Available: {list(self.MODES)}")
+
+        self.service = service
+        self.mode = mode
+        self.policy = policy or CascadePolicy()
+        self.speed_model = speed_model
+        self.accuracy_model = accuracy_model
+
+        self._frames = 0
+        self._escalations = 0
+
+    async def detect(self, image: Any, conf: float = 0.25) -> CascadeResult:
+        """Run Layer 1 on a frame according to the scheduling mode"""
+        self._frames += 1
+
+        if self.mode == 'parallel':
+            batched = await self.service.infer(
+                image, conf=conf, models=[self.speed_model, self.accuracy_model]
+            )
+            return CascadeResult(
+                results=batched.results,
+                mode=self.mode,
+                escalated=True,
+                reason="parallel",
+                queue_wait_ms=batched.queue_wait_ms,
+                batch_size=batched.batch_size
+            )
+
+        # Cascade: speed first, accuracy only when needed
+        fast = await self.service.infer(image, conf=conf, models=[self.speed_model])
+        results = dict(fast.results)
+        queue_wait_ms = fast.queue_wait_ms
+
+        boxes = results[self.speed_model][0].boxes
+        confidences = boxes.conf.cpu().numpy() if len(boxes) else np.zeros(0)
+        escalated, reason = self.policy.should_escalate(confidences)
+
+        if escalated:
+            self._escalations += 1
+            slow = await self.service.infer(image, conf=conf, models=[self.accuracy_model])
+            results.update(slow.results)
+            queue_wait_ms += slow.queue_wait_ms
+
+        return CascadeResult(
+            results=results,
+            mode=self.mode,
+            escalated=escalated,
+            reason=reason,
+            queue_wait_ms=queue_wait_ms,
+            batch_size=fast.batch_size
+        )
+
+    def get_stats(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'frames': self._frames,
+            'escalations': self._escalations,
+            'escalation_rate': round(self._escalations / self._frames, 3) if self._frames else 0.0,
+            'policy': {
+                'confident_threshold': self.policy.confident_threshold,
+                'max_uncertain_ratio': self.policy.max_uncertain_ratio,
+                'min_count': self.policy.min_count,
+                'max_count': self.policy.max_count
+            }
+        }
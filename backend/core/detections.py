@@ -0,0 +1,177 @@
+"""
+Detection Extraction
+Columnar conversion of YOLO results (one tensor-to-NumPy transfer per result
+instead of indexing tensors box by box) and the DetectionBatch type shared by
+the three layers
+"""
+
+import numpy as np
+from dataclasses import dataclass, field, fields, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def boxes_to_arrays(boxes) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Split an ultralytics Boxes object into NumPy columns
+
+    Boxes.data packs [x1, y1, x2, y2, (track_id), confidence, class] per row,
+    so a single .cpu().numpy() moves everything off the device at once.
+
+    Returns:
+        (xyxy (N, 4) float32, confidences (N,) float32, class_ids (N,) int64,
+        track_ids (N,) int64 or None when the results are not from tracking)
+    """
+    data = boxes.data
+    if hasattr(data, "cpu"):
+        data = data.cpu().numpy()
+    data = np.asarray(data, dtype=np.float32).reshape(-1, data.shape[-1])
+
+    xyxy = data[:, :4]
+    confidences = data[:, -2]
+    class_ids = data[:, -1].astype(np.int64)
+    track_ids = data[:, 4].astype(np.int64) if getattr(boxes, "is_track", False) else None
+    return xyxy, confidences, class_ids, track_ids
+
+
+def boxes_to_lists(boxes) -> Tuple[List[List[float]], List[float], List[int], Optional[List[int]]]:
+    """
+    Same columns as boxes_to_arrays, as Python lists (one tolist() per column)
+    for building JSON-ready detection dicts
+    """
+    xyxy, confidences, class_ids, track_ids = boxes_to_arrays(boxes)
+    return (
+        xyxy.tolist(),
+        confidences.tolist(),
+        class_ids.tolist(),
+        track_ids.tolist() if track_ids is not None else None
+    )
+
+
+def normalize_boxes(xyxy: np.ndarray, orig_shape: Tuple[int, int]) -> np.ndarray:
+    """xyxy pixel boxes to [0, 1] coordinates for an image of (height, width)"""
+    height, width = orig_shape[:2]
+    return xyxy / np.array([width, height, width, height], dtype=xyxy.dtype)
+
+
+# ============================================
+# Columnar detection batch
+# ============================================
+
+@dataclass
+class DetectionBatch:
+    """
+    One frame's detections as NumPy columns, passed through all three layers.
+
+    Layer 1 fills boxes/scores/class_ids. RNNTemporal adds the temporal
+    columns in place and replaces scores with the temporally smoothed
+    confidence. FusionEnhanced builds a new batch with the fusion columns.
+    Columns a layer has not produced yet are None. Detections are only turned
+    into dicts at the API edge (to_dicts / the endpoint's response builder).
+    """
+    boxes: np.ndarray                   # (N, 4) float64 xyxy pixels
+    scores: np.ndarray                  # (N,) float64 current confidence
+    class_ids: np.ndarray               # (N,) int64
+    names: Dict[int, str] = field(default_factory=dict)
+
+    # Layer 2: temporal tracking
+    track_ids: Optional[np.ndarray] = None        # (N,) object, track id or None
+    track_ages: Optional[np.ndarray] = None       # (N,) int64
+    original_scores: Optional[np.ndarray] = None  # (N,) Layer 1 confidence, NaN if unknown
+    temporal_boost: Optional[np.ndarray] = None   # (N,) scores - original_scores
+    trends: Optional[np.ndarray] = None           # (N,) object, confidence trend
+
+    # Layer 3: fusion
+    fusion_source: Optional[np.ndarray] = None    # (N,) object: fused / yolo_only / rnn_only
+    yolo_scores: Optional[np.ndarray] = None      # (N,) NaN unless fused
+    rnn_scores: Optional[np.ndarray] = None       # (N,) NaN unless fused
+    ious: Optional[np.ndarray] = None             # (N,) NaN unless fused
+    fusion_weights: Optional[np.ndarray] = None   # (N, 2) yolo/rnn weights, NaN unless fused
+
+    @classmethod
+    def empty(cls, names: Optional[Dict[int, str]] = None) -> "DetectionBatch":
+        return cls(
+            boxes=np.zeros((0, 4), dtype=np.float64),
+            scores=np.zeros(0, dtype=np.float64),
+            class_ids=np.zeros(0, dtype=np.int64),
+            names=names or {}
+        )
+
+    @classmethod
+    def from_results(cls, results: Sequence, names: Optional[Dict[int, str]] = None) -> "DetectionBatch":
+        """Layer 1 batch from a list of ultralytics Results (normally one per frame)"""
+        columns = [boxes_to_arrays(r.boxes) for r in results]
+        if names is None:
+            names = results[0].names if len(results) else {}
+        if not columns:
+            return cls.empty(names)
+        return cls(
+            boxes=np.concatenate([c[0] for c in columns]).astype(np.float64),
+            scores=np.concatenate([c[1] for c in columns]).astype(np.float64),
+            class_ids=np.concatenate([c[2] for c in columns]),
+            names=names
+        )
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def labels(self) -> List[str]:
+        """Class name of each detection"""
+        names = self.names
+        return [names.get(c, 'unknown') for c in self.class_ids.tolist()]
+
+    def _columns(self):
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, np.ndarray):
+                yield f.name, value
+
+    def select(self, index) -> "DetectionBatch":
+        """New batch with the rows picked by an index array or boolean mask"""
+        return replace(self, **{name: column[index] for name, column in self._columns()})
+
+    def copy(self) -> "DetectionBatch":
+        return replace(self, **{name: column.copy() for name, column in self._columns()})
+
+    def to_dicts(self) -> List[Dict]:
+        """
+        Per-detection dicts with the keys the layers have always used
+        (class, confidence, bbox, class_id, track_id, ...). Columns that do
+        not apply to a row (untracked, not fused) are left out of its dict.
+        """
+        rows = [
+            {'class': label, 'confidence': score, 'bbox': bbox, 'class_id': class_id}
+            for label, score, bbox, class_id in zip(
+                self.labels(), self.scores.tolist(), self.boxes.tolist(), self.class_ids.tolist()
+            )
+        ]
+
+        def add(key, column, skip=None):
+            if column is None:
+                return
+            for row, value in zip(rows, column.tolist()):
+                if value is None or value != value:  # None or NaN
+                    continue
+                if skip is None or not skip(row):
+                    row[key] = value
+
+        untracked = lambda row: 'track_id' not in row
+        add('track_id', self.track_ids)
+        add('track_age', self.track_ages, untracked)
+        add('original_confidence', self.original_scores)
+        add('temporal_boost', self.temporal_boost)
+        add('confidence_trend', self.trends)
+        add('fusion_source', self.fusion_source)
+        add('yolo_confidence', self.yolo_scores)
+        add('rnn_confidence', self.rnn_scores)
+        add('iou', self.ious)
+        if self.fusion_weights is not None:
+            add('weights', format_fusion_weights(self.fusion_weights))
+        return rows
+
+
+def format_fusion_weights(weights: np.ndarray) -> np.ndarray:
+    """(N, 2) yolo/rnn weights to "Y:0.60,R:0.40" strings (None where NaN)"""
+    return np.array([
+        f"Y:{y:.2f},R:{r:.2f}" if y == y else None
+        for y, r in weights.tolist()
+    ], dtype=object)
@@ -3,6 +3,7 @@ Falcon Duality AI - Image Retrieval & Augmentation System
 Retrieves images from training dataset and creates augmented versions for self-healing
 """
 
+import logging
 import os
 import random
 from pathlib import Path
@@ -13,6 +14,10 @@ import base64
 import io
 import shutil
 
+from .label_index import LabelIndex
+
+logger = logging.getLogger(__name__)
+
 
 class FalconDualityAI:
     """
@@ -57,6 +62,9 @@ class FalconDualityAI:
         self.labels_dir = self.dataset_dir / "labels"
         self.images_dir = self.dataset_dir / "images"
         
+        # Class -> image catalogue, cached in the dataset directory and rebuilt when it changes
+        self.label_index = LabelIndex(self.labels_dir, self.images_dir)
+        
         # Output directory for generated/augmented images
         self.output_dir = self.base_path / "datasets" / "FALCON-GENERATED"
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -64,9 +72,7 @@ class FalconDualityAI:
         # Augmentation log
         self.augmentation_log: List[Dict] = []
         
-        print(f"🦅 Falcon Duality AI initialized")
-        print(f"   📂 Dataset: {self.dataset_dir}")
-        print(f"   💾 Output: {self.output_dir}")
+        logger.info("🦅 Falcon Duality AI initialized (dataset: %s, output: %s)", self.dataset_dir, self.output_dir)
     
     def find_images_with_class(self, class_name: str) -> List[Path]:
         """
@@ -79,43 +85,17 @@ class FalconDualityAI:
             List of image paths containing the class
         """
         if class_name not in self.CLASS_TO_ID:
-            print(f"⚠️ Unknown class: {class_name}")
-            print(f"   Available classes: {list(self.CLASS_TO_ID.keys())}")
+            logger.warning("⚠️ Unknown class: %s (available: %s)", class_name, list(self.CLASS_TO_ID.keys()))
             return []
         
         class_id = self.CLASS_TO_ID[class_name]
-        matching_images = []
-        
-        print(f"🔍 Searching for {class_name} (class {class_id}) in training dataset...")
         
         if not self.labels_dir.exists():
-            print(f"❌ Labels directory not found: {self.labels_dir}")
+            logger.error("❌ Labels directory not found: %s", self.labels_dir)
             return []
         
-        label_files = list(self.labels_dir.glob("*.txt"))
-        print(f"   📄 Found {len(label_files)} label files")
-        
-        for label_file in label_files:
-            try:
-                with open(label_file, 'r') as f:
-                    lines = f.readlines()
-                
-                for line in lines:
-                    parts = line.strip().split()
-                    if len(parts) > 0 and int(parts[0]) == class_id:
-                        # Found matching class - check for image
-                        # Try different extensions
-                        for ext in ['.png', '.jpg', '.jpeg', '.PNG', '.JPG', '.JPEG']:
-                            image_path = self.images_dir / (label_file.stem + ext)
-                            if image_path.exists():
-                                matching_images.append(image_path)
-                                break
-                        break  # Found class in this file, move to next
-            except Exception as e:
-                print(f"   ⚠️ Error reading {label_file.name}: {e}")
-                continue
-        
-        print(f"✅ Found {len(matching_images)} images with {class_name}")
+        matching_images = self.label_index.images_with_class(class_id)
+        logger.info("✅ Found %d images with %s", len(matching_images), class_name)
         return matching_images
     
     def augment_image(
@@ -136,7 +116,7 @@ class FalconDualityAI:
             List of dicts with augmentation info and paths
         """
         if not image_path.exists():
-            print(f"❌ Image not found: {image_path}")
+            logger.error("❌ Image not found: %s", image_path)
             return []
         
         # Open image
@@ -177,7 +157,7 @@ class FalconDualityAI:
             ("blur_slight", lambda x: x.filter(ImageFilter.GaussianBlur(radius=1))),
         ]
         
-        print(f"🎨 Augmenting: {image_path.name}")
+        logger.debug("🎨 Augmenting: %s", image_path.name)
         
         for aug_name, aug_func in augmentations:
             try:
@@ -202,10 +182,10 @@ class FalconDualityAI:
                 }
                 augmented.append(aug_info)
                 
-                print(f"   ✅ {aug_name} ({size_kb:.1f} KB)")
+                logger.debug("✅ %s (%.1f KB)", aug_name, size_kb)
                 
             except Exception as e:
-                print(f"   ❌ {aug_name} failed: {e}")
+                logger.warning("❌ %s failed for %s: %s", aug_name, image_path.name, e)
                 continue
         
         return augmented
@@ -227,9 +207,7 @@ class FalconDualityAI:
         Returns:
             Dict with processing results
         """
-        print("=" * 80)
-        print(f"🦅 FALCON DUALITY AI - PROCESSING CLASS: {class_name}")
-        print("=" * 80)
+        logger.info("🦅 Falcon Duality AI - processing class: %s", class_name)
         
         start_time = datetime.now()
         
@@ -252,15 +230,12 @@ class FalconDualityAI:
         else:
             selected_images = matching_images[:num_to_process]
         
-        print(f"\n🎲 Selected {num_to_process} images for augmentation:")
-        for img in selected_images:
-            print(f"   - {img.name}")
-        print()
+        logger.debug("🎲 Selected %d images for augmentation: %s", num_to_process, [img.name for img in selected_images])
         
         # Process each image
         all_augmented = []
         for idx, image_path in enumerate(selected_images, 1):
-            print(f"\n📷 Processing Image {idx}/{num_to_process}")
+            logger.debug("📷 Processing image %d/%d", idx, num_to_process)
             
             base_name = f"{class_name}_{idx}"
             augmented = self.augment_image(
@@ -291,15 +266,10 @@ class FalconDualityAI:
         # Log
         self.augmentation_log.append(result)
         
-        # Print summary
-        print("\n" + "=" * 80)
-        print("✅ AUGMENTATION COMPLETE!")
-        print("=" * 80)
-        print(f"📊 Images Generated: {len(all_augmented)}")
-        print(f"💾 Total Size: {total_size:.1f} KB")
-        print(f"⏱️ Processing Time: {processing_time:.2f} seconds")
-        print(f"📂 Output: {self.output_dir / class_name}")
-        print("=" * 80)
+        logger.info(
+            "✅ Augmentation complete: %d images, %.1f KB in %.2fs -> %s",
+            len(all_augmented), total_size, processing_time, self.output_dir / class_name
+        )
         
         return result
     
@@ -331,7 +301,7 @@ class FalconDualityAI:
                     "size_kb": round(len(img_data) / 1024, 1)
                 })
             except Exception as e:
-                print(f"⚠️ Error reading {img_path.name}: {e}")
+                logger.warning("⚠️ Error reading %s: %s", img_path.name, e)
                 continue
         
         return images
@@ -347,12 +317,12 @@ class FalconDualityAI:
             target_dir = self.output_dir / class_name
             if target_dir.exists():
                 shutil.rmtree(target_dir)
-                print(f"🗑️ Cleaned up: {target_dir}")
+                logger.info("🗑️ Cleaned up: %s", target_dir)
         else:
             if self.output_dir.exists():
                 shutil.rmtree(self.output_dir)
                 self.output_dir.mkdir(parents=True, exist_ok=True)
-                print(f"🗑️ Cleaned up all generated images")
+                logger.info("🗑️ Cleaned up all generated images")
     
     def get_statistics(self) -> Dict:
         """Get statistics about the training dataset"""
@@ -360,23 +330,26 @@ class FalconDualityAI:
             "classes": self.CLASSES,
             "dataset_path": str(self.dataset_dir),
             "output_path": str(self.output_dir),
-            "class_counts": {}
+            "class_counts": {},
+            "instance_counts": {}
         }
         
         if not self.labels_dir.exists():
             stats["error"] = "Labels directory not found"
             return stats
         
-        # Count images per class
+        # Images and labelled instances per class
         for class_id, class_name in self.CLASSES.items():
-            count = len(self.find_images_with_class(class_name))
-            stats["class_counts"][class_name] = count
+            stats["class_counts"][class_name] = self.label_index.image_count(class_id)
+            stats["instance_counts"][class_name] = self.label_index.instance_count(class_id)
+        stats["index"] = self.label_index.get_status()
         
         return stats
 
 
 # Standalone test
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("=" * 80)
     print("🦅 FALCON DUALITY AI - STANDALONE TEST")
     print("=" * 80)
@@ -3,6 +3,7 @@ Falcon-Link: AI-Powered Synthetic Image Generation
 Uses Hugging Face Inference API to generate real synthetic training images
 """
 
+import logging
 import os
 import httpx
 import base64
@@ -10,6 +11,7 @@ from typing import Optional, Dict, List
 from datetime import datetime
 import asyncio
 
+logger = logging.getLogger(__name__)
 
 class FalconImageGenerator:
     """Generate synthetic safety equipment images using Hugging Face"""
@@ -111,11 +113,11 @@ class FalconImageGenerator:
                         "api_used": True
                     }
                 else:
-                    print(f"⚠️  Hugging Face API error: {response.status_code}")
+                    logger.warning("⚠️  Hugging Face API error: %s", response.status_code)
                     return self._generate_simulated_image(object_class, variation)
                     
         except Exception as e:
-            print(f"⚠️  Image generation failed: {e}")
+            logger.warning("⚠️  Image generation failed: %s", e)
             return self._generate_simulated_image(object_class, variation)
     
     def _generate_simulated_image(self, object_class: str, variation: str) -> Dict:
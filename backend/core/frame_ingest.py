@@ -0,0 +1,116 @@
+"""
+Per-Connection Frame Ingest
+Decouples websocket receive from inference so live streams stay live under load
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class FrameIngest:
+    """
+    Bounded buffer between a websocket's receive loop and its inference loop.
+
+    A receiver task keeps reading frames while the previous one is being
+    processed. When more than `max_pending` frames are waiting, one is
+    dropped according to `drop_policy`:
+
+    - "drop_oldest": discard the oldest pending frame (with max_pending=1 this
+      is latest-frame-wins: results are always for the newest frame)
+    - "drop_newest": discard the incoming frame and keep the queue in order
+    """
+    POLICIES = ('drop_oldest', 'drop_newest')
+
+    def __init__(self, max_pending: int = 1, drop_policy: str = 'drop_oldest'):
+        if drop_policy not in self.POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}. Available: {list(self.POLICIES)}")
+
+        self.max_pending = max(1, max_pending)
+        self.drop_policy = drop_policy
+
+        self._pending: deque = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+        # Counters
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self._latencies = deque(maxlen=300)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, frame: Any) -> bool:
+        """Add a received frame; returns False if it was dropped right away"""
+        self.received += 1
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            if self.drop_policy == 'drop_newest':
+                return False
+            self._pending.popleft()
+        self._pending.append((frame, time.perf_counter()))
+        self._ready.set()
+        return True
+
+    def close(self):
+        """No more frames will arrive; get() returns None once drained"""
+        self._closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[Tuple[Any, float]]:
+        """Next pending (frame, received_at), or None when closed and drained"""
+        while not self._pending:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.popleft()
+
+    async def pump(self, receive: Callable[[], Awaitable[Optional[Any]]]):
+        """
+        Receiver loop: feed frames from `receive` until it returns None
+        (disconnect) or raises; always closes the ingest
+        """
+        try:
+            while True:
+                frame = await receive()
+                if frame is None:
+                    break
+                self.put(frame)
+        except Exception:
+            pass  # The connection is gone either way; the consumer sees closed
+        finally:
+            self.close()
+
+    def mark_processed(self, received_at: float) -> float:
+        """Record a frame whose result was produced; returns end-to-end latency (ms)"""
+        latency_ms = (time.perf_counter() - received_at) * 1000
+        self.processed += 1
+        self._latencies.append(latency_ms)
+        return latency_ms
+
+    def mark_dropped(self):
+        """Record a frame dropped after leaving the buffer (e.g. inference queue full)"""
+        self.dropped += 1
+
+    def get_stats(self) -> Dict:
+        latencies = np.array(self._latencies) if self._latencies else np.zeros(1)
+        return {
+            'received': self.received,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'pending': len(self._pending),
+            'drop_policy': self.drop_policy,
+            'max_pending': self.max_pending,
+            'latency_ms': {
+                'avg': round(float(latencies.mean()), 2),
+                'p95': round(float(np.percentile(latencies, 95)), 2),
+                'last': round(float(latencies[-1]), 2)
+            }
+        }
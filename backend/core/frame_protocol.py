@@ -0,0 +1,183 @@
+"""
+Binary Frame Protocol
+Compact websocket framing for real-time detection (frames in, detections out)
+
+Frame message (client -> server), little-endian, 28-byte header + payload:
+    magic     2s   b"AG"
+    version   u8   1
+    encoding  u8   0 = JPEG, 1 = raw RGB, 2 = raw BGR
+    frame_id  u32  echoed back in the response
+    width     u16  required for raw encodings
+    height    u16  required for raw encodings
+    camera_id 16s  UTF-8, NUL-padded (empty = use the connection's camera_id)
+    payload        JPEG bytes, or height * width * 3 bytes
+
+Detection message (server -> client), 20-byte header + 22 bytes per detection:
+    magic       2s   b"AR"
+    version     u8   1
+    flags       u8   bit 0 = falcon_trigger, bit 1 = detections reused (motion gate)
+    frame_id    u32
+    count       u16
+    reserved    u16
+    latency_ms  f32
+    fps         f32
+    detections       count x (x1, y1, x2, y2, confidence: f32, class_id: u16)
+"""
+
+import struct
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+PROTOCOL_VERSION = 1
+FRAME_MAGIC = b"AG"
+RESPONSE_MAGIC = b"AR"
+
+ENCODING_JPEG = 0
+ENCODING_RGB = 1
+ENCODING_BGR = 2
+ENCODINGS = {ENCODING_JPEG: "jpeg", ENCODING_RGB: "rgb", ENCODING_BGR: "bgr"}
+
+FRAME_HEADER = struct.Struct("<2sBBIHH16s")
+RESPONSE_HEADER = struct.Struct("<2sBBIHHff")
+DETECTION_DTYPE = np.dtype([
+    ('bbox', '<f4', (4,)),
+    ('confidence', '<f4'),
+    ('class_id', '<u2')
+])
+
+FLAG_FALCON_TRIGGER = 0x01
+FLAG_REUSED = 0x02
+
+
+class FrameProtocolError(ValueError):
+    """Raised when a binary message does not follow the protocol"""
+
+
+@dataclass
+class FrameHeader:
+    frame_id: int
+    camera_id: str
+    encoding: int
+    width: int
+    height: int
+
+
+def encode_frame(frame_id: int,
+                 payload: bytes,
+                 encoding: int = ENCODING_JPEG,
+                 camera_id: str = "",
+                 width: int = 0,
+                 height: int = 0) -> bytes:
+    """Build a frame message (reference client implementation)"""
+    header = FRAME_HEADER.pack(
+        FRAME_MAGIC, PROTOCOL_VERSION, encoding, frame_id,
+        width, height, camera_id.encode('utf-8')[:16]
+    )
+    return header + bytes(payload)
+
+
+def parse_frame_header(message: bytes) -> Tuple[FrameHeader, memoryview]:
+    """Split a frame message into its header and a zero-copy payload view"""
+    if len(message) < FRAME_HEADER.size:
+        raise FrameProtocolError(f"Frame message too short ({len(message)} bytes)")
+
+    magic, version, encoding, frame_id, width, height, camera = FRAME_HEADER.unpack_from(message)
+    if magic != FRAME_MAGIC:
+        raise FrameProtocolError(f"Bad frame magic: {magic!r}")
+    if version != PROTOCOL_VERSION:
+        raise FrameProtocolError(f"Unsupported protocol version: {version}")
+    if encoding not in ENCODINGS:
+        raise FrameProtocolError(f"Unknown frame encoding: {encoding}")
+
+    header = FrameHeader(
+        frame_id=frame_id,
+        camera_id=camera.rstrip(b"\0").decode('utf-8', errors='replace'),
+        encoding=encoding,
+        width=width,
+        height=height
+    )
+    return header, memoryview(message)[FRAME_HEADER.size:]
+
+
+class FrameDecoder:
+    """
+    Decodes frame messages to BGR arrays (what YOLO expects for numpy input).
+
+    One decoder per connection: raw RGB frames are channel-swapped into a
+    reused buffer, raw BGR frames are returned as a view of the message, and
+    JPEG goes straight through cv2.imdecode (no base64, no PIL). The returned
+    array is only valid until the next decode() call.
+    """
+    def __init__(self):
+        self._buffer: Optional[np.ndarray] = None
+
+    def decode(self, message: bytes) -> Tuple[FrameHeader, np.ndarray]:
+        import cv2  # On first decode, so importing the API does not load OpenCV
+
+        header, payload = parse_frame_header(message)
+
+        if header.encoding == ENCODING_JPEG:
+            image = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                raise FrameProtocolError("Could not decode JPEG payload")
+            return header, image
+
+        shape = (header.height, header.width, 3)
+        if header.width == 0 or header.height == 0 or len(payload) != shape[0] * shape[1] * 3:
+            raise FrameProtocolError(
+                f"Raw payload is {len(payload)} bytes, expected {shape[0] * shape[1] * 3} for {shape}"
+            )
+        pixels = np.frombuffer(payload, dtype=np.uint8).reshape(shape)
+
+        if header.encoding == ENCODING_BGR:
+            return header, pixels
+
+        if self._buffer is None or self._buffer.shape != shape:
+            self._buffer = np.empty(shape, dtype=np.uint8)
+        cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR, dst=self._buffer)
+        return header, self._buffer
+
+
+def encode_detections(frame_id: int,
+                      boxes: np.ndarray,
+                      confidences: np.ndarray,
+                      class_ids: np.ndarray,
+                      latency_ms: float = 0.0,
+                      fps: float = 0.0,
+                      falcon_trigger: bool = False,
+                      reused: bool = False) -> bytes:
+    """
+    Pack one frame's detections (xyxy boxes, confidences, class ids).
+    reused marks detections carried over from an earlier frame.
+    """
+    count = len(confidences)
+    records = np.empty(count, dtype=DETECTION_DTYPE)
+    records['bbox'] = np.asarray(boxes, dtype=np.float32).reshape(count, 4)
+    records['confidence'] = confidences
+    records['class_id'] = class_ids
+
+    flags = (FLAG_FALCON_TRIGGER if falcon_trigger else 0) | (FLAG_REUSED if reused else 0)
+    header = RESPONSE_HEADER.pack(
+        RESPONSE_MAGIC, PROTOCOL_VERSION, flags, frame_id, count, 0, latency_ms, fps
+    )
+    return header + records.tobytes()
+
+
+def decode_detections(message: bytes) -> Dict:
+    """Unpack a detection message (reference client implementation)"""
+    magic, version, flags, frame_id, count, _, latency_ms, fps = RESPONSE_HEADER.unpack_from(message)
+    if magic != RESPONSE_MAGIC:
+        raise FrameProtocolError(f"Bad response magic: {magic!r}")
+    records = np.frombuffer(message, dtype=DETECTION_DTYPE, count=count, offset=RESPONSE_HEADER.size)
+    return {
+        'frame_id': frame_id,
+        'latency_ms': latency_ms,
+        'fps': fps,
+        'falcon_trigger': bool(flags & FLAG_FALCON_TRIGGER),
+        'reused': bool(flags & FLAG_REUSED),
+        'boxes': records['bbox'],
+        'confidences': records['confidence'],
+        'class_ids': records['class_id']
+    }
@@ -5,7 +5,9 @@ Combines YOLO detections with RNN temporal insights
 
 import numpy as np
 from typing import List, Dict, Tuple
-from collections import deque, defaultdict
+from collections import deque
+from .box_ops import as_boxes, iou_matrix, nms, batched_nms, greedy_match, optimal_match, best_match_indices
+from .detections import DetectionBatch
 
 
 def simple_weighted_boxes_fusion(
@@ -37,22 +39,7 @@ def simple_weighted_boxes_fusion(
         return np.array([]), np.array([]), np.array([])
     
     # Apply NMS-style filtering
-    keep_indices = []
-    sorted_indices = np.argsort(scores)[::-1]
-    
-    while len(sorted_indices) > 0:
-        idx = sorted_indices[0]
-        keep_indices.append(idx)
-        
-        if len(sorted_indices) == 1:
-            break
-        
-        # Compute IoU with remaining boxes
-        ious = np.array([compute_iou(boxes[idx], boxes[i]) for i in sorted_indices[1:]])
-        
-        # Keep boxes with IoU below threshold
-        keep_mask = ious < iou_thr
-        sorted_indices = sorted_indices[1:][keep_mask]
+    keep_indices = nms(boxes, scores, iou_thr)
     
     return boxes[keep_indices], scores[keep_indices], labels[keep_indices]
 
@@ -141,12 +128,14 @@ class SpatioTemporalFusion:
         if len(fused_boxes) == 0:
             return []
         
+        # Find matching metadata (closest IoU) for all fused boxes at once
+        matched_list = self._match_metadata_batch(fused_boxes, metadata_list)
+        
         # Create enhanced detections
         enhanced_detections = []
         
         for i, (box, score, label) in enumerate(zip(fused_boxes, fused_scores, fused_labels)):
-            # Find matching metadata (closest IoU)
-            matched_metadata = self._match_metadata(box, metadata_list)
+            matched_metadata = matched_list[i]
             
             # Denormalize bbox
             h, w = image_size
@@ -190,20 +179,22 @@ class SpatioTemporalFusion:
         """
         Match fused box to original metadata using IoU
         """
+        return self._match_metadata_batch(as_boxes(box), metadata_list)[0]
+    
+    def _match_metadata_batch(self, boxes: np.ndarray, metadata_list: List[Dict]) -> List[Dict]:
+        """
+        Match every fused box to its highest-IoU metadata entry in one IoU matrix
+        (falls back to the first entry when nothing overlaps)
+        """
         if not metadata_list:
-            return {}
+            return [{} for _ in range(len(boxes))]
         
-        best_iou = 0
-        best_metadata = metadata_list[0]
+        candidates = [m for m in metadata_list if 'bbox_normalized' in m]
+        if not candidates:
+            return [metadata_list[0] for _ in range(len(boxes))]
         
-        for metadata in metadata_list:
-            if 'bbox_normalized' in metadata:
-                iou = compute_iou(box, np.array(metadata['bbox_normalized']))
-                if iou > best_iou:
-                    best_iou = iou
-                    best_metadata = metadata
-        
-        return best_metadata
+        best = best_match_indices(boxes, [m['bbox_normalized'] for m in candidates], default=-1)
+        return [candidates[j] if j >= 0 else metadata_list[0] for j in best]
     
     def _smooth_confidence(self, 
                           track_id: int, 
@@ -318,171 +309,142 @@ class FusionEnhanced:
     NEW: Weighted fusion that modifies confidence scores
     Combines YOLO spatial detections with RNN temporal analysis
     """
-    def __init__(self, yolo_weight=0.5, rnn_weight=0.5, iou_threshold=0.5):
+    MATCHERS = {
+        'hungarian': optimal_match,  # Optimal, independent of detection order
+        'greedy': greedy_match       # Fast path: first YOLO detection wins
+    }
+    
+    def __init__(self, yolo_weight=0.5, rnn_weight=0.5, iou_threshold=0.5, matcher='hungarian'):
+        if matcher not in self.MATCHERS:
+            raise ValueError(f"Unknown matcher: {matcher}. Available: {list(self.MATCHERS.keys())}")
+        
         self.yolo_weight = yolo_weight
         self.rnn_weight = rnn_weight
         self.iou_threshold = iou_threshold
+        self.matcher = matcher
+        self._match = self.MATCHERS[matcher]
         
-    def fuse_detections(self, yolo_detections, rnn_detections):
-        """Fuse YOLO and RNN detections with weighted confidence"""
-        fused_detections = []
+    def fuse_detections(self, yolo: DetectionBatch, rnn: DetectionBatch) -> DetectionBatch:
+        """
+        Fuse YOLO and RNN detections with weighted confidence
         
-        # Group detections by class
-        yolo_by_class = self._group_by_class(yolo_detections)
-        rnn_by_class = self._group_by_class(rnn_detections)
+        Both batches use the same class ids (the RNN batch is derived from the
+        YOLO one). Returns a new batch with the fusion columns filled.
+        """
+        yolo_idx, rnn_idx, ious = self._match_by_class(yolo, rnn)
+        
+        has_yolo = yolo_idx >= 0
+        has_rnn = rnn_idx >= 0
+        matched = has_yolo & has_rnn
+        yolo_only = ~has_rnn
+        rnn_only = ~has_yolo
+        
+        # Unmatched detections pass through from their own layer
+        count = len(yolo_idx)
+        boxes = np.empty((count, 4), dtype=np.float64)
+        scores = np.empty(count, dtype=np.float64)
+        class_ids = np.empty(count, dtype=np.int64)
+        boxes[has_yolo] = yolo.boxes[yolo_idx[has_yolo]]
+        scores[has_yolo] = yolo.scores[yolo_idx[has_yolo]]
+        class_ids[has_yolo] = yolo.class_ids[yolo_idx[has_yolo]]
+        boxes[rnn_only] = rnn.boxes[rnn_idx[rnn_only]]
+        scores[rnn_only] = rnn.scores[rnn_idx[rnn_only]]
+        class_ids[rnn_only] = rnn.class_ids[rnn_idx[rnn_only]]
+        
+        # Matched pairs: weighted fusion of confidence and box
+        yolo_conf = yolo.scores[yolo_idx[matched]]
+        rnn_conf = rnn.scores[rnn_idx[matched]]
+        yolo_w, rnn_w = self._fusion_weights(ious[matched])
+        scores[matched] = yolo_conf * yolo_w + rnn_conf * rnn_w
+        boxes[matched] = (yolo.boxes[yolo_idx[matched]] * yolo_w[:, None]
+                          + rnn.boxes[rnn_idx[matched]] * rnn_w[:, None])
+        
+        def fused_only(values):
+            column = np.full(count, np.nan)
+            column[matched] = values
+            return column
+        
+        weights = np.full((count, 2), np.nan)
+        weights[matched, 0] = yolo_w
+        weights[matched, 1] = rnn_w
+        
+        fused = DetectionBatch(
+            boxes=boxes,
+            scores=scores,
+            class_ids=class_ids,
+            names=yolo.names or rnn.names,
+            fusion_source=np.where(matched, 'fused', np.where(yolo_only, 'yolo_only', 'rnn_only')).astype(object),
+            yolo_scores=fused_only(yolo_conf),
+            rnn_scores=fused_only(rnn_conf),
+            ious=fused_only(ious[matched]),
+            fusion_weights=weights
+        )
         
-        all_classes = set(yolo_by_class.keys()) | set(rnn_by_class.keys())
-        
-        for class_name in all_classes:
-            yolo_class_dets = yolo_by_class.get(class_name, [])
-            rnn_class_dets = rnn_by_class.get(class_name, [])
-            
-            # Fuse matching detections
-            fused_class_dets = self._fuse_class_detections(yolo_class_dets, rnn_class_dets)
-            fused_detections.extend(fused_class_dets)
+        # Temporal columns come from the RNN side when there is one
+        for name, fill in (('track_ids', None), ('track_ages', 0), ('original_scores', np.nan),
+                           ('temporal_boost', 0.0), ('trends', None)):
+            yolo_col, rnn_col = getattr(yolo, name), getattr(rnn, name)
+            if yolo_col is None and rnn_col is None:
+                continue
+            dtype = (rnn_col if rnn_col is not None else yolo_col).dtype
+            column = np.full(count, fill, dtype=dtype)
+            if yolo_col is not None:
+                column[yolo_only] = yolo_col[yolo_idx[yolo_only]]
+            if rnn_col is not None:
+                column[has_rnn] = rnn_col[rnn_idx[has_rnn]]
+            setattr(fused, name, column)
         
         # Apply NMS to remove duplicates
-        fused_detections = self._apply_nms(fused_detections)
-        
-        return fused_detections
+        return self._apply_nms(fused)
     
-    def _group_by_class(self, detections):
-        """Group detections by class name"""
-        grouped = defaultdict(list)
-        for det in detections:
-            class_name = det.get('class', 'unknown')
-            grouped[class_name].append(det)
-        return dict(grouped)
-    
-    def _fuse_class_detections(self, yolo_dets, rnn_dets):
-        """Fuse detections of the same class"""
-        fused = []
-        matched_rnn = set()
-        
-        for yolo_det in yolo_dets:
-            best_match = None
-            best_iou = 0
-            best_idx = -1
-            
-            # Find matching RNN detection
-            for idx, rnn_det in enumerate(rnn_dets):
-                if idx in matched_rnn:
-                    continue
-                
-                iou = self._calculate_iou(yolo_det['bbox'], rnn_det['bbox'])
-                if iou > best_iou and iou > self.iou_threshold:
-                    best_iou = iou
-                    best_match = rnn_det
-                    best_idx = idx
-            
-            if best_match:
-                # Fuse matched detections
-                fused_det = self._weighted_fusion(yolo_det, best_match, best_iou)
-                matched_rnn.add(best_idx)
-            else:
-                # Use YOLO detection only
-                fused_det = {
-                    **yolo_det,
-                    'fusion_source': 'yolo_only',
-                    'final_confidence': yolo_det['confidence']
-                }
+    def _match_by_class(self, yolo: DetectionBatch, rnn: DetectionBatch) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Match YOLO and RNN detections of the same class
+        
+        Returns:
+            (yolo_idx, rnn_idx, iou) per fused row: every YOLO detection in
+            order, then the unmatched RNN detections; -1 marks the missing
+            side of an unmatched row
+        """
+        partner = np.full(len(yolo), -1, dtype=np.int64)
+        partner_iou = np.full(len(yolo), np.nan)
+        taken = np.zeros(len(rnn), dtype=bool)
+        
+        for class_id in np.unique(np.concatenate([yolo.class_ids, rnn.class_ids])):
+            yolo_class = np.flatnonzero(yolo.class_ids == class_id)
+            rnn_class = np.flatnonzero(rnn.class_ids == class_id)
+            if len(yolo_class) == 0 or len(rnn_class) == 0:
+                continue
             
-            fused.append(fused_det)
-        
-        # Add unmatched RNN detections
-        for idx, rnn_det in enumerate(rnn_dets):
-            if idx not in matched_rnn:
-                fused_det = {
-                    **rnn_det,
-                    'fusion_source': 'rnn_only',
-                    'final_confidence': rnn_det['confidence'] * 0.8  # Penalize RNN-only
-                }
-                fused.append(fused_det)
-        
-        return fused
+            # Cost matrix for the whole class in one step, then solve the assignment
+            ious = iou_matrix(yolo.boxes[yolo_class], rnn.boxes[rnn_class])
+            matches = self._match(ious, self.iou_threshold)
+            if not matches:
+                continue
+            rows, cols, values = (np.array(column) for column in zip(*matches))
+            partner[yolo_class[rows]] = rnn_class[cols]
+            partner_iou[yolo_class[rows]] = values
+            taken[rnn_class[cols]] = True
+        
+        unmatched_rnn = np.flatnonzero(~taken)
+        return (np.concatenate([np.arange(len(yolo)), np.full(len(unmatched_rnn), -1)]),
+                np.concatenate([partner, unmatched_rnn]),
+                np.concatenate([partner_iou, np.full(len(unmatched_rnn), np.nan)]))
     
-    def _weighted_fusion(self, yolo_det, rnn_det, iou):
-        """Weighted fusion of YOLO and RNN detections"""
-        yolo_conf = yolo_det.get('confidence', 0.0)
-        rnn_conf = rnn_det.get('confidence', 0.0)
-        
-        # Adjust weights based on IOU (higher IOU = more trust in fusion)
+    def _fusion_weights(self, iou: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """YOLO/RNN weights for matched pairs (higher IOU = more trust in fusion)"""
         iou_factor = (iou - self.iou_threshold) / (1 - self.iou_threshold)
         adjusted_yolo_weight = self.yolo_weight * (1 + 0.2 * iou_factor)
         adjusted_rnn_weight = self.rnn_weight * (1 + 0.2 * iou_factor)
         
         # Normalize weights
         total_weight = adjusted_yolo_weight + adjusted_rnn_weight
-        adjusted_yolo_weight /= total_weight
-        adjusted_rnn_weight /= total_weight
-        
-        # Fused confidence
-        fused_conf = (yolo_conf * adjusted_yolo_weight) + (rnn_conf * adjusted_rnn_weight)
-        
-        # Fused bounding box (weighted average)
-        yolo_bbox = yolo_det['bbox']
-        rnn_bbox = rnn_det['bbox']
-        fused_bbox = [
-            yolo_bbox[i] * adjusted_yolo_weight + rnn_bbox[i] * adjusted_rnn_weight
-            for i in range(4)
-        ]
-        
-        return {
-            'class': yolo_det['class'],
-            'confidence': fused_conf,
-            'bbox': fused_bbox,
-            'yolo_confidence': yolo_conf,
-            'rnn_confidence': rnn_conf,
-            'temporal_boost': rnn_det.get('temporal_boost', 0.0),
-            'track_id': rnn_det.get('track_id', 'no_track'),
-            'track_age': rnn_det.get('track_age', 0),
-            'fusion_source': 'fused',
-            'iou': iou,
-            'weights': f"Y:{adjusted_yolo_weight:.2f},R:{adjusted_rnn_weight:.2f}"
-        }
-    
-    def _calculate_iou(self, box1, box2):
-        """Calculate Intersection over Union"""
-        x1 = max(box1[0], box2[0])
-        y1 = max(box1[1], box2[1])
-        x2 = min(box1[2], box2[2])
-        y2 = min(box1[3], box2[3])
-        
-        intersection = max(0, x2 - x1) * max(0, y2 - y1)
-        
-        area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
-        area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
-        union = area1 + area2 - intersection
-        
-        return intersection / union if union > 0 else 0
+        return adjusted_yolo_weight / total_weight, adjusted_rnn_weight / total_weight
     
-    def _apply_nms(self, detections, nms_threshold=0.45):
-        """Apply Non-Maximum Suppression to remove duplicates"""
-        if not detections:
-            return []
-        
-        # Group by class
-        by_class = defaultdict(list)
-        for det in detections:
-            by_class[det['class']].append(det)
-        
-        final_detections = []
-        
-        for class_name, class_dets in by_class.items():
-            # Sort by confidence
-            class_dets.sort(key=lambda x: x['confidence'], reverse=True)
-            
-            keep = []
-            while class_dets:
-                best = class_dets.pop(0)
-                keep.append(best)
-                
-                # Remove overlapping detections
-                class_dets = [
-                    det for det in class_dets
-                    if self._calculate_iou(best['bbox'], det['bbox']) < nms_threshold
-                ]
-            
-            final_detections.extend(keep)
+    def _apply_nms(self, detections: DetectionBatch, nms_threshold=0.45) -> DetectionBatch:
+        """Apply per-class Non-Maximum Suppression to remove duplicates"""
+        if len(detections) == 0:
+            return detections
         
-        return final_detections
\ No newline at end of file
+        keep = batched_nms(detections.boxes, detections.scores, detections.class_ids, nms_threshold)
+        return detections.select(keep)
@@ -0,0 +1,260 @@
+"""
+Batched YOLO Inference Service
+Moves Layer 1 model calls off the event loop and micro-batches concurrent frames
+"""
+
+import asyncio
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference queue is at capacity"""
+
+
+@dataclass
+class BatchedResult:
+    """Per-request output of a batched inference call"""
+    results: Dict[str, list]   # model name -> ultralytics Results list (len 1)
+    queue_wait_ms: float
+    inference_ms: float
+    batch_size: int
+
+
+@dataclass
+class _InferenceRequest:
+    image: Any
+    conf: float
+    model_names: Tuple[str, ...]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class InferenceService:
+    """
+    Collects frames submitted from request handlers into a queue, gathers
+    everything that arrives within a short window into one batch, and runs
+    one batched YOLO call per model.
+
+    YOLO models are not safe to call from several threads at once, so each
+    model gets its own single worker thread. Different models in the same
+    batch therefore run in parallel.
+    """
+    def __init__(self,
+                 models: Dict[str, Any],
+                 max_batch_size: int = 8,
+                 batch_window_ms: float = 5.0,
+                 max_queue_depth: int = 64,
+                 model_observer: Optional[Callable[[str, int, float], None]] = None):
+        """
+        Args:
+            models: Mapping of model name to YOLO model (e.g. {"speed": ..., "accuracy": ...})
+            max_batch_size: Maximum frames per batched model call
+            batch_window_ms: How long to wait for more frames after the first one arrives
+            max_queue_depth: Pending frames allowed before new requests are rejected
+            model_observer: Called with (model name, frames, seconds) after each
+                model call, from the model's worker thread
+        """
+        self.models = models
+        self.model_observer = model_observer
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = max(0.0, batch_window_ms) / 1000.0
+        self.max_queue_depth = max(1, max_queue_depth)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self._in_flight: List[_InferenceRequest] = []  # Batch taken off the queue, not yet resolved
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+
+        # Metrics
+        self._queue_waits = deque(maxlen=1000)
+        self._batch_fills = deque(maxlen=1000)
+        self._inference_times = deque(maxlen=1000)
+        self._requests_served = 0
+        self._requests_rejected = 0
+        self._batches_run = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._worker_task is not None and not self._worker_task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """Start the batching worker (idempotent)"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_depth)
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"yolo-{name}")
+            for name in self.models
+        }
+        self._worker_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker and fail every request in flight or still waiting"""
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+            self._worker_task = None
+
+        pending = self._in_flight
+        self._in_flight = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+        for request in pending:
+            if not request.future.done():
+                request.future.set_exception(RuntimeError("Inference service stopped"))
+
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+        self._executors = {}
+
+    async def infer(self,
+                    image: Any,
+                    conf: float = 0.25,
+                    models: Optional[Sequence[str]] = None) -> BatchedResult:
+        """
+        Queue a frame for inference and wait for its batched result
+
+        Args:
+            image: Anything the YOLO model accepts (numpy array or PIL image)
+            conf: Confidence threshold passed to the model
+            models: Names of the models to run (default: all)
+
+        Returns:
+            BatchedResult with one Results list per requested model
+        """
+        if not self.is_running:
+            await self.start()
+
+        model_names = tuple(models) if models else tuple(self.models.keys())
+        future = asyncio.get_running_loop().create_future()
+        request = _InferenceRequest(image=image, conf=conf, model_names=model_names, future=future)
+
+        try:
+            self._queue.put_nowait(request)
+        except asyncio.QueueFull:
+            self._requests_rejected += 1
+            raise InferenceQueueFull(
+                f"Inference queue is full ({self.max_queue_depth} pending frames)"
+            )
+
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = self._in_flight = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+
+            # Gather whatever else arrives inside the batching window
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, 0.001))
+
+            dispatched_at = time.perf_counter()
+            for request in batch:
+                self._queue_waits.append((dispatched_at - request.enqueued_at) * 1000)
+            self._batch_fills.append(len(batch) / self.max_batch_size)
+            self._batches_run += 1
+
+            try:
+                outputs = await self._run_batch(loop, batch)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                self._in_flight = []
+                continue
+
+            inference_ms = (time.perf_counter() - dispatched_at) * 1000
+            self._inference_times.append(inference_ms)
+
+            for request, results in zip(batch, outputs):
+                if request.future.done():  # Caller went away
+                    continue
+                request.future.set_result(BatchedResult(
+                    results=results,
+                    queue_wait_ms=(dispatched_at - request.enqueued_at) * 1000,
+                    inference_ms=inference_ms,
+                    batch_size=len(batch)
+                ))
+                self._requests_served += 1
+            self._in_flight = []
+
+    async def _run_batch(self, loop, batch: List[_InferenceRequest]) -> List[Dict[str, list]]:
+        """One model call per (model, conf) group, each model on its own thread"""
+        outputs: List[Dict[str, list]] = [{} for _ in batch]
+
+        groups = defaultdict(list)
+        for idx, request in enumerate(batch):
+            for name in request.model_names:
+                groups[(name, request.conf)].append(idx)
+
+        keys = list(groups.keys())
+        group_results = await asyncio.gather(*[
+            loop.run_in_executor(
+                self._executors[name],
+                self._call_model,
+                name, conf, [batch[i].image for i in groups[(name, conf)]]
+            )
+            for name, conf in keys
+        ])
+
+        for (name, conf), results in zip(keys, group_results):
+            for idx, result in zip(groups[(name, conf)], results):
+                outputs[idx][name] = [result]
+
+        return outputs
+
+    def _call_model(self, name: str, conf: float, images: list) -> list:
+        """Runs in the model's worker thread"""
+        model = self.models[name]
+        start = time.perf_counter()
+        results = model(images, conf=conf, verbose=False)
+        if self.model_observer is not None:
+            self.model_observer(name, len(images), time.perf_counter() - start)
+        return results
+
+    def get_stats(self) -> Dict:
+        """Queue wait and batch fill metrics over the recent window"""
+        waits = np.array(self._queue_waits) if self._queue_waits else np.zeros(1)
+        return {
+            'running': self.is_running,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'max_batch_size': self.max_batch_size,
+            'batch_window_ms': round(self.batch_window * 1000, 2),
+            'requests_served': self._requests_served,
+            'requests_rejected': self._requests_rejected,
+            'batches_run': self._batches_run,
+            'queue_wait_ms': {
+                'avg': round(float(waits.mean()), 2),
+                'p50': round(float(np.percentile(waits, 50)), 2),
+                'p95': round(float(np.percentile(waits, 95)), 2),
+                'max': round(float(waits.max()), 2)
+            },
+            'avg_batch_fill': round(float(np.mean(self._batch_fills)), 3) if self._batch_fills else 0.0,
+            'avg_batch_size': round(float(np.mean(self._batch_fills)) * self.max_batch_size, 2) if self._batch_fills else 0.0,
+            'avg_inference_ms': round(float(np.mean(self._inference_times)), 2) if self._inference_times else 0.0
+        }
@@ -0,0 +1,209 @@
+"""
+Label Index
+Class -> image catalogue of a YOLO dataset (labels/*.txt next to images/),
+built by one scan and cached in SQLite next to the dataset
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# Image extensions tried for a label's stem, in order of preference
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.PNG', '.JPG', '.JPEG')
+
+
+class LabelIndex:
+    """
+    Which images contain which class, with per-class image and instance
+    counts. The index is rebuilt when the labels or images directory's
+    mtime changes (files added, removed or renamed); a label file edited in
+    place keeps the directory mtime, so call rebuild() after such edits.
+
+    Lookups stat the two directories and read from memory.
+    """
+
+    def __init__(self, labels_dir: Path, images_dir: Path, index_path: Optional[Path] = None):
+        """
+        Args:
+            labels_dir: Directory of YOLO label files (<stem>.txt)
+            images_dir: Directory of the matching images (<stem>.<ext>)
+            index_path: SQLite cache file (default: label_index.sqlite next to labels_dir)
+        """
+        self.labels_dir = Path(labels_dir)
+        self.images_dir = Path(images_dir)
+        self.index_path = Path(index_path) if index_path else self.labels_dir.parent / "label_index.sqlite"
+
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._images: Dict[int, List[Path]] = {}
+        self._instances: Dict[int, int] = {}
+        self.label_files = 0
+        self.built_at: Optional[float] = None
+
+    def _current_signature(self) -> Optional[Tuple[int, int]]:
+        """(labels mtime, images mtime) in ns, or None when the labels directory is missing"""
+        try:
+            labels_mtime = self.labels_dir.stat().st_mtime_ns
+        except OSError:
+            return None
+        try:
+            images_mtime = self.images_dir.stat().st_mtime_ns
+        except OSError:
+            images_mtime = 0
+        return labels_mtime, images_mtime
+
+    def _ensure_current(self) -> bool:
+        """Load or rebuild the index if the directories changed; False without a labels directory"""
+        signature = self._current_signature()
+        if signature is None:
+            return False
+        if signature == self._signature:
+            return True
+
+        with self._lock:
+            if signature != self._signature:
+                if not self._load(signature):
+                    self._build(signature)
+        return True
+
+    # ============================================
+    # Lookups
+    # ============================================
+
+    def images_with_class(self, class_id: int) -> List[Path]:
+        """Images with at least one instance of the class (sorted by name)"""
+        if not self._ensure_current():
+            return []
+        return list(self._images.get(class_id, ()))
+
+    def image_count(self, class_id: int) -> int:
+        if not self._ensure_current():
+            return 0
+        return len(self._images.get(class_id, ()))
+
+    def instance_count(self, class_id: int) -> int:
+        """Labelled boxes of the class across all images"""
+        if not self._ensure_current():
+            return 0
+        return self._instances.get(class_id, 0)
+
+    def rebuild(self):
+        """Rescan the dataset regardless of the cached signature"""
+        signature = self._current_signature()
+        if signature is not None:
+            with self._lock:
+                self._build(signature)
+
+    # ============================================
+    # Build and cache
+    # ============================================
+
+    def _build(self, signature: Tuple[int, int]):
+        start = time.perf_counter()
+
+        # One listing of the images directory instead of an exists() per extension per label
+        images: Dict[str, str] = {}
+        rank = {ext: i for i, ext in enumerate(IMAGE_EXTENSIONS)}
+        if self.images_dir.exists():
+            with os.scandir(self.images_dir) as entries:
+                for entry in entries:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext in rank and (stem not in images or rank[ext] < rank[os.path.splitext(images[stem])[1]]):
+                        images[stem] = entry.name
+
+        rows = []  # (class_id, image name, instances)
+        label_files = 0
+        with os.scandir(self.labels_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".txt"):
+                    continue
+                label_files += 1
+                image_name = images.get(entry.name[:-4])
+                if image_name is None:
+                    continue
+                try:
+                    with open(entry.path, 'r') as f:
+                        counts = Counter(int(line.split(maxsplit=1)[0]) for line in f if line.strip())
+                except Exception as e:
+                    logger.warning("⚠️ Error reading %s: %s", entry.name, e)
+                    continue
+                rows.extend((class_id, image_name, n) for class_id, n in counts.items())
+
+        self._set(signature, rows, label_files, time.time())
+        logger.info(
+            "📇 Indexed %d label files (%d class/image pairs) in %.0f ms",
+            label_files, len(rows), (time.perf_counter() - start) * 1000
+        )
+        self._save(signature, rows)
+
+    def _set(self, signature: Tuple[int, int], rows: List[Tuple[int, str, int]], label_files: int, built_at: float):
+        images: Dict[int, List[Path]] = {}
+        instances: Dict[int, int] = {}
+        for class_id, image_name, n in sorted(rows, key=lambda row: row[1]):
+            images.setdefault(class_id, []).append(self.images_dir / image_name)
+            instances[class_id] = instances.get(class_id, 0) + n
+        self._images, self._instances = images, instances
+        self.label_files = label_files
+        self.built_at = built_at
+        self._signature = signature
+
+    def _meta(self, signature: Tuple[int, int]) -> Dict[str, str]:
+        return {
+            'version': str(INDEX_VERSION),
+            'labels_dir': str(self.labels_dir.resolve()),
+            'labels_mtime_ns': str(signature[0]),
+            'images_mtime_ns': str(signature[1])
+        }
+
+    def _load(self, signature: Tuple[int, int]) -> bool:
+        """Use the cached index if it was built for this signature"""
+        if not self.index_path.exists():
+            return False
+        try:
+            with closing(sqlite3.connect(self.index_path)) as db:
+                meta = dict(db.execute("SELECT key, value FROM meta"))
+                if any(meta.get(key) != value for key, value in self._meta(signature).items()):
+                    return False
+                rows = db.execute("SELECT class_id, image, instances FROM entries").fetchall()
+        except sqlite3.Error as e:
+            logger.warning("⚠️ Ignoring unreadable label index %s: %s", self.index_path, e)
+            return False
+
+        self._set(signature, rows, int(meta.get('label_files', 0)), float(meta.get('built_at', 0)))
+        logger.info("📇 Loaded label index %s (%d class/image pairs)", self.index_path, len(rows))
+        return True
+
+    def _save(self, signature: Tuple[int, int], rows: List[Tuple[int, str, int]]):
+        """Write the index to a temporary file and swap it in, so readers never see a partial one"""
+        meta = {**self._meta(signature), 'label_files': str(self.label_files), 'built_at': str(self.built_at)}
+        tmp_path = self.index_path.with_name(self.index_path.name + f".{os.getpid()}.tmp")
+        try:
+            tmp_path.unlink(missing_ok=True)
+            with closing(sqlite3.connect(tmp_path)) as db, db:  # Closed after the commit
+                db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                db.execute("CREATE TABLE entries (class_id INTEGER, image TEXT, instances INTEGER)")
+                db.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+                db.executemany("INSERT INTO entries VALUES (?, ?, ?)", rows)
+            os.replace(tmp_path, self.index_path)
+        except (OSError, sqlite3.Error) as e:
+            # A read-only dataset still works, it is just rescanned by each process
+            logger.warning("⚠️ Could not cache label index at %s: %s", self.index_path, e)
+            tmp_path.unlink(missing_ok=True)
+
+    def get_status(self) -> Dict:
+        """Cache location and when the index was built"""
+        return {
+            'index_path': str(self.index_path),
+            'label_files': self.label_files,
+            'built_at': self.built_at
+        }
@@ -0,0 +1,131 @@
+"""
+Logging Setup
+Leveled, optionally JSON log output written by a background thread (request
+handlers and frame loops only enqueue records), plus sampling for per-frame
+events
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMATS = ('text', 'json')
+
+# Libraries that log every HTTP call at INFO
+NOISY_LOGGERS = ('httpx', 'httpcore', 'urllib3')
+
+# LogRecord attributes; anything else on a record came from extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener: Optional[QueueListener] = None
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class TextFormatter(logging.Formatter):
+    """time level logger: message key=value ... (extra fields appended)"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s", datefmt="%H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message and the extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **_extra_fields(record)
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(level: Optional[str] = None, log_format: Optional[str] = None):
+    """
+    Route all logging through a queue to a stdout writer thread (idempotent)
+
+    Args:
+        level: Minimum level (default: LOG_LEVEL env var, INFO)
+        log_format: "text" or "json" (default: LOG_FORMAT env var, text)
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_format = log_format or os.getenv("LOG_FORMAT", "text")
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format: {log_format}. Available: {list(LOG_FORMATS)}")
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if log_format == 'json' else TextFormatter())
+
+    # Formatting and the write happen on the listener thread
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(level)
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class SampledLogger:
+    """
+    Logs one in every N events, for per-frame messages. When the level is
+    disabled a call costs one level check; callers with expensive arguments
+    guard them with sample().
+    """
+
+    def __init__(self, logger: logging.Logger, every: int = 1):
+        self.logger = logger
+        self.every = max(1, every)
+        self._count = 0
+
+    def sample(self, level: int = logging.INFO) -> bool:
+        """Whether this event should be logged (counts it)"""
+        if not self.logger.isEnabledFor(level):
+            return False
+        self._count += 1
+        return (self._count - 1) % self.every == 0
+
+    def log(self, level: int, msg: str, *args, **kwargs):
+        if self.sample(level):
+            self.logger.log(level, msg, *args, **kwargs)
+
+    def info(self, msg: str, *args, **kwargs):
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.log(logging.WARNING, msg, *args, **kwargs)
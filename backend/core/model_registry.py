@@ -0,0 +1,229 @@
+"""
+Model Registry
+Builds models and model-backed services lazily - on first use or by a
+background warm-up after startup - so the API answers health checks at once
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class ModelLoadError(RuntimeError):
+    """Raised when a registered component failed to load"""
+
+
+@dataclass
+class _Entry:
+    loader: Callable[[], Any]
+    required: bool
+    value: Any = None
+    state: str = "pending"            # pending / loading / ready / failed
+    error: Optional[str] = None
+    load_ms: Optional[float] = None
+    failures: int = 0                 # Consecutive failed loads
+    retry_at: float = 0.0             # time.monotonic() after which a failed load is retried
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ModelRegistry:
+    """
+    Named components that are expensive to build (YOLO/RNN models and the
+    services wrapping them). Nothing is loaded at registration: get() builds
+    a component on first use, once, even when several threads ask at the
+    same time. Loaders import their heavy dependencies (torch, ultralytics)
+    themselves, so importing the app stays cheap.
+
+    A failed load is retried by the next get() once its backoff has passed
+    (retry_backoff seconds, doubling per consecutive failure up to
+    max_retry_backoff), so a transient error does not fail a component for
+    the life of the process. Until then get() fails fast.
+
+    Readiness means every required component is loaded; liveness only means
+    the process is serving requests.
+    """
+    STATES = ('pending', 'loading', 'ready', 'failed')
+
+    def __init__(self, retry_backoff: float = 5.0, max_retry_backoff: float = 300.0):
+        """
+        Args:
+            retry_backoff: Seconds before the first retry of a failed load
+            max_retry_backoff: Upper bound of the doubling backoff
+        """
+        self.retry_backoff = max(0.0, retry_backoff)
+        self.max_retry_backoff = max(self.retry_backoff, max_retry_backoff)
+        self._entries: Dict[str, _Entry] = {}
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self.created_at = time.time()
+        self.ready_at: Optional[float] = None
+
+    def register(self, name: str, loader: Callable[[], Any], required: bool = True):
+        """
+        Args:
+            name: Component name
+            loader: Builds the component (may return None for a disabled one)
+            required: Whether the app counts as ready only once this is loaded
+        """
+        if name in self._entries:
+            raise ValueError(f"Component already registered: {name}")
+        self._entries[name] = _Entry(loader=loader, required=required)
+
+    def _entry(self, name: str) -> _Entry:
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise KeyError(f"Unknown component: {name}. Registered: {list(self._entries)}") from None
+
+    def get(self, name: str) -> Any:
+        """The component, loading it first if needed (blocks while it loads)"""
+        entry = self._entry(name)
+        if entry.state == "ready":
+            return entry.value
+
+        with entry.lock:
+            if entry.state == "failed" and time.monotonic() >= entry.retry_at:
+                logger.info("🔁 Retrying %s (failed %d time(s))", name, entry.failures)
+                entry.state = "pending"
+            if entry.state == "pending":
+                entry.state = "loading"
+                start = time.perf_counter()
+                try:
+                    entry.value = entry.loader()
+                except Exception as e:
+                    entry.state = "failed"
+                    entry.error = f"{type(e).__name__}: {e}"
+                    entry.failures += 1
+                    backoff = min(self.retry_backoff * 2 ** (entry.failures - 1), self.max_retry_backoff)
+                    entry.retry_at = time.monotonic() + backoff
+                    logger.error("❌ Failed to load %s: %s (retry in %.0f s)", name, entry.error, backoff)
+                else:
+                    entry.state = "ready"
+                    entry.error = None
+                    entry.failures = 0
+                    entry.load_ms = (time.perf_counter() - start) * 1000
+                    logger.info("✅ Loaded %s in %.0f ms", name, entry.load_ms)
+                    if self.ready_at is None and self.is_ready:
+                        self.ready_at = time.time()
+
+        if entry.state == "failed":
+            raise ModelLoadError(f"{name} failed to load ({entry.error})")
+        return entry.value
+
+    async def aget(self, name: str) -> Any:
+        """get() for request handlers: loading happens off the event loop"""
+        entry = self._entry(name)
+        if entry.state == "ready":
+            return entry.value
+        return await asyncio.to_thread(self.get, name)
+
+    def peek(self, name: str) -> Any:
+        """The component if it is already loaded, else None (never loads)"""
+        entry = self._entry(name)
+        return entry.value if entry.state == "ready" else None
+
+    def is_loaded(self, name: str) -> bool:
+        return self._entry(name).state == "ready"
+
+    def lazy_mapping(self, names: Sequence[str]) -> Mapping[str, Any]:
+        """Read-only mapping over some components that loads each on first lookup"""
+        return _LazyMapping(self, tuple(names))
+
+    # ============================================
+    # Warm-up and readiness
+    # ============================================
+
+    async def warm_up(self, names: Optional[Sequence[str]] = None):
+        """
+        Load components one after another in a worker thread, then keep
+        retrying the ones that failed as their backoff expires (failures are
+        recorded, not raised)
+        """
+        names = list(names or self._entries)
+        for name in names:
+            try:
+                await self.aget(name)
+            except ModelLoadError:
+                pass
+
+        while True:
+            failed = [self._entries[name] for name in names if self._entries[name].state == "failed"]
+            if not failed:
+                return
+            await asyncio.sleep(max(0.0, min(e.retry_at for e in failed) - time.monotonic()))
+            for name in names:
+                entry = self._entries[name]
+                if entry.state == "failed" and time.monotonic() >= entry.retry_at:
+                    try:
+                        await self.aget(name)
+                    except ModelLoadError:
+                        pass
+
+    def start_warm_up(self, names: Optional[Sequence[str]] = None) -> asyncio.Task:
+        """Schedule warm_up in the background (idempotent)"""
+        if self._warm_up_task is None or self._warm_up_task.done():
+            self._warm_up_task = asyncio.create_task(self.warm_up(names))
+        return self._warm_up_task
+
+    async def stop_warm_up(self):
+        """Stop scheduling further loads (a load already running finishes in its thread)"""
+        if self._warm_up_task is not None and not self._warm_up_task.done():
+            self._warm_up_task.cancel()
+            try:
+                await self._warm_up_task
+            except asyncio.CancelledError:
+                pass
+
+    @property
+    def is_ready(self) -> bool:
+        return all(e.state == "ready" for e in self._entries.values() if e.required)
+
+    @property
+    def failed(self) -> List[str]:
+        return [name for name, e in self._entries.items() if e.state == "failed"]
+
+    def get_status(self) -> Dict:
+        """Readiness and per-component load state"""
+        return {
+            'ready': self.is_ready,
+            'time_to_ready_sec': round(self.ready_at - self.created_at, 2) if self.ready_at else None,
+            'warming_up': self._warm_up_task is not None and not self._warm_up_task.done(),
+            'components': {
+                name: {
+                    'state': entry.state,
+                    'required': entry.required,
+                    'load_ms': round(entry.load_ms, 1) if entry.load_ms is not None else None,
+                    'error': entry.error,
+                    'failures': entry.failures,
+                    'retry_in_sec': (round(max(0.0, entry.retry_at - time.monotonic()), 1)
+                                     if entry.state == "failed" else None)
+                }
+                for name, entry in self._entries.items()
+            }
+        }
+
+
+class _LazyMapping(Mapping):
+    """Keys are known up front; values are loaded by the registry on lookup"""
+    def __init__(self, registry: ModelRegistry, names: Sequence[str]):
+        self._registry = registry
+        self._names = names
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._names:
+            raise KeyError(name)
+        return self._registry.get(name)
+
+    def __contains__(self, name) -> bool:  # Membership must not trigger a load
+        return name in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
@@ -0,0 +1,91 @@
+"""
+Motion-Gated Inference
+Cheap change detection so static camera frames can reuse the last detections
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+class MotionGate:
+    """
+    Compares each frame with the last frame that went through inference,
+    on a small grayscale thumbnail. A frame is only worth inference when
+    enough thumbnail pixels changed, or when the forced refresh is due.
+
+    Comparing against the last *inferred* frame (not the previous frame)
+    means slow drift still triggers inference once it adds up.
+    """
+    def __init__(self,
+                 change_threshold: float = 0.01,
+                 pixel_delta: int = 20,
+                 refresh_interval: int = 30,
+                 thumbnail_size: Tuple[int, int] = (64, 36)):
+        """
+        Args:
+            change_threshold: Fraction of thumbnail pixels that must change
+            pixel_delta: Gray-level difference for a pixel to count as changed
+            refresh_interval: Run inference at least every N frames (0 = never forced)
+            thumbnail_size: (width, height) of the comparison thumbnail
+        """
+        self.change_threshold = change_threshold
+        self.pixel_delta = pixel_delta
+        self.refresh_interval = max(0, refresh_interval)
+        self.thumbnail_size = thumbnail_size
+
+        self._reference = None
+        self._since_inference = 0
+
+        self.frames_seen = 0
+        self.frames_skipped = 0
+
+    def _thumbnail(self, image: Any) -> np.ndarray:
+        if isinstance(image, Image.Image):
+            return np.asarray(image.convert("L").resize(self.thumbnail_size, Image.BILINEAR))
+        import cv2  # Loaded on first use
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        return cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+
+    def check(self, image: Any) -> Tuple[bool, str]:
+        """
+        Returns:
+            (run_inference, reason) - reason is one of first_frame, refresh,
+            motion or static
+        """
+        self.frames_seen += 1
+        thumbnail = self._thumbnail(image)
+
+        if self._reference is None or self._reference.shape != thumbnail.shape:
+            reason = "first_frame"
+        elif self.refresh_interval and self._since_inference + 1 >= self.refresh_interval:
+            reason = "refresh"
+        else:
+            import cv2
+            changed = np.count_nonzero(cv2.absdiff(thumbnail, self._reference) > self.pixel_delta)
+            if changed / thumbnail.size <= self.change_threshold:
+                self._since_inference += 1
+                self.frames_skipped += 1
+                return False, "static"
+            reason = "motion"
+
+        self._reference = thumbnail
+        self._since_inference = 0
+        return True, reason
+
+    def reset(self):
+        """Forget the reference frame (e.g. its inference failed); the next frame is inferred"""
+        self._reference = None
+        self._since_inference = 0
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.frames_skipped / self.frames_seen if self.frames_seen else 0.0
+
+    def get_stats(self) -> Dict:
+        return {
+            'frames_seen': self.frames_seen,
+            'frames_skipped': self.frames_skipped,
+            'skip_ratio': round(self.skip_ratio, 3)
+        }
@@ -0,0 +1,136 @@
+"""
+Layer 2 Quantization
+INT8 CPU inference for the temporal models: dynamic quantization for the
+RNN's LSTM/GRU/Linear layers, calibrated static (FX) quantization for the
+ROI feature backbone
+"""
+
+import copy
+import warnings
+from typing import Iterable
+
+import torch
+import torch.nn as nn
+
+# torch.ao.quantization (optional - fp32 is used without it)
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # Deprecation notice pointing at torchao
+        from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+        from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+    QUANTIZATION_AVAILABLE = True
+except ImportError:
+    QUANTIZATION_AVAILABLE = False
+
+PRECISIONS = ('fp32', 'int8')
+
+# Preferred INT8 kernel libraries (x86/fbgemm on Intel/AMD, qnnpack on ARM)
+QUANTIZED_ENGINES = ('x86', 'fbgemm', 'qnnpack')
+
+# Static quantization traces the backbone with one crop of this shape
+BACKBONE_INPUT_SHAPE = (1, 3, 224, 224)
+
+
+def check_precision(precision: str) -> str:
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}. Available: {list(PRECISIONS)}")
+    return precision
+
+
+def select_quantized_engine(preferred: str = None) -> str:
+    """Activate the INT8 kernel library (preferred if supported, else the best available)"""
+    supported = torch.backends.quantized.supported_engines
+    candidates = ([preferred] if preferred else []) + list(QUANTIZED_ENGINES)
+    for engine in candidates:
+        if engine in supported:
+            torch.backends.quantized.engine = engine
+            return engine
+    raise RuntimeError(f"No INT8 engine available (supported: {supported})")
+
+
+def quantize_rnn(model: nn.Module) -> nn.Module:
+    """
+    Dynamic INT8 quantization of a MultiTaskTemporalRNN (CPU only)
+
+    LSTM, GRU and Linear weights are quantized once; activations are
+    quantized per call, so no calibration data is needed and the recurrent
+    state (forward_with_state / step) stays float.
+    """
+    if not QUANTIZATION_AVAILABLE:
+        raise ImportError("torch.ao.quantization is not available")
+    select_quantized_engine()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return quantize_dynamic(model.cpu().eval(), {nn.LSTM, nn.GRU, nn.Linear}, dtype=torch.qint8)
+
+
+def _prepare_backbone(backbone: nn.Module, engine: str) -> nn.Module:
+    example = (torch.zeros(BACKBONE_INPUT_SHAPE),)
+    return prepare_fx(backbone.cpu().eval(), get_default_qconfig_mapping(engine), example)
+
+
+def calibrate_backbone(backbone: nn.Module, batches: Iterable[torch.Tensor], engine: str = None) -> nn.Module:
+    """
+    Static INT8 quantization of an fp32 backbone (FX graph mode)
+
+    Args:
+        backbone: fp32 feature trunk (see rnn_temporal.build_backbone)
+        batches: Normalized (N, 3, 224, 224) crops representative of production
+            ROIs; observers record activation ranges from them
+        engine: INT8 kernel library (default: best available)
+    Returns:
+        Quantized backbone (CPU)
+    """
+    if not QUANTIZATION_AVAILABLE:
+        raise ImportError("torch.ao.quantization is not available")
+    engine = select_quantized_engine(engine)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        prepared = _prepare_backbone(copy.deepcopy(backbone), engine)
+        with torch.no_grad():
+            for batch in batches:
+                prepared(batch)
+        quantized = convert_fx(prepared)
+    quantized.quantized_engine = engine
+    return quantized
+
+
+def save_quantized_backbone(quantized: nn.Module, path: str, backbone_name: str = None):
+    """Save a calibrated backbone (state dict, architecture name and the engine it was quantized for)"""
+    torch.save({
+        'backbone': backbone_name,
+        'engine': getattr(quantized, 'quantized_engine', torch.backends.quantized.engine),
+        'state_dict': quantized.state_dict()
+    }, path)
+
+
+def load_quantized_backbone(path: str, backbone: nn.Module, backbone_name: str = None) -> nn.Module:
+    """
+    Rebuild a calibrated INT8 backbone saved by save_quantized_backbone
+
+    Args:
+        path: Saved checkpoint
+        backbone: fp32 trunk with the same architecture (its weights are not
+            used, so it can be built without downloading pretrained weights)
+        backbone_name: Expected architecture, checked against the checkpoint
+    """
+    if not QUANTIZATION_AVAILABLE:
+        raise ImportError("torch.ao.quantization is not available")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # Packed INT8 params still use TypedStorage
+        checkpoint = torch.load(path, map_location='cpu')
+    saved_name = checkpoint.get('backbone')
+    if backbone_name and saved_name and saved_name != backbone_name:
+        raise ValueError(f"{path} holds a quantized {saved_name}, not {backbone_name}")
+    engine = checkpoint['engine']
+    if engine not in torch.backends.quantized.supported_engines:
+        raise RuntimeError(f"Backbone was quantized for the {engine} engine, which this CPU build lacks")
+    select_quantized_engine(engine)
+
+    # Same graph as at calibration time; the checkpoint supplies weights and qparams
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        quantized = convert_fx(_prepare_backbone(backbone, engine))
+    quantized.load_state_dict(checkpoint['state_dict'])
+    quantized.quantized_engine = engine
+    return quantized.eval()
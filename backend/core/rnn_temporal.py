@@ -2,35 +2,108 @@ import torch
 import torch.nn as nn
 import numpy as np
 import cv2
+import logging
 import os
 import time
-from collections import deque, defaultdict
-from typing import List, Dict, Tuple
-from torchvision.models import resnet50, ResNet50_Weights
+from collections import deque, defaultdict, OrderedDict
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Tuple
+from torchvision.models import (
+    mobilenet_v3_large, mobilenet_v3_small, resnet18, resnet50,
+    MobileNet_V3_Large_Weights, MobileNet_V3_Small_Weights, ResNet18_Weights, ResNet50_Weights
+)
+from torchvision.ops import roi_align
+
+from .quantization import check_precision, load_quantized_backbone, quantize_rnn
+from .track_store import TrackStore
+from .detections import DetectionBatch
+
+logger = logging.getLogger(__name__)
+
+# ROI feature backbones: name -> (torchvision constructor, pretrained weights, feature dim)
+FEATURE_BACKBONES = {
+    'resnet50': (resnet50, ResNet50_Weights.DEFAULT, 2048),
+    'resnet18': (resnet18, ResNet18_Weights.DEFAULT, 512),
+    'mobilenet_v3_large': (mobilenet_v3_large, MobileNet_V3_Large_Weights.DEFAULT, 960),
+    'mobilenet_v3_small': (mobilenet_v3_small, MobileNet_V3_Small_Weights.DEFAULT, 576),
+}
+DEFAULT_FEATURE_BACKBONE = 'resnet50'
+
+
+def build_backbone(name: str = DEFAULT_FEATURE_BACKBONE, weights=None) -> nn.Module:
+    """Classification network without its classifier: (N, 3, H, W) -> (N, feature_dim, 1, 1)"""
+    if name not in FEATURE_BACKBONES:
+        raise ValueError(f"Unknown feature backbone: {name}. Available: {list(FEATURE_BACKBONES)}")
+    model = FEATURE_BACKBONES[name][0](weights=weights)
+    if name.startswith('resnet'):
+        return torch.nn.Sequential(*list(model.children())[:-1])
+    return torch.nn.Sequential(model.features, model.avgpool)
 
 
 class FeatureExtractor:
-    """Extract features from image regions using ResNet50"""
-    def __init__(self, device='cpu'):
+    """Extract features from image regions with a pretrained CNN backbone (ResNet50 by default)"""
+    def __init__(self,
+                 device='cpu',
+                 precision: str = 'fp32',
+                 int8_path: str = None,
+                 backbone: str = DEFAULT_FEATURE_BACKBONE,
+                 pretrained: bool = True):
+        """
+        Args:
+            device: Torch device (INT8 runs on CPU)
+            precision: "fp32" or "int8" (the calibrated backbone at int8_path,
+                see scripts/quantize_rnn_models.py); falls back to fp32 if it
+                cannot be loaded
+            int8_path: Statically quantized backbone checkpoint
+            backbone: One of FEATURE_BACKBONES; the RNN must be trained on
+                features from the same backbone (feature_dim differs)
+            pretrained: Load the backbone's ImageNet weights (downloaded on
+                first use); False keeps a randomly initialised backbone
+        """
+        check_precision(precision)
+        if backbone not in FEATURE_BACKBONES:
+            raise ValueError(f"Unknown feature backbone: {backbone}. Available: {list(FEATURE_BACKBONES)}")
+        _, weights, self.feature_dim = FEATURE_BACKBONES[backbone]
+        self.backbone = backbone
+        self.precision = 'fp32'
+        
+        if precision == 'int8':
+            try:
+                if not int8_path or not os.path.exists(int8_path):
+                    raise FileNotFoundError(f"no calibrated backbone at {int8_path}")
+                self.model = load_quantized_backbone(int8_path, build_backbone(backbone), backbone)
+                self.precision = 'int8'
+                device = 'cpu'
+                logger.info("✅ Loaded INT8 feature backbone from %s", int8_path)
+            except Exception as e:
+                logger.warning("⚠️  INT8 feature backbone unavailable (%s), using fp32", e)
+        
+        if self.precision == 'fp32':
+            self.model = build_backbone(backbone, weights if pretrained else None)
+            self.model.eval()
+            # channels_last lets oneDNN/cuDNN pick faster convolution kernels
+            self.model.to(device, memory_format=torch.channels_last)
         self.device = device
-        weights = ResNet50_Weights.DEFAULT
-        resnet = resnet50(weights=weights)
-        # Remove final classification layer
-        self.model = torch.nn.Sequential(*list(resnet.children())[:-1])
-        self.model.eval()
-        self.model.to(device)
         
         # Preprocessing
         self.preprocess = weights.transforms()
         
+        # Tensor-form equivalent of self.preprocess for extract_batch:
+        # resize short side to resize_size, center crop crop_size, normalize
+        self.crop_size = self.preprocess.crop_size[0]
+        self.resize_size = self.preprocess.resize_size[0]
+        self.mean = torch.tensor(self.preprocess.mean, device=device).view(1, 3, 1, 1)
+        self.std = torch.tensor(self.preprocess.std, device=device).view(1, 3, 1, 1)
+        self.max_batch_size = 32
+        
     def extract(self, frame: np.ndarray, bbox: List[float]) -> np.ndarray:
         """
-        Extract 2048-dim features from bbox region
+        Extract feature_dim features from bbox region
         Args:
             frame: (H, W, 3) BGR image
             bbox: [x1, y1, x2, y2] in pixel coordinates
         Returns:
-            features: (2048,) numpy array
+            features: (feature_dim,) numpy array
         """
         x1, y1, x2, y2 = map(int, bbox)
         h, w = frame.shape[:2]
@@ -40,7 +113,7 @@ class FeatureExtractor:
         # Extract ROI
         roi = frame[y1:y2, x1:x2]
         if roi.size == 0:
-            return np.zeros(2048)
+            return np.zeros(self.feature_dim, dtype=np.float32)
         
         # Convert BGR to RGB
         roi_rgb = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)
@@ -55,6 +128,76 @@ class FeatureExtractor:
             features = self.model(input_tensor).squeeze().cpu().numpy()
         
         return features
+    
+    def prepare_crops(self, frame: np.ndarray, bboxes: List[List[float]]) -> Tuple[np.ndarray, torch.Tensor]:
+        """
+        Normalized backbone inputs for the non-empty bbox regions of a frame
+        
+        Crops are taken in tensor form with roi_align (the crop region matches
+        extract()'s resize + center crop).
+        Returns:
+            (indices of the boxes with a non-empty ROI,
+             (len(indices), 3, crop_size, crop_size) channels_last tensor)
+        """
+        # Same integer clipping as extract()
+        h, w = frame.shape[:2]
+        boxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4).astype(np.int64)
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, w)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, h)
+        box_w = boxes[:, 2] - boxes[:, 0]
+        box_h = boxes[:, 3] - boxes[:, 1]
+        valid = np.flatnonzero((box_w > 0) & (box_h > 0))
+        if len(valid) == 0:
+            return valid, torch.zeros((0, 3, self.crop_size, self.crop_size), device=self.device)
+        
+        # Center crop region in ROI coordinates: the short side is scaled to
+        # resize_size, then crop_size pixels are kept along both axes
+        side = np.minimum(box_w[valid], box_h[valid]) * (self.crop_size / self.resize_size)
+        cx = (boxes[valid, 0] + boxes[valid, 2]) / 2
+        cy = (boxes[valid, 1] + boxes[valid, 3]) / 2
+        rois = np.stack([
+            np.zeros(len(valid)), cx - side / 2, cy - side / 2, cx + side / 2, cy + side / 2
+        ], axis=1)
+        
+        # BGR uint8 -> RGB float (1, 3, H, W)
+        image = torch.from_numpy(np.ascontiguousarray(frame[..., ::-1])).to(self.device)
+        image = image.permute(2, 0, 1).unsqueeze(0).float().div_(255.0)
+        rois = torch.from_numpy(rois).float().to(self.device)
+        
+        with torch.no_grad():
+            # sampling_ratio=-1 averages every source pixel in a bin (antialiased downscale)
+            crops = roi_align(image, rois, output_size=self.crop_size,
+                              spatial_scale=1.0, sampling_ratio=-1, aligned=True)
+            crops = ((crops - self.mean) / self.std).contiguous(memory_format=torch.channels_last)
+        return valid, crops
+    
+    def extract_batch(self, frame: np.ndarray, bboxes: List[List[float]]) -> np.ndarray:
+        """
+        Extract feature_dim features for all bbox regions of a frame at once
+        
+        All ROIs (see prepare_crops) share one forward pass.
+        Args:
+            frame: (H, W, 3) BGR image
+            bboxes: N boxes as [x1, y1, x2, y2] in pixel coordinates
+        Returns:
+            features: (N, feature_dim) numpy array; rows for empty ROIs are zeros
+        """
+        features = np.zeros((len(bboxes), self.feature_dim), dtype=np.float32)
+        if len(bboxes) == 0:
+            return features
+        
+        valid, crops = self.prepare_crops(frame, bboxes)
+        if len(valid) == 0:
+            return features
+        
+        with torch.no_grad():
+            outputs = [
+                self.model(crops[start:start + self.max_batch_size]).flatten(1)
+                for start in range(0, len(crops), self.max_batch_size)
+            ]
+        
+        features[valid] = torch.cat(outputs).cpu().numpy()
+        return features
 
 
 class MultiTaskTemporalRNN(nn.Module):
@@ -121,44 +264,199 @@ class MultiTaskTemporalRNN(nn.Module):
         )
         
     def forward(self, x: torch.Tensor) -> Dict[str, torch.Tensor]:
+        outputs, _ = self.forward_with_state(x)
+        return outputs
+    
+    def forward_with_state(self, x: torch.Tensor, state: Dict = None) -> Tuple[Dict[str, torch.Tensor], Dict]:
+        """
+        Run the three recurrent stacks over x (batch, seq_len, feature_dim),
+        optionally continuing from a previous state
+        Returns:
+            (outputs, state) - state holds each stack's final hidden (and cell)
+            state, shaped (num_layers, batch, hidden)
+        """
+        state = state or {}
         batch_size, seq_len, _ = x.shape
-        x_flat = x.view(-1, self.feature_dim)
+        x_flat = x.reshape(-1, self.feature_dim)
         x_compressed = self.feature_compressor(x_flat)
         x_compressed = x_compressed.view(batch_size, seq_len, -1)
         
-        lstm_out, _ = self.tracker_lstm(x_compressed)
+        lstm_out, tracker_state = self.tracker_lstm(x_compressed, state.get('tracker'))
         tracking_embeddings = self.tracker_fc(lstm_out[:, -1, :])
         
-        gru_out, _ = self.activity_gru(x_compressed)
+        gru_out, activity_state = self.activity_gru(x_compressed, state.get('activity'))
         activity_logits = self.activity_classifier(gru_out[:, -1, :])
         
-        anomaly_out, _ = self.anomaly_lstm(x_compressed)
+        anomaly_out, anomaly_state = self.anomaly_lstm(x_compressed, state.get('anomaly'))
         anomaly_scores = self.anomaly_fc(anomaly_out[:, -1, :])
         
-        return {
+        outputs = {
             'tracking_embeddings': tracking_embeddings,
             'activity_logits': activity_logits,
             'anomaly_scores': anomaly_scores.squeeze()
         }
+        return outputs, {'tracker': tracker_state, 'activity': activity_state, 'anomaly': anomaly_state}
+    
+    def step(self, x_t: torch.Tensor, state: Dict) -> Tuple[Dict[str, torch.Tensor], Dict]:
+        """Advance every stack by one timestep: x_t (batch, feature_dim)"""
+        return self.forward_with_state(x_t.unsqueeze(1), state)
+
+
+def load_rnn_model(model_path: str, device, precision: str = 'fp32', feature_dim: int = None) -> MultiTaskTemporalRNN:
+    """
+    MultiTaskTemporalRNN in eval mode, optionally with weights from model_path
+    
+    The input feature_dim is read from the weights (the backbone the RNN was
+    trained on); passing feature_dim checks it against the serving backbone.
+    precision="int8" applies dynamic quantization to the LSTM/GRU/Linear
+    layers; the quantized model runs on CPU.
+    """
+    state_dict = torch.load(model_path, map_location=device) if model_path else None
+    if state_dict is not None:
+        trained_dim = state_dict['feature_compressor.0.weight'].shape[1]
+        if feature_dim is not None and feature_dim != trained_dim:
+            raise ValueError(
+                f"RNN weights expect {trained_dim}-dim features but the feature backbone gives "
+                f"{feature_dim}; prepare the dataset and train the RNN with the same backbone"
+            )
+        feature_dim = trained_dim
+    
+    model = MultiTaskTemporalRNN(feature_dim=feature_dim or FEATURE_BACKBONES[DEFAULT_FEATURE_BACKBONE][2]).to(device)
+    if state_dict is not None:
+        model.load_state_dict(state_dict)
+    model.eval()
+    if check_precision(precision) == 'int8':
+        model = quantize_rnn(model)
+    return model
+
+
+# ============================================
+# Recurrent state helpers (batch dim is 1 for LSTM/GRU states)
+# ============================================
+
+def split_rnn_state(state: Dict) -> List[Dict]:
+    """Batched state -> one state per batch row"""
+    def rows(value):
+        if isinstance(value, tuple):
+            return list(zip(*(rows(v) for v in value)))
+        return list(value.split(1, dim=1))
+    
+    per_key = {key: rows(value) for key, value in state.items()}
+    batch = len(next(iter(per_key.values())))
+    return [{key: per_key[key][i] for key in per_key} for i in range(batch)]
+
+
+def merge_rnn_states(states: List[Dict]) -> Dict:
+    """Per-row states -> one batched state"""
+    def merge(values):
+        if isinstance(values[0], tuple):
+            return tuple(merge([v[i] for v in values]) for i in range(len(values[0])))
+        return torch.cat(values, dim=1)
+    
+    return {key: merge([s[key] for s in states]) for key in states[0]}
 
 
 class TemporalBuffer:
-    """Manages frame sequences for RNN processing"""
+    """Manages frame sequences for RNN processing (fixed ring of feature rows)"""
     def __init__(self, sequence_length: int = 16):
         self.sequence_length = sequence_length
-        self.buffer = deque(maxlen=sequence_length)
+        self.buffer: np.ndarray = None   # (sequence_length, feature_dim), allocated on first frame
+        self.count = 0
+        self.head = 0                    # Next row to write
         
     def add_frame(self, features: np.ndarray):
-        self.buffer.append(features)
+        if self.buffer is None:
+            self.buffer = np.zeros((self.sequence_length, len(features)), dtype=np.float32)
+        self.buffer[self.head] = features
+        self.head = (self.head + 1) % self.sequence_length
+        self.count = min(self.count + 1, self.sequence_length)
+    
+    def write_sequence(self, out: np.ndarray):
+        """Write the zero-padded, oldest-first sequence into `out` (sequence_length, feature_dim)"""
+        if self.count < self.sequence_length:
+            pad = self.sequence_length - self.count
+            out[:pad] = 0.0
+            out[pad:] = self.buffer[:self.count]
+        else:
+            tail = self.sequence_length - self.head
+            out[:tail] = self.buffer[self.head:]
+            out[tail:] = self.buffer[:self.head]
+        
+    def latest(self) -> np.ndarray:
+        """Most recently added feature row"""
+        return self.buffer[(self.head - 1) % self.sequence_length]
         
     def get_sequence(self) -> np.ndarray:
-        if len(self.buffer) < self.sequence_length:
-            padding = [np.zeros_like(self.buffer[0])] * (self.sequence_length - len(self.buffer))
-            return np.stack(list(padding) + list(self.buffer))
-        return np.stack(list(self.buffer))
+        out = np.empty_like(self.buffer)
+        self.write_sequence(out)
+        return out
     
     def is_ready(self) -> bool:
-        return len(self.buffer) >= self.sequence_length // 2
+        return self.count >= self.sequence_length // 2
+
+
+# ============================================
+# Per-camera temporal state
+# ============================================
+
+# Smoothed confidences used for the increasing/stable/decreasing trend
+TREND_WINDOW = 5
+
+
+@dataclass
+class TrackExpiryEvent:
+    """A tracked object that stopped being detected (e.g. "FireExtinguisher missing")"""
+    seq: int
+    camera_id: str
+    track_id: str
+    class_name: str
+    last_seen: float
+    expired_at: float
+    track_age: int
+    last_confidence: float
+    bbox: List[float]
+    
+    @property
+    def message(self) -> str:
+        return f"{self.class_name} missing"
+    
+    def to_dict(self) -> Dict:
+        return {**asdict(self), 'message': self.message}
+
+
+class TemporalSession:
+    """
+    Temporal tracking state for a single camera/session.
+    Per-track state lives in a compact array-backed TrackStore; tracks are kept
+    in least-recently-updated order so the oldest can be evicted when the
+    session hits its track cap.
+    """
+    def __init__(self, camera_id: str, max_tracks: int = 256, sequence_length: int = 5):
+        self.camera_id = camera_id
+        self.max_tracks = max_tracks
+        self.last_active = time.time()
+        self.frames_processed = 0
+        
+        # Confidence history, EMA, age and trend for each object
+        self.tracks = TrackStore(
+            max_tracks=max_tracks,
+            history_length=sequence_length,
+            trend_window=TREND_WINDOW
+        )
+        
+        # Tracks that expired during the most recent frame
+        self.last_expired: List[TrackExpiryEvent] = []
+    
+    def touch_track(self, track_id: str) -> int:
+        """Get (or create) a track's slot and mark it most recently used"""
+        slot, _ = self.tracks.touch(track_id)
+        return slot
+    
+    def remove_track(self, track_id: str):
+        self.tracks.remove(track_id)
+    
+    def __len__(self) -> int:
+        return len(self.tracks)
 
 
 # ============================================
@@ -169,204 +467,314 @@ class RNNTemporal:
     """
     Enhanced RNN Temporal class with Exponential Moving Average
     Provides smooth, continuous confidence growth over time
+    
+    State is kept per camera/session so streams never share tracks or EMA,
+    and per-frame cost only depends on the tracks of the calling camera.
     """
-    def __init__(self, model_path: str = None, sequence_length: int = 5, conf_threshold: float = 0.5):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    DEFAULT_CAMERA = "default"
+    
+    def __init__(self,
+                 model_path: str = None,
+                 sequence_length: int = 5,
+                 conf_threshold: float = 0.5,
+                 max_sessions: int = 32,
+                 max_tracks_per_session: int = 256,
+                 session_ttl: float = 300.0,
+                 track_max_age: float = 2.0,
+                 max_expiry_events: int = 1000,
+                 precision: str = 'fp32'):
+        """
+        Args:
+            model_path: Optional MultiTaskTemporalRNN weights
+            sequence_length: Detections kept per track
+            conf_threshold: Confidence threshold
+            max_sessions: Cameras kept in memory (least recently active evicted first)
+            max_tracks_per_session: Tracks kept per camera (least recently updated evicted first)
+            session_ttl: Seconds of inactivity before a camera's state is dropped
+            track_max_age: Seconds without a detection before a track expires
+            max_expiry_events: Expiry events kept for the event stream
+            precision: RNN weights in "fp32" or dynamically quantized "int8" (CPU)
+        """
+        check_precision(precision)
+        self.device = torch.device('cuda' if torch.cuda.is_available() and precision == 'fp32' else 'cpu')
+        self.precision = precision
         self.sequence_length = sequence_length
         self.conf_threshold = conf_threshold
+        self.max_sessions = max_sessions
+        self.max_tracks_per_session = max_tracks_per_session
+        self.session_ttl = session_ttl
+        self.track_max_age = track_max_age
         
         # Load model if available (optional for now)
         self.model = None
         if model_path and os.path.exists(model_path):
             try:
-                self.model = MultiTaskTemporalRNN().to(self.device)
-                self.model.load_state_dict(torch.load(model_path, map_location=self.device))
-                self.model.eval()
-                print(f"✅ Loaded RNN model from {model_path}")
+                self.model = load_rnn_model(model_path, self.device, precision)
+                logger.info("✅ Loaded RNN model from %s (%s)", model_path, precision)
             except Exception as e:
-                print(f"⚠️  Failed to load RNN model: {e}")
+                logger.warning("⚠️  Failed to load RNN model: %s", e)
                 self.model = None
         
-        # Track history for each object
-        self.track_history = defaultdict(list)
-        self.track_ages = defaultdict(int)
+        # Camera/session id -> TemporalSession (ordered by last activity)
+        self.sessions: "OrderedDict[str, TemporalSession]" = OrderedDict()
         
-        # NEW: Exponential Moving Average for smooth confidence
-        self.confidence_ema = defaultdict(lambda: None)
-        self.ema_alpha = 0.3  # Smoothing factor (0.3 = 30% new, 70% old)
+        # Expiry event stream (bounded; readers page through it by sequence number)
+        self.expiry_events: deque = deque(maxlen=max_expiry_events)
+        self._event_seq = 0
         
-        # NEW: Track confidence trend (increasing/decreasing)
-        self.confidence_trend = defaultdict(list)
+        # EMA smoothing factor (0.3 = 30% new, 70% old)
+        self.ema_alpha = 0.3
         
         # Activity labels
         self.activity_labels = ['stationary', 'being_moved', 'obstructed', 'missing', 'normal']
+    
+    def get_session(self, camera_id: str = DEFAULT_CAMERA) -> TemporalSession:
+        """Get (or create) the state for a camera, evicting idle/LRU sessions"""
+        now = time.time()
+        
+        # Drop sessions that have been idle too long (oldest are first)
+        while self.sessions:
+            oldest_id, oldest = next(iter(self.sessions.items()))
+            if oldest_id == camera_id or now - oldest.last_active <= self.session_ttl:
+                break
+            del self.sessions[oldest_id]
+        
+        session = self.sessions.get(camera_id)
+        if session is None:
+            session = TemporalSession(
+                camera_id,
+                max_tracks=self.max_tracks_per_session,
+                sequence_length=self.sequence_length
+            )
+            self.sessions[camera_id] = session
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(camera_id)
+        
+        session.last_active = now
+        return session
+    
+    def reset_session(self, camera_id: str) -> bool:
+        """Forget all temporal state for a camera"""
+        return self.sessions.pop(camera_id, None) is not None
         
-    def process_detections(self, detections: List[Dict]) -> List[Dict]:
+    def process_detections(self, batch: DetectionBatch, camera_id: str = DEFAULT_CAMERA) -> DetectionBatch:
         """
         Process detections and update temporal confidence with EMA smoothing
+        
+        The batch is annotated in place: scores become the temporal
+        confidence, the Layer 1 scores move to original_scores, and track
+        ids/ages, boosts and trends are added. Pass batch.copy() to keep the
+        Layer 1 batch unchanged.
+        
+        All tracks seen in the frame are updated together. A track hit more
+        than once in the same frame is updated once per hit, in order.
         """
-        enhanced_detections = []
-        current_time = time.time()
+        session = self.get_session(camera_id)
+        session.frames_processed += 1
         
-        for det in detections:
-            class_name = det.get('class', 'unknown')
-            confidence = det.get('confidence', 0.0)
-            bbox = det.get('bbox', [0, 0, 0, 0])
-            
-            # Generate tracking ID based on class and position
-            track_id = self._get_track_id(class_name, bbox)
-            
-            # Update tracking history
-            self.track_history[track_id].append({
-                'time': current_time,
-                'confidence': confidence,
-                'bbox': bbox
-            })
-            
-            # Keep only recent history
-            if len(self.track_history[track_id]) > self.sequence_length:
-                self.track_history[track_id].pop(0)
-            
-            # Update track age
-            self.track_ages[track_id] += 1
-            
-            # Calculate temporal confidence with EMA
-            temporal_conf = self._calculate_temporal_confidence_ema(track_id, confidence)
-            
-            # Calculate confidence trend
-            trend = self._calculate_confidence_trend(track_id)
-            
-            # Create enhanced detection
-            enhanced_det = {
-                **det,
-                'confidence': temporal_conf,
-                'track_id': track_id,
-                'track_age': self.track_ages[track_id],
-                'original_confidence': confidence,
-                'temporal_boost': temporal_conf - confidence,
-                'confidence_trend': trend,  # NEW: 'increasing', 'stable', 'decreasing'
-                'ema_smoothed': True
-            }
-            
-            enhanced_detections.append(enhanced_det)
+        current_time = time.time()
+        confidences = batch.scores
+        bboxes = batch.boxes
+        
+        # Generate tracking ID based on class and position; group repeat hits
+        # of the same track into successive rounds so each round has distinct tracks
+        track_ids = self._get_track_ids(batch.labels(), bboxes)
+        rounds: List[List[int]] = []
+        hits: Dict[str, int] = {}
+        for idx, track_id in enumerate(track_ids):
+            hit = hits.get(track_id, 0)
+            hits[track_id] = hit + 1
+            if hit == len(rounds):
+                rounds.append([])
+            rounds[hit].append(idx)
+        
+        temporal_confs = np.empty(len(batch), dtype=np.float64)
+        track_ages = np.empty(len(batch), dtype=np.int64)
+        trends = np.empty(len(batch), dtype=object)
+        
+        tracks = session.tracks
+        for round_indices in rounds:
+            # A chunk never exceeds the track cap, so eviction cannot hit a track being updated
+            for start in range(0, len(round_indices), tracks.max_tracks):
+                idx = np.array(round_indices[start:start + tracks.max_tracks], dtype=np.int64)
+                slots = np.array([session.touch_track(track_ids[i]) for i in idx], dtype=np.int64)
+                
+                # Update tracking history and track age
+                tracks.push_detections(slots, confidences[idx], current_time, bboxes[idx])
+                tracks.ages[slots] += 1
+                
+                # Calculate temporal confidence with EMA, then the confidence trend
+                temporal_confs[idx] = self._calculate_temporal_confidence_ema(session, slots, confidences[idx])
+                trends[idx] = self._calculate_confidence_trend(session, slots)
+                track_ages[idx] = tracks.ages[slots]
+        
+        # Annotate the batch ('increasing', 'stable', 'decreasing' trends)
+        batch.original_scores = confidences
+        batch.scores = temporal_confs
+        batch.temporal_boost = temporal_confs - confidences
+        batch.track_ids = np.array(track_ids, dtype=object)
+        batch.track_ages = track_ages
+        batch.trends = trends
         
         # Clean up old tracks
-        self._cleanup_old_tracks(current_time)
+        self._cleanup_old_tracks(session, current_time)
         
-        return enhanced_detections
+        return batch
     
-    def _get_track_id(self, class_name: str, bbox: List[float]) -> str:
-        """Generate tracking ID based on class and approximate position"""
-        x_center = (bbox[0] + bbox[2]) / 2
-        y_center = (bbox[1] + bbox[3]) / 2
+    def _get_track_ids(self, class_names: List[str], bboxes: np.ndarray) -> List[str]:
+        """Generate tracking IDs based on class and approximate position"""
+        centers = (bboxes[:, :2] + bboxes[:, 2:]) / 2
         
-        # Grid-based tracking (divide image into regions)
-        grid_x = int(x_center / 100)
-        grid_y = int(y_center / 100)
+        # Grid-based tracking (divide image into 100px regions)
+        grid = np.trunc(centers / 100).astype(np.int64).tolist()
         
-        return f"{class_name}_{grid_x}_{grid_y}"
+        return [f"{name}_{gx}_{gy}" for name, (gx, gy) in zip(class_names, grid)]
     
-    def _calculate_temporal_confidence_ema(self, track_id: str, current_conf: float) -> float:
+    def _calculate_temporal_confidence_ema(self, session: TemporalSession, slots: np.ndarray, current_conf: np.ndarray) -> np.ndarray:
         """
         Calculate confidence boost with Exponential Moving Average
         Provides smooth, continuous growth over time
-        """
-        history = self.track_history[track_id]
-        age = self.track_ages[track_id]
         
-        if len(history) < 2:
-            self.confidence_ema[track_id] = current_conf
-            return current_conf
+        O(1) per track: mean and variance come from the store's rolling sums.
+        """
+        tracks = session.tracks
+        history_len, avg_conf, conf_variance = tracks.confidence_stats(slots)
+        age = tracks.ages[slots]
         
-        # Calculate confidence stability (variance)
-        recent_confidences = [h['confidence'] for h in history]
-        avg_conf = sum(recent_confidences) / len(recent_confidences)
-        conf_variance = sum((c - avg_conf) ** 2 for c in recent_confidences) / len(recent_confidences)
+        # Tracks with a single detection keep their raw confidence
+        warm = history_len >= 2
         
         # Boost factors with improved scaling
-        stability_boost = 0.15 * (1 - min(conf_variance, 0.5))  # Up to +0.15
+        stability_boost = 0.15 * (1 - np.minimum(conf_variance, 0.5))  # Up to +0.15
         
         # Logarithmic age boost (diminishing returns, never stops)
-        age_boost = min(0.25, 0.05 * np.log(1 + age))  # Up to +0.25
+        age_boost = np.minimum(0.25, 0.05 * np.log(1 + age))  # Up to +0.25
         
         # History length bonus (rewards long-term tracking)
-        history_bonus = min(0.10, len(history) * 0.01)  # Up to +0.10
+        history_bonus = np.minimum(0.10, history_len * 0.01)  # Up to +0.10
         
         # Calculate raw boosted confidence
         raw_boosted = current_conf + stability_boost + age_boost + history_bonus
         
         # Apply Exponential Moving Average for smoothing
-        if self.confidence_ema[track_id] is None:
-            self.confidence_ema[track_id] = raw_boosted
-        else:
-            # EMA formula: new_ema = α * new_value + (1 - α) * old_ema
-            self.confidence_ema[track_id] = (
-                self.ema_alpha * raw_boosted + 
-                (1 - self.ema_alpha) * self.confidence_ema[track_id]
-            )
+        # EMA formula: new_ema = α * new_value + (1 - α) * old_ema
+        previous_ema = tracks.ema[slots]
+        ema = np.where(
+            np.isnan(previous_ema),
+            raw_boosted,
+            self.ema_alpha * raw_boosted + (1 - self.ema_alpha) * previous_ema
+        )
+        tracks.ema[slots] = np.where(warm, ema, current_conf)
         
         # Dynamic ceiling that grows with track maturity
-        max_conf = 0.95 + (0.04 * min(age / 100, 1))  # 0.95 → 0.99 over 100 frames
-        final_conf = min(max_conf, self.confidence_ema[track_id])
+        max_conf = 0.95 + (0.04 * np.minimum(age / 100, 1))  # 0.95 → 0.99 over 100 frames
+        final_conf = np.where(warm, np.minimum(max_conf, ema), current_conf)
         
         # Store for trend calculation
-        self.confidence_trend[track_id].append(final_conf)
-        if len(self.confidence_trend[track_id]) > 10:
-            self.confidence_trend[track_id].pop(0)
+        if warm.any():
+            tracks.push_trend(slots[warm], final_conf[warm])
         
         return final_conf
     
-    def _calculate_confidence_trend(self, track_id: str) -> str:
+    def _calculate_confidence_trend(self, session: TemporalSession, slots: np.ndarray) -> np.ndarray:
         """
         Determine if confidence is increasing, stable, or decreasing
-        """
-        trend_history = self.confidence_trend.get(track_id, [])
-        
-        if len(trend_history) < 3:
-            return 'initializing'
         
-        # Calculate linear trend
-        recent = trend_history[-5:]
-        if len(recent) < 3:
-            return 'stable'
-        
-        # Simple trend detection
-        increases = sum(1 for i in range(1, len(recent)) if recent[i] > recent[i-1])
-        decreases = sum(1 for i in range(1, len(recent)) if recent[i] < recent[i-1])
+        Increases/decreases over the last TREND_WINDOW values are kept as
+        rolling counts by the store, so no history is rescanned.
+        """
+        count, increases, decreases = session.tracks.trend_counts(slots)
         
-        if increases > decreases + 1:
-            return 'increasing'
-        elif decreases > increases + 1:
-            return 'decreasing'
-        else:
-            return 'stable'
+        return np.select(
+            [count < 3, increases > decreases + 1, decreases > increases + 1],
+            ['initializing', 'increasing', 'decreasing'],
+            default='stable'
+        ).astype(object)
     
-    def _cleanup_old_tracks(self, current_time: float, max_age: float = 2.0):
-        """Remove tracks that haven't been updated recently"""
-        tracks_to_remove = []
-        
-        for track_id, history in self.track_history.items():
-            if history and (current_time - history[-1]['time']) > max_age:
-                tracks_to_remove.append(track_id)
+    def _cleanup_old_tracks(self, session: TemporalSession, current_time: float, max_age: Optional[float] = None) -> List[TrackExpiryEvent]:
+        """Remove this session's tracks that haven't been updated recently and emit expiry events"""
+        max_age = self.track_max_age if max_age is None else max_age
+        tracks = session.tracks
+        events = []
+        
+        # Only the tracks that actually expire are visited
+        for track_id, slot in tracks.expired(current_time - max_age):
+            self._event_seq += 1
+            events.append(TrackExpiryEvent(
+                seq=self._event_seq,
+                camera_id=session.camera_id,
+                track_id=track_id,
+                class_name=track_id.rsplit('_', 2)[0],
+                last_seen=float(tracks.last_time[slot]),
+                expired_at=current_time,
+                track_age=int(tracks.ages[slot]),
+                last_confidence=round(float(tracks.ema[slot]), 3),
+                bbox=tracks.last_bbox[slot].tolist()
+            ))
+            session.remove_track(track_id)
+        
+        self.expiry_events.extend(events)
+        session.last_expired = events
+        return events
+    
+    def get_expiry_events(self, since: int = 0, camera_id: str = None, limit: int = 100) -> List[Dict]:
+        """
+        Expiry events with a sequence number greater than `since` (oldest first)
         
-        for track_id in tracks_to_remove:
-            del self.track_history[track_id]
-            del self.track_ages[track_id]
-            if track_id in self.confidence_ema:
-                del self.confidence_ema[track_id]
-            if track_id in self.confidence_trend:
-                del self.confidence_trend[track_id]
+        Pass the last seen `seq` back as `since` to follow the stream.
+        """
+        events = []
+        for event in self.expiry_events:
+            if event.seq <= since or (camera_id is not None and event.camera_id != camera_id):
+                continue
+            events.append(event.to_dict())
+            if len(events) >= limit:
+                break
+        return events
+    
+    def get_last_expired(self, camera_id: str = DEFAULT_CAMERA) -> List[Dict]:
+        """Tracks that expired during a camera's most recent frame"""
+        session = self.sessions.get(camera_id)
+        return [event.to_dict() for event in session.last_expired] if session else []
     
-    def get_tracking_stats(self) -> Dict:
+    def get_tracking_stats(self, camera_id: str = None) -> Dict:
         """
-        Get statistics about current tracking state
+        Get statistics about current tracking state (one camera, or all cameras)
         """
+        if camera_id is not None:
+            sessions = [self.sessions[camera_id]] if camera_id in self.sessions else []
+        else:
+            sessions = list(self.sessions.values())
+        
+        ages = [
+            int(age) for session in sessions
+            for age in session.tracks.ages[session.tracks.active_slots()]
+        ]
         return {
-            'active_tracks': len(self.track_history),
-            'total_detections': sum(self.track_ages.values()),
-            'avg_track_age': np.mean(list(self.track_ages.values())) if self.track_ages else 0,
-            'max_track_age': max(self.track_ages.values()) if self.track_ages else 0,
-            'tracked_objects': list(self.track_history.keys())
+            'active_sessions': len(sessions),
+            'active_tracks': sum(len(session) for session in sessions),
+            'total_detections': sum(ages),
+            'avg_track_age': np.mean(ages) if ages else 0,
+            'max_track_age': max(ages) if ages else 0,
+            'tracked_objects': [tid for session in sessions for tid, _ in session.tracks.items()]
+        }
+    
+    def get_session_stats(self) -> Dict:
+        """Per-camera summary of the session store"""
+        return {
+            'max_sessions': self.max_sessions,
+            'max_tracks_per_session': self.max_tracks_per_session,
+            'session_ttl_sec': self.session_ttl,
+            'sessions': {
+                camera_id: {
+                    'active_tracks': len(session),
+                    'frames_processed': session.frames_processed,
+                    'idle_sec': round(time.time() - session.last_active, 1)
+                }
+                for camera_id, session in self.sessions.items()
+            }
         }
 
 
@@ -377,29 +785,176 @@ class RNNTemporal:
 class RNNInferenceEngine:
     """
     Full RNN inference with frame features (for video streaming)
+    
+    Modes:
+        - "window": re-run the RNN over each track's 16-frame window every frame
+        - "streaming": keep each track's hidden/cell states and advance them by
+          one timestep per frame; the state is re-synced against the windowed
+          run every `resync_interval` frames (0 = only when a track starts)
+    
+    Features come from feature_backbone (see FEATURE_BACKBONES); the RNN
+    weights must have been trained on the same backbone's features.
+    feature_pretrained=False skips the ImageNet weights (tests, offline use).
+    
+    Precision (CPU): rnn_precision="int8" dynamically quantizes the RNN at
+    load time; feature_precision="int8" loads the statically quantized
+    backbone calibrated by scripts/quantize_rnn_models.py.
     """
-    def __init__(self, model_path: str = None, device: str = 'cpu'):
+    MODES = ('window', 'streaming')
+    
+    def __init__(self,
+                 model_path: str = None,
+                 device: str = 'cpu',
+                 mode: str = 'window',
+                 resync_interval: int = 16,
+                 rnn_precision: str = 'fp32',
+                 feature_precision: str = 'fp32',
+                 feature_int8_path: str = None,
+                 feature_backbone: str = DEFAULT_FEATURE_BACKBONE,
+                 feature_pretrained: bool = True):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown RNN inference mode: {mode}. Available: {list(self.MODES)}")
+        check_precision(rnn_precision)
+        check_precision(feature_precision)
+        
+        # INT8 kernels are CPU-only
+        if 'int8' in (rnn_precision, feature_precision) and device != 'cpu':
+            logger.warning("⚠️  INT8 inference runs on CPU, ignoring device=%s", device)
+            device = 'cpu'
+        
         self.device = device
-        self.model = MultiTaskTemporalRNN().to(device)
+        self.mode = mode
+        self.resync_interval = max(0, resync_interval)
+        
+        self.feature_extractor = FeatureExtractor(
+            device=device, precision=feature_precision, int8_path=feature_int8_path, backbone=feature_backbone,
+            pretrained=feature_pretrained
+        )
         
         if model_path and os.path.exists(model_path):
-            print(f"✅ Loading RNN weights from {model_path}")
-            self.model.load_state_dict(torch.load(model_path, map_location=device))
+            logger.info("✅ Loading RNN weights from %s (%s)", model_path, rnn_precision)
         else:
-            print("⚠️  No pretrained RNN weights found. Using random initialization.")
-        
-        self.model.eval()
-        self.feature_extractor = FeatureExtractor(device=device)
+            logger.warning("⚠️  No pretrained RNN weights found. Using random initialization.")
+            model_path = None
+        self.model = load_rnn_model(model_path, device, rnn_precision, feature_dim=self.feature_extractor.feature_dim)
+        self.rnn_precision = rnn_precision
         self.object_buffers: Dict[int, TemporalBuffer] = {}
         
+        # Reused (N, sequence_length, feature_dim) staging buffer for batched forwards
+        self._sequence_pool: np.ndarray = None
+        
+        # Streaming mode: per-track recurrent state and steps since the last re-sync
+        self.track_states: Dict[int, Dict] = {}
+        self.steps_since_sync: Dict[int, int] = {}
+        
         self.activity_labels = ['stationary', 'being_moved', 'obstructed', 'missing', 'normal']
         
+    def _sequence_batch(self, buffers: List[TemporalBuffer]) -> torch.Tensor:
+        """Stack the buffers' sequences into the preallocated (N, L, D) pool"""
+        n = len(buffers)
+        seq_len, feature_dim = buffers[0].buffer.shape
+        pool = self._sequence_pool
+        if pool is None or pool.shape[0] < n or pool.shape[1:] != (seq_len, feature_dim):
+            capacity = max(n, 2 * pool.shape[0] if pool is not None else 16)
+            pool = np.empty((capacity, seq_len, feature_dim), dtype=np.float32)
+            self._sequence_pool = pool
+        
+        for row, buffer in enumerate(buffers):
+            buffer.write_sequence(pool[row])
+        
+        # Zero-copy on CPU; one host->device copy otherwise
+        return torch.from_numpy(pool[:n]).to(self.device)
+    
+    def _streaming_forward(self, ready_ids: List[int], frames_added: Dict[int, int]) -> Tuple[List[int], Dict[str, torch.Tensor]]:
+        """
+        Windowed forward for tracks that need a (re-)sync, one recurrent step
+        for the rest; both groups are batched
+        Returns:
+            (track ids in output row order, model outputs)
+        """
+        sync_ids, step_ids = [], []
+        for track_id in ready_ids:
+            due = self.resync_interval and self.steps_since_sync.get(track_id, 0) >= self.resync_interval
+            # A track hit twice in one frame got two rows; re-sync rather than step twice
+            if track_id not in self.track_states or due or frames_added[track_id] > 1:
+                sync_ids.append(track_id)
+            else:
+                step_ids.append(track_id)
+        
+        groups = []
+        with torch.no_grad():
+            if sync_ids:
+                sequence_tensor = self._sequence_batch([self.object_buffers[t] for t in sync_ids])
+                outputs, state = self.model.forward_with_state(sequence_tensor)
+                for track_id, track_state in zip(sync_ids, split_rnn_state(state)):
+                    self.track_states[track_id] = track_state
+                    self.steps_since_sync[track_id] = 0
+                groups.append(outputs)
+            
+            if step_ids:
+                latest = np.stack([self.object_buffers[t].latest() for t in step_ids])
+                outputs, state = self.model.step(
+                    torch.from_numpy(latest).to(self.device),
+                    merge_rnn_states([self.track_states[t] for t in step_ids])
+                )
+                for track_id, track_state in zip(step_ids, split_rnn_state(state)):
+                    self.track_states[track_id] = track_state
+                    self.steps_since_sync[track_id] += 1
+                groups.append(outputs)
+        
+        if len(groups) == 1:
+            return sync_ids + step_ids, groups[0]
+        outputs = {
+            key: torch.cat([g[key].reshape(len(ids), -1) for g, ids in zip(groups, (sync_ids, step_ids))])
+            for key in groups[0]
+        }
+        return sync_ids + step_ids, outputs
+    
     def process_detections(self, 
                           frame: np.ndarray,
                           yolo_detections: List[Dict]) -> List[Dict]:
         """Process YOLO detections with RNN temporal reasoning"""
-        enhanced_detections = []
+        # One batched feature pass for every tracked detection in the frame
+        tracked = [i for i, det in enumerate(yolo_detections) if det.get('track_id', -1) != -1]
+        batch_features = self.feature_extractor.extract_batch(
+            frame, [yolo_detections[i]['bbox'] for i in tracked]
+        )
         
+        for idx, features in zip(tracked, batch_features):
+            track_id = yolo_detections[idx]['track_id']
+            if track_id not in self.object_buffers:
+                self.object_buffers[track_id] = TemporalBuffer()
+            self.object_buffers[track_id].add_frame(features)
+        
+        # One RNN forward for every track with enough history
+        frames_added = defaultdict(int)
+        for i in tracked:
+            frames_added[yolo_detections[i]['track_id']] += 1
+        ready_ids = [t for t in frames_added if self.object_buffers[t].is_ready()]
+        
+        temporal_by_track = {}
+        if ready_ids:
+            if self.mode == 'streaming':
+                ready_ids, outputs = self._streaming_forward(ready_ids, frames_added)
+            else:
+                sequence_tensor = self._sequence_batch([self.object_buffers[t] for t in ready_ids])
+                with torch.no_grad():
+                    outputs = self.model(sequence_tensor)
+            
+            activity_probs = torch.softmax(outputs['activity_logits'], dim=-1)
+            activity_conf, activity_idx = activity_probs.max(dim=-1)
+            anomaly_scores = outputs['anomaly_scores'].reshape(-1).cpu().numpy()
+            embeddings = outputs['tracking_embeddings'].cpu().numpy()
+            
+            for row, track_id in enumerate(ready_ids):
+                temporal_by_track[track_id] = {
+                    'activity': self.activity_labels[int(activity_idx[row])],
+                    'activity_confidence': float(activity_conf[row]),
+                    'anomaly_score': float(anomaly_scores[row]),
+                    'tracking_embedding': embeddings[row].tolist()
+                }
+        
+        enhanced_detections = []
         for det in yolo_detections:
             track_id = det.get('track_id', -1)
             
@@ -409,31 +964,8 @@ class RNNInferenceEngine:
                     'activity_confidence': 0.0,
                     'anomaly_score': 0.0
                 }
-                enhanced_detections.append(det)
-                continue
-                
-            if track_id not in self.object_buffers:
-                self.object_buffers[track_id] = TemporalBuffer()
-            
-            features = self.feature_extractor.extract(frame, det['bbox'])
-            self.object_buffers[track_id].add_frame(features)
-            
-            if self.object_buffers[track_id].is_ready():
-                sequence = self.object_buffers[track_id].get_sequence()
-                sequence_tensor = torch.FloatTensor(sequence).unsqueeze(0).to(self.device)
-                
-                with torch.no_grad():
-                    outputs = self.model(sequence_tensor)
-                
-                activity_probs = torch.softmax(outputs['activity_logits'], dim=-1)
-                activity_idx = activity_probs.argmax().item()
-                
-                det['temporal'] = {
-                    'activity': self.activity_labels[activity_idx],
-                    'activity_confidence': float(activity_probs.max().item()),
-                    'anomaly_score': float(outputs['anomaly_scores'].item()),
-                    'tracking_embedding': outputs['tracking_embeddings'].cpu().numpy()[0].tolist()
-                }
+            elif track_id in temporal_by_track:
+                det['temporal'] = dict(temporal_by_track[track_id])
             else:
                 det['temporal'] = {
                     'activity': 'buffering',
@@ -446,7 +978,9 @@ class RNNInferenceEngine:
         return enhanced_detections
     
     def cleanup_old_tracks(self, active_track_ids: List[int]):
-        """Remove buffers for tracks that are no longer active"""
-        dead_tracks = set(self.object_buffers.keys()) - set(active_track_ids)
-        for track_id in dead_tracks:
-            del self.object_buffers[track_id]
\ No newline at end of file
+        """Remove buffers and streaming state for tracks that are no longer active"""
+        active = set(active_track_ids)
+        # Every per-track dict is swept, so none can outlive its track
+        for per_track in (self.object_buffers, self.track_states, self.steps_since_sync):
+            for track_id in [t for t in per_track if t not in active]:
+                del per_track[track_id]
\ No newline at end of file
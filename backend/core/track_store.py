@@ -0,0 +1,247 @@
+"""
+Compact Track Store
+Array-backed per-track state for RNNTemporal: fixed-capacity NumPy ring buffers
+with rolling statistics, updated for a whole frame of tracks at once
+"""
+
+import numpy as np
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+
+class TrackStore:
+    """
+    Per-track temporal state stored column-wise in preallocated arrays.
+
+    Each live track owns one slot (row). Slots are recycled through a free
+    list, and arrays grow by doubling up to `max_tracks`. Tracks are kept in
+    least-recently-updated order; touching a new track when the store is full
+    evicts the oldest one.
+
+    Per slot:
+        - confidence ring buffer of the last `history_length` detections, with
+          rolling sum and sum of squares (mean/variance in O(1))
+        - EMA of the boosted confidence and track age
+        - ring buffer of the last `trend_window` smoothed confidences, with
+          rolling counts of increasing/decreasing steps
+        - last update time and bbox
+    """
+    def __init__(self,
+                 max_tracks: int = 256,
+                 history_length: int = 5,
+                 trend_window: int = 5,
+                 initial_capacity: int = 64):
+        self.max_tracks = max(1, max_tracks)
+        self.history_length = max(1, history_length)
+        self.trend_window = max(2, trend_window)
+
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
+        self.capacity = 0
+
+        # Confidence history ring
+        self.conf_hist = np.zeros((0, self.history_length), dtype=np.float64)
+        self.hist_count = np.zeros(0, dtype=np.int32)
+        self.hist_head = np.zeros(0, dtype=np.int32)
+        self.conf_sum = np.zeros(0, dtype=np.float64)
+        self.conf_sumsq = np.zeros(0, dtype=np.float64)
+
+        # Track state
+        self.ages = np.zeros(0, dtype=np.int64)
+        self.ema = np.zeros(0, dtype=np.float64)        # NaN = not initialised
+        self.last_time = np.zeros(0, dtype=np.float64)
+        self.last_bbox = np.zeros((0, 4), dtype=np.float32)
+
+        # Smoothed-confidence trend ring
+        self.trend_buf = np.zeros((0, self.trend_window), dtype=np.float64)
+        self.trend_count = np.zeros(0, dtype=np.int64)  # Values pushed so far
+        self.trend_head = np.zeros(0, dtype=np.int32)
+        self.trend_up = np.zeros(0, dtype=np.int32)
+        self.trend_down = np.zeros(0, dtype=np.int32)
+
+        self._grow(min(max(1, initial_capacity), self.max_tracks))
+
+    # ----------------------------------------
+    # Slot management
+    # ----------------------------------------
+
+    def _grow(self, new_capacity: int):
+        old = self.capacity
+        if new_capacity <= old:
+            return
+
+        def grow(arr, fill=0):
+            out = np.full((new_capacity,) + arr.shape[1:], fill, dtype=arr.dtype)
+            out[:old] = arr
+            return out
+
+        self.conf_hist = grow(self.conf_hist)
+        self.hist_count = grow(self.hist_count)
+        self.hist_head = grow(self.hist_head)
+        self.conf_sum = grow(self.conf_sum)
+        self.conf_sumsq = grow(self.conf_sumsq)
+        self.ages = grow(self.ages)
+        self.ema = grow(self.ema, np.nan)
+        self.last_time = grow(self.last_time)
+        self.last_bbox = grow(self.last_bbox)
+        self.trend_buf = grow(self.trend_buf)
+        self.trend_count = grow(self.trend_count)
+        self.trend_head = grow(self.trend_head)
+        self.trend_up = grow(self.trend_up)
+        self.trend_down = grow(self.trend_down)
+
+        # Lowest slots are handed out first
+        self._free.extend(range(new_capacity - 1, old - 1, -1))
+        self.capacity = new_capacity
+
+    def _reset_slot(self, slot: int):
+        self.hist_count[slot] = 0
+        self.hist_head[slot] = 0
+        self.conf_sum[slot] = 0.0
+        self.conf_sumsq[slot] = 0.0
+        self.ages[slot] = 0
+        self.ema[slot] = np.nan
+        self.last_time[slot] = 0.0
+        self.trend_count[slot] = 0
+        self.trend_head[slot] = 0
+        self.trend_up[slot] = 0
+        self.trend_down[slot] = 0
+
+    def touch(self, track_id: str) -> Tuple[int, Optional[str]]:
+        """
+        Get (or allocate) a track's slot and mark it most recently updated
+
+        Returns:
+            (slot, evicted_track_id) - evicted_track_id is set when the store
+            was full and the least recently updated track had to make room
+        """
+        slot = self._slots.get(track_id)
+        if slot is not None:
+            self._slots.move_to_end(track_id)
+            return slot, None
+
+        evicted = None
+        if len(self._slots) >= self.max_tracks:
+            evicted = next(iter(self._slots))
+            self.remove(evicted)
+        if not self._free:
+            self._grow(min(self.capacity * 2, self.max_tracks))
+
+        slot = self._free.pop()
+        self._reset_slot(slot)
+        self._slots[track_id] = slot
+        return slot, evicted
+
+    def remove(self, track_id: str) -> bool:
+        slot = self._slots.pop(track_id, None)
+        if slot is None:
+            return False
+        self._free.append(slot)
+        return True
+
+    def slot(self, track_id: str) -> Optional[int]:
+        return self._slots.get(track_id)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """(track_id, slot) pairs, least recently updated first"""
+        return iter(self._slots.items())
+
+    def active_slots(self) -> np.ndarray:
+        return np.fromiter(self._slots.values(), dtype=np.int64, count=len(self._slots))
+
+    def expired(self, cutoff: float) -> List[Tuple[str, int]]:
+        """
+        Tracks last updated before `cutoff`, oldest first
+
+        Touch order is last-update order, so the LRU list doubles as the
+        expiry queue: the scan stops at the first live track and only visits
+        tracks that actually expire (plus one).
+        """
+        expired = []
+        for track_id, slot in self._slots.items():
+            if self.last_time[slot] >= cutoff:
+                break
+            expired.append((track_id, slot))
+        return expired
+
+    # ----------------------------------------
+    # Confidence history (rolling mean / variance)
+    # ----------------------------------------
+    # Batch methods take an array of *distinct* slots and update them at once.
+
+    def push_detections(self, slots: np.ndarray, confidences: np.ndarray,
+                        timestamp: float, bboxes: np.ndarray) -> np.ndarray:
+        """Append one detection per slot to its ring; returns history lengths"""
+        head = self.hist_head[slots]
+        count = self.hist_count[slots]
+
+        full = count == self.history_length
+        old = np.where(full, self.conf_hist[slots, head], 0.0)
+        count = np.where(full, count, count + 1)
+
+        self.conf_hist[slots, head] = confidences
+        self.conf_sum[slots] += confidences - old
+        self.conf_sumsq[slots] += confidences * confidences - old * old
+        self.hist_count[slots] = count
+
+        head = head + 1
+        wrapped = head == self.history_length
+        head[wrapped] = 0
+        self.hist_head[slots] = head
+
+        # Re-sum full rings once per wrap so rolling float error cannot accumulate
+        if wrapped.any():
+            rows = slots[wrapped]
+            window = self.conf_hist[rows]
+            self.conf_sum[rows] = window.sum(axis=1)
+            self.conf_sumsq[rows] = (window * window).sum(axis=1)
+
+        self.last_time[slots] = timestamp
+        self.last_bbox[slots] = bboxes
+        return count
+
+    def confidence_stats(self, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(count, mean, population variance) of each slot's confidence history"""
+        count = self.hist_count[slots]
+        n = np.maximum(count, 1)
+        mean = self.conf_sum[slots] / n
+        variance = np.maximum(self.conf_sumsq[slots] / n - mean * mean, 0.0)
+        return count, mean, variance
+
+    # ----------------------------------------
+    # Smoothed-confidence trend (rolling up/down counts)
+    # ----------------------------------------
+
+    def push_trend(self, slots: np.ndarray, values: np.ndarray):
+        """Append one smoothed confidence per slot to its trend window"""
+        window = self.trend_window
+        total = self.trend_count[slots]
+        head = self.trend_head[slots]
+        filled = np.minimum(total, window)
+
+        # Oldest step (oldest -> second oldest) leaves a full window
+        full = filled == window
+        oldest = self.trend_buf[slots, head]
+        second = self.trend_buf[slots, (head + 1) % window]
+        up = self.trend_up[slots] - (full & (second > oldest))
+        down = self.trend_down[slots] - (full & (second < oldest))
+
+        # Newest step (previous value -> new value) enters it
+        has_previous = filled > 0
+        newest = self.trend_buf[slots, (head - 1) % window]
+        self.trend_up[slots] = up + (has_previous & (values > newest))
+        self.trend_down[slots] = down + (has_previous & (values < newest))
+
+        self.trend_buf[slots, head] = values
+        self.trend_head[slots] = (head + 1) % window
+        self.trend_count[slots] = total + 1
+
+    def trend_counts(self, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(values pushed, increasing steps, decreasing steps) over each window"""
+        return self.trend_count[slots], self.trend_up[slots], self.trend_down[slots]
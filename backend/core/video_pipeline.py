@@ -0,0 +1,337 @@
+"""
+Pipelined Video Processing
+Overlaps frame decoding, Layer 1 inference and postprocessing, and can split
+long videos into segments processed by a pool of worker processes
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cascade_scheduler import CascadePolicy
+from .detections import boxes_to_lists
+from .motion_gate import MotionGate
+
+
+def read_next_sampled_frame(cap, frame_idx: int, sample_interval: int, end_frame: Optional[int] = None):
+    """
+    Advance to the next frame whose index is a multiple of sample_interval.
+    Skipped frames are only grabbed (demuxed), never retrieved.
+    Returns (frame_idx, frame) - frame is None at the end of the video/segment
+    """
+    while end_frame is None or frame_idx < end_frame:
+        if not cap.grab():
+            break
+        if frame_idx % sample_interval == 0:
+            ret, frame = cap.retrieve()
+            return frame_idx, frame if ret else None
+        frame_idx += 1
+    return frame_idx, None
+
+
+def results_to_frame_detections(results_by_model: Dict[str, list]) -> List[Dict]:
+    """Layer 1 results (model name -> Results list) to per-frame detection dicts"""
+    frame_detections = []
+    for source in ("speed", "accuracy"):
+        if source not in results_by_model:
+            continue
+        result = results_by_model[source][0]
+        names = result.names
+        bboxes, confidences, class_ids, _ = boxes_to_lists(result.boxes)
+        frame_detections.extend(
+            {"bbox": bbox, "confidence": conf, "class": names[cls], "source": source}
+            for bbox, conf, cls in zip(bboxes, confidences, class_ids)
+        )
+    return frame_detections
+
+
+# ============================================
+# In-process pipeline
+# ============================================
+
+async def join_thread(thread: threading.Thread):
+    """
+    Wait for a thread to finish without blocking the event loop. The wait
+    outlasts cancellation (anyio, as used by Starlette, re-cancels every
+    await of a cancelled task), which is re-raised once the thread is done.
+    """
+    joined = asyncio.ensure_future(asyncio.to_thread(thread.join))
+    cancelled = False
+    while not joined.done():
+        try:
+            await asyncio.shield(joined)
+        except asyncio.CancelledError:
+            cancelled = True
+    if cancelled:
+        raise asyncio.CancelledError()
+
+
+class VideoPipeline:
+    """
+    Three overlapping stages for one video:
+
+    1. A decoder thread grabs/retrieves sampled frames into a bounded queue
+    2. Up to `max_inflight` frames are in Layer 1 at once, so the batched
+       inference service can group them
+    3. Results are handed back in frame order for postprocessing
+
+    Decoding the next frames therefore overlaps inference of the current ones,
+    and the bounded queue caps memory at decode_queue_size + max_inflight frames.
+
+    With a MotionGate, frames it considers static are not submitted; they
+    reuse the result of the last frame that was.
+    """
+    def __init__(self,
+                 detect: Callable[[np.ndarray], Awaitable[Any]],
+                 decode_queue_size: int = 8,
+                 max_inflight: int = 4):
+        """
+        Args:
+            detect: Coroutine running Layer 1 on one BGR frame
+            decode_queue_size: Decoded frames allowed to wait for inference
+            max_inflight: Frames submitted to Layer 1 concurrently
+        """
+        self.detect = detect
+        self.decode_queue_size = max(1, decode_queue_size)
+        self.max_inflight = max(1, max_inflight)
+
+    async def run(self,
+                  cap,
+                  sample_interval: int,
+                  start_frame: int = 0,
+                  end_frame: Optional[int] = None,
+                  gate: Optional[MotionGate] = None) -> AsyncIterator[Tuple[int, Any, float, bool]]:
+        """
+        Yields (frame_idx, Layer 1 result, latency ms, inferred) in frame order;
+        inferred is False when the result was reused from an earlier frame.
+        The decoder thread has stopped reading cap once the generator finishes
+        or is closed, so the caller may release it then.
+        """
+        loop = asyncio.get_running_loop()
+        frames: asyncio.Queue = asyncio.Queue()
+        slots = threading.Semaphore(self.decode_queue_size)
+        stop = threading.Event()
+
+        def publish(item):
+            try:
+                loop.call_soon_threadsafe(frames.put_nowait, item)
+            except RuntimeError:
+                stop.set()  # Event loop is gone
+
+        def decode():
+            frame_idx = start_frame
+            try:
+                while not stop.is_set():
+                    frame_idx, frame = read_next_sampled_frame(cap, frame_idx, sample_interval, end_frame)
+                    if frame is None:
+                        break
+                    # Wait for room in the queue (backpressure), bailing out if cancelled
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    publish((frame_idx, frame))
+                    frame_idx += 1
+            finally:
+                publish(None)
+
+        decoder = threading.Thread(target=decode, name="video-decode", daemon=True)
+        decoder.start()
+
+        inflight: deque = deque()
+        last_task = None
+        decoding = True
+        try:
+            while True:
+                # Stage 2: top up the frames in inference
+                while decoding and len(inflight) < self.max_inflight:
+                    if inflight:
+                        try:
+                            item = frames.get_nowait()
+                        except asyncio.QueueEmpty:
+                            break
+                    else:
+                        item = await frames.get()
+                    if item is None:
+                        decoding = False
+                        break
+                    slots.release()
+                    frame_idx, frame = item
+                    inferred = True
+                    if gate is not None:
+                        inferred, _ = gate.check(frame)
+                    if inferred or last_task is None:
+                        last_task = asyncio.ensure_future(self.detect(frame))
+                    inflight.append((frame_idx, time.perf_counter(), last_task, inferred))
+
+                if not inflight:
+                    break
+
+                # Stage 3: hand back the oldest frame's result
+                frame_idx, submitted_at, task, inferred = inflight.popleft()
+                result = await task
+                yield frame_idx, result, (time.perf_counter() - submitted_at) * 1000, inferred
+        finally:
+            stop.set()
+            for _, _, task, _ in inflight:
+                task.cancel()
+            # The caller releases cap next, which must not race a grab()/retrieve()
+            # still running here. The decoder notices stop within one frame read
+            # (or one 0.1 s wait for queue room); wait for it off the event loop.
+            await join_thread(decoder)
+
+
+# ============================================
+# Segment worker processes
+# ============================================
+
+_worker_models: Dict[str, Any] = {}
+
+
+def _init_segment_worker(model_sources: Dict[str, str], torch_threads: int, backend_options: Optional[Dict] = None):
+    """Load the YOLO models once per worker process"""
+    import torch
+    from .yolo_backend import load_detector
+
+    torch.set_num_threads(max(1, torch_threads))
+    # ONNX Runtime gets the same per-worker thread share
+    options = {**(backend_options or {}), "threads": max(1, torch_threads)}
+    for name, source in model_sources.items():
+        _worker_models[name], _ = load_detector(source, **options)
+
+
+def process_video_segment(path: str,
+                          start_frame: int,
+                          end_frame: int,
+                          sample_interval: int,
+                          conf: float,
+                          mode: str,
+                          policy: CascadePolicy,
+                          motion_gate: Optional[Dict] = None) -> List[Dict]:
+    """
+    Run Layer 1 on the sampled frames of [start_frame, end_frame) (worker process).
+    motion_gate holds MotionGate settings; each segment gets its own gate.
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(path)
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    gate = MotionGate(**motion_gate) if motion_gate is not None else None
+    frames = []
+    results = None
+    frame_idx = start_frame
+    try:
+        while True:
+            frame_idx, frame = read_next_sampled_frame(cap, frame_idx, sample_interval, end_frame)
+            if frame is None:
+                break
+
+            start_time = time.time()
+            inferred = True
+            if gate is not None:
+                inferred, _ = gate.check(frame)
+            if inferred or results is None:
+                results = {"speed": _worker_models["speed"](frame, conf=conf, verbose=False)}
+                escalated = True
+                if mode == 'cascade':
+                    escalated, _ = policy.should_escalate(results["speed"][0].boxes.conf.cpu().numpy())
+                if escalated:
+                    results["accuracy"] = _worker_models["accuracy"](frame, conf=conf, verbose=False)
+                detections = results_to_frame_detections(results)
+
+            frames.append({
+                "frame": frame_idx,
+                "detections": detections,
+                "latency_ms": round((time.time() - start_time) * 1000, 2),
+                "accuracy_model_used": "accuracy" in results,
+                "inference_skipped": not inferred
+            })
+            frame_idx += 1
+    finally:
+        cap.release()
+    return frames
+
+
+class SegmentedVideoProcessor:
+    """
+    Splits a long video into frame ranges and processes them in a pool of
+    worker processes, each with its own copy of the YOLO models. Segments are
+    returned in order, so results stream out as each segment finishes.
+    """
+    def __init__(self,
+                 model_sources: Dict[str, str],
+                 workers: int = 2,
+                 min_segment_frames: int = 300,
+                 mode: str = 'parallel',
+                 policy: Optional[CascadePolicy] = None,
+                 motion_gate: Optional[Dict] = None,
+                 backend_options: Optional[Dict] = None):
+        """
+        Args:
+            model_sources: {"speed": path, "accuracy": path} loaded by each worker
+            workers: Worker processes
+            min_segment_frames: Shortest segment worth a separate task
+            mode: Layer 1 scheduling ("parallel" or "cascade", as CascadeScheduler)
+            policy: Cascade escalation policy
+            motion_gate: MotionGate settings to skip static frames (None = off)
+            backend_options: load_detector options for the workers' models
+        """
+        self.model_sources = model_sources
+        self.workers = max(1, workers)
+        self.min_segment_frames = max(1, min_segment_frames)
+        self.mode = mode
+        self.policy = policy or CascadePolicy()
+        self.motion_gate = motion_gate
+        self.backend_options = backend_options
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Split the cores between workers instead of oversubscribing them
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_segment_worker,
+                initargs=(self.model_sources, threads, self.backend_options)
+            )
+        return self._executor
+
+    def segments(self, total_frames: int, sample_interval: int) -> List[Tuple[int, int]]:
+        """Frame ranges aligned to the sampling interval, ~2 per worker"""
+        count = max(1, min(self.workers * 2, total_frames // self.min_segment_frames))
+        size = -(-total_frames // count)
+        size = -(-size // sample_interval) * sample_interval
+        return [(start, min(start + size, total_frames)) for start in range(0, total_frames, size)]
+
+    async def run(self, path: str, total_frames: int, sample_interval: int, conf: float = 0.3) -> AsyncIterator[Dict]:
+        """Yields per-frame result dicts in frame order"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        futures = [
+            loop.run_in_executor(
+                executor, process_video_segment,
+                path, start, end, sample_interval, conf, self.mode, self.policy, self.motion_gate
+            )
+            for start, end in self.segments(total_frames, sample_interval)
+        ]
+        try:
+            for future in futures:
+                for frame in await future:
+                    yield frame
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -5,6 +5,7 @@ The "Brain" of the system - Natural language reasoning about safety
 Supports: Groq API (Llama Vision), Ollama (local), Mock (demo)
 """
 
+import logging
 import os
 from pathlib import Path
 
@@ -19,6 +20,8 @@ from typing import Optional, Dict, List
 from dataclasses import dataclass
 from enum import Enum
 
+logger = logging.getLogger(__name__)
+
 
 class VLMProvider(Enum):
     GROQ = "groq"
@@ -72,7 +75,7 @@ Only provide formal safety reports when specifically analyzing images or when as
 For casual conversation, be natural and engaging!
 """
         
-        print(f"🧠 VLM Chat initialized with provider: {provider.value}")
+        logger.info("🧠 VLM Chat initialized with provider: %s", provider.value)
     
     async def analyze_safety(
         self, 
@@ -115,7 +118,7 @@ For casual conversation, be natural and engaging!
         """Query Groq API with Llama - uses text model with detection context"""
         
         if not self.groq_api_key:
-            print("⚠️ No Groq API key found, falling back to mock")
+            logger.warning("⚠️ No Groq API key found, falling back to mock")
             return await self._query_mock(image_bytes, query, None)
         
         headers = {
@@ -152,12 +155,12 @@ For casual conversation, be natural and engaging!
                 
                 result = response.json()
                 content = result["choices"][0]["message"]["content"]
-                print(f"✅ Groq response received: {content[:100]}...")
+                logger.debug("✅ Groq response received: %.100s...", content)
                 
                 return self._parse_response(content)
                 
         except Exception as e:
-            print(f"❌ Groq API error: {e}")
+            logger.error("❌ Groq API error: %s", e)
             return await self._query_mock(image_bytes, query, None)
     
     async def _query_ollama(self, image_bytes: bytes, query: str) -> SafetyAnalysis:
@@ -186,7 +189,7 @@ For casual conversation, be natural and engaging!
                 return self._parse_response(content)
                 
         except Exception as e:
-            print(f"❌ Ollama error: {e}")
+            logger.error("❌ Ollama error: %s", e)
             return await self._query_mock(image_bytes, query, None)
     
     async def _query_mock(
@@ -361,10 +364,10 @@ For casual conversation, be natural and engaging!
                     response.raise_for_status()
                     result = response.json()
                     content = result["choices"][0]["message"]["content"]
-                    print(f"✅ Groq chat response: {content[:80]}...")
+                    logger.debug("✅ Groq chat response: %.80s...", content)
                     return content
             except Exception as e:
-                print(f"❌ Groq chat error: {e}")
+                logger.error("❌ Groq chat error: %s", e)
                 # Fall through to default response
         
         # Fallback response for greetings
@@ -0,0 +1,243 @@
+"""
+YOLO Inference Backends
+Serves the YOLO models through ONNX Runtime on CPU (exported once and cached
+next to the .pt weights), falling back to ultralytics' PyTorch path
+"""
+
+import ast
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .box_ops import batched_nms
+
+# ONNX Runtime (optional - PyTorch is used without it)
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+BACKENDS = ('auto', 'onnx', 'pytorch')
+
+logger = logging.getLogger(__name__)
+
+
+def exported_model_path(weights_path: str, export_dir: str, int8: bool = False) -> str:
+    """Cache location of a .pt model's ONNX export (<stem>.onnx or <stem>.int8.onnx)"""
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+    return os.path.join(export_dir, f"{stem}.int8.onnx" if int8 else f"{stem}.onnx")
+
+
+def is_export_current(weights_path: str, onnx_path: str) -> bool:
+    """True if the export exists and is not older than the weights it came from"""
+    if not os.path.exists(onnx_path):
+        return False
+    return not os.path.exists(weights_path) or os.path.getmtime(onnx_path) >= os.path.getmtime(weights_path)
+
+
+def export_onnx(weights_path: str, export_dir: str, imgsz: int = 640, int8: bool = False) -> str:
+    """
+    Export a .pt model to ONNX once and cache it in export_dir
+
+    The export has dynamic batch and image size, so frames can be letterboxed
+    to their own stride-aligned shape and batched. With int8=True the FP32
+    export is additionally dynamically quantized (uint8 weights/activations).
+
+    Returns:
+        Path of the cached .onnx file (re-exported when the .pt is newer)
+    """
+    onnx_path = exported_model_path(weights_path, export_dir)
+    if not is_export_current(weights_path, onnx_path):
+        from ultralytics import YOLO
+
+        logger.info("📦 Exporting %s to ONNX...", weights_path)
+        exported = YOLO(weights_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=False, verbose=False)
+        os.makedirs(export_dir, exist_ok=True)
+        if os.path.abspath(exported) != os.path.abspath(onnx_path):
+            os.replace(exported, onnx_path)
+
+    if not int8:
+        return onnx_path
+
+    int8_path = exported_model_path(weights_path, export_dir, int8=True)
+    if not is_export_current(onnx_path, int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info("📦 Quantizing %s to INT8...", onnx_path)
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+def letterbox(image: np.ndarray, new_shape: Tuple[int, int], auto: bool, stride: int = 32) -> np.ndarray:
+    """Resize keeping aspect ratio and pad with gray (same rules as ultralytics)"""
+    height, width = image.shape[:2]
+    gain = min(new_shape[0] / height, new_shape[1] / width)
+    new_unpad = (int(round(width * gain)), int(round(height * gain)))
+    dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]
+    if auto:  # Minimal padding to a stride multiple
+        dw, dh = dw % stride, dh % stride
+    dw, dh = dw / 2, dh / 2
+
+    if (width, height) != new_unpad:
+        image = cv2.resize(image, new_unpad, interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    return cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+
+def scale_boxes_to_image(boxes: np.ndarray, input_shape: Tuple[int, int], image_shape: Tuple[int, int]) -> np.ndarray:
+    """Map xyxy boxes from the letterboxed input back to the original image (in place)"""
+    gain = min(input_shape[0] / image_shape[0], input_shape[1] / image_shape[1])
+    # letterbox rounds each side, so each axis has its own exact gain
+    new_h, new_w = round(image_shape[0] * gain), round(image_shape[1] * gain)
+    left = round((input_shape[1] - new_w) / 2 - 0.1)
+    top = round((input_shape[0] - new_h) / 2 - 0.1)
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - left) / (new_w / image_shape[1])).clip(0, image_shape[1])
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - top) / (new_h / image_shape[0])).clip(0, image_shape[0])
+    return boxes
+
+
+class OnnxYOLO:
+    """
+    A YOLO detection model served by ONNX Runtime.
+
+    Callable like an ultralytics YOLO model - model(images, conf=...) returns
+    one ultralytics Results per image, and .names maps class ids to names -
+    so the inference service, scheduler and endpoints use it unchanged.
+    Frames are letterboxed to a shared stride-aligned shape and run as one
+    batch; NMS uses the shared box_ops kernels.
+    """
+    def __init__(self,
+                 onnx_path: str,
+                 threads: int = 0,
+                 providers: Optional[Sequence[str]] = None,
+                 iou: float = 0.7,
+                 max_det: int = 300):
+        """
+        Args:
+            onnx_path: Exported model (see export_onnx)
+            threads: ONNX Runtime intra-op threads (0 = one per physical core)
+            providers: Execution providers in priority order, e.g.
+                ["OpenVINOExecutionProvider", "CPUExecutionProvider"]
+            iou: NMS IoU threshold (ultralytics default)
+            max_det: Maximum detections per image
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime is not installed")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = max(0, threads)
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        available = ort.get_available_providers()
+        providers = [p for p in (providers or ["CPUExecutionProvider"]) if p in available] or ["CPUExecutionProvider"]
+
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(onnx_path, options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        self.iou = iou
+        self.max_det = max_det
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names: Dict[int, str] = ast.literal_eval(metadata.get("names", "{}"))
+        self.stride = int(metadata.get("stride", 32))
+        imgsz = ast.literal_eval(metadata.get("imgsz", "[640, 640]"))
+        self.imgsz = tuple(imgsz) if isinstance(imgsz, (list, tuple)) else (imgsz, imgsz)
+        self.end2end = metadata.get("end2end", "False") == "True"
+        self.providers = self.session.get_providers()
+
+    def _preprocess(self, images: List[np.ndarray]) -> np.ndarray:
+        # One rectangular shape when all frames match (video, webcam), else square
+        same_shape = len({image.shape for image in images}) == 1
+        batch = [letterbox(image, self.imgsz, auto=same_shape, stride=self.stride) for image in images]
+
+        # BGR HWC uint8 -> RGB CHW float32 in [0, 1]
+        tensor = np.stack(batch)[..., ::-1].transpose(0, 3, 1, 2)
+        return np.ascontiguousarray(tensor, dtype=np.float32) / 255.0
+
+    def _postprocess(self, prediction: np.ndarray, conf: float) -> np.ndarray:
+        """One image's raw output -> (N, 6) [x1, y1, x2, y2, confidence, class] in input pixels"""
+        if self.end2end:  # (max_det, 6), NMS already applied
+            return prediction[prediction[:, 4] > conf]
+
+        # (4 + classes, anchors): cx, cy, w, h, class scores
+        prediction = prediction.T
+        class_scores = prediction[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+        candidates = scores > conf
+        if not candidates.any():
+            return np.zeros((0, 6), dtype=np.float32)
+
+        xywh = prediction[candidates, :4]
+        boxes = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+        scores, class_ids = scores[candidates], class_ids[candidates]
+
+        keep = batched_nms(boxes, scores, class_ids, self.iou)[:self.max_det]
+        return np.concatenate([boxes[keep], scores[keep, None], class_ids[keep, None]], axis=1).astype(np.float32)
+
+    def __call__(self, source, conf: float = 0.25, verbose: bool = False) -> list:
+        import torch
+        from ultralytics.engine.results import Results
+
+        sources = source if isinstance(source, list) else [source]
+        # Same input conventions as ultralytics: numpy arrays are BGR, PIL images RGB
+        images = [
+            cv2.cvtColor(np.asarray(s.convert("RGB")), cv2.COLOR_RGB2BGR) if isinstance(s, Image.Image) else s
+            for s in sources
+        ]
+
+        tensor = self._preprocess(images)
+        predictions = self.session.run(None, {self.input_name: tensor})[0]
+
+        results = []
+        for image, prediction in zip(images, predictions):
+            detections = self._postprocess(prediction, conf)
+            scale_boxes_to_image(detections[:, :4], tensor.shape[2:], image.shape[:2])
+            results.append(Results(image, path="", names=self.names, boxes=torch.from_numpy(detections)))
+        return results
+
+
+def load_detector(weights_path: str,
+                  backend: str = 'auto',
+                  export_dir: Optional[str] = None,
+                  threads: int = 0,
+                  providers: Optional[Sequence[str]] = None,
+                  int8: bool = False):
+    """
+    Load a YOLO model on the requested backend
+
+    - "pytorch": ultralytics YOLO
+    - "onnx": export to ONNX if not cached yet, then serve through ONNX Runtime
+    - "auto": ONNX Runtime when a current export is cached, otherwise PyTorch
+
+    Any ONNX failure (onnxruntime missing, export error) falls back to PyTorch.
+
+    Returns:
+        (model, backend name actually used)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown YOLO backend: {backend}. Available: {list(BACKENDS)}")
+
+    export_dir = export_dir or os.path.dirname(os.path.abspath(weights_path))
+    if backend != 'pytorch' and ONNXRUNTIME_AVAILABLE:
+        onnx_path = exported_model_path(weights_path, export_dir, int8=int8)
+        try:
+            if backend == 'onnx':
+                onnx_path = export_onnx(weights_path, export_dir, int8=int8)
+            if is_export_current(weights_path, onnx_path):
+                return OnnxYOLO(onnx_path, threads=threads, providers=providers), 'onnx'
+        except Exception as e:
+            logger.warning("⚠️  ONNX backend unavailable for %s (%s), using PyTorch", weights_path, e)
+    elif backend == 'onnx':
+        logger.warning("⚠️  onnxruntime is not installed, using PyTorch")
+
+    from ultralytics import YOLO
+    return YOLO(weights_path), 'pytorch'
@@ -1,9 +1,11 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
-from ultralytics import YOLO
 from PIL import Image
 import io
+import asyncio
+import logging
 import numpy as np
 import time
 import os
@@ -12,16 +14,32 @@ import tempfile
 from datetime import datetime
 from dotenv import load_dotenv
 from core.fusion_enhanced import FusionEnhanced  # Updated import
-from core.rnn_temporal import RNNTemporal  # New import
 from core.vlm_chat import get_vlm_chat, VLMProvider  # VLM Chat - The Brain
 from core.singularitynet import get_snet, init_snet  # SingularityNET integration
 from core.falcon_image_gen import FalconImageGenerator  # Real image generation with HF
 from core.falcon_duality import FalconDualityAI  # Training data retrieval & augmentation
-from typing import List, Optional
+from core.inference_service import InferenceService, InferenceQueueFull  # Batched YOLO worker
+from core.cascade_scheduler import CascadeScheduler, CascadePolicy  # Speed/accuracy scheduling
+from core.frame_protocol import FrameDecoder, FrameProtocolError, encode_detections  # Binary webcam frames
+from core.frame_ingest import FrameIngest  # Websocket backpressure
+from core.video_pipeline import VideoPipeline, SegmentedVideoProcessor, results_to_frame_detections  # Video stages
+from core.motion_gate import MotionGate  # Skip inference on static frames
+from core.detections import DetectionBatch, boxes_to_arrays, boxes_to_lists, format_fusion_weights  # Columnar detections
+from core.model_registry import ModelRegistry, ModelLoadError  # Lazy model loading + warm-up
+from core.box_ops import load_assignment_solver  # Deferred SciPy import
+from core.logging_setup import configure_logging, SampledLogger  # Queued, leveled logging
+from core.metrics import MetricsRegistry, MetricsMiddleware, CONTENT_TYPE, RSS_AVAILABLE, model_memory_bytes, resident_memory_bytes  # /metrics
+from typing import Dict, List, Optional
 
 # Load environment variables
 load_dotenv()
 
+# Logging (LOG_LEVEL, LOG_FORMAT): handlers only enqueue, a background thread writes
+configure_logging()
+logger = logging.getLogger(__name__)
+# Per-frame events (video frames, undecodable webcam frames) are logged 1 in N
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "30"))
+
 # Get CORS origins from environment variable
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000,https://code-tribe.vercel.app").split(",")
 
@@ -31,7 +49,7 @@ try:
     MONGO_AVAILABLE = True
 except ImportError:
     MONGO_AVAILABLE = False
-    print("⚠️  Motor not available - MongoDB features disabled")
+    logger.warning("⚠️  Motor not available - MongoDB features disabled")
 
 app = FastAPI(title="SafetyGuard AI", version="3.0.0")  # Rebranded!
 
@@ -47,11 +65,11 @@ HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
 REPLICATE_API_KEY = os.getenv("REPLICATE_API_KEY")
 STABILITY_API_KEY = os.getenv("STABILITY_API_KEY")
 
-print(f"🔑 Falcon API Key: {'✅ Loaded' if FALCON_API_KEY and FALCON_API_KEY != 'your_falcon_api_key_here' else '❌ Not set'}")
-print(f"🤗 Hugging Face API Key: {'✅ Loaded' if HUGGINGFACE_API_KEY and HUGGINGFACE_API_KEY != 'your_hf_api_key_here' else '❌ Not set'}")
-print(f"🎨 Replicate API Key: {'✅ Loaded' if REPLICATE_API_KEY and REPLICATE_API_KEY != 'your_replicate_api_key_here' else '❌ Not set'}")
-print(f"🌟 Stability AI Key: {'✅ Loaded' if STABILITY_API_KEY and STABILITY_API_KEY != 'your_stability_ai_key_here' else '❌ Not set'}")
-print(f"🌐 CORS Origins: {CORS_ORIGINS}")
+logger.info("🔑 Falcon API Key: %s", '✅ Loaded' if FALCON_API_KEY and FALCON_API_KEY != 'your_falcon_api_key_here' else '❌ Not set')
+logger.info("🤗 Hugging Face API Key: %s", '✅ Loaded' if HUGGINGFACE_API_KEY and HUGGINGFACE_API_KEY != 'your_hf_api_key_here' else '❌ Not set')
+logger.info("🎨 Replicate API Key: %s", '✅ Loaded' if REPLICATE_API_KEY and REPLICATE_API_KEY != 'your_replicate_api_key_here' else '❌ Not set')
+logger.info("🌟 Stability AI Key: %s", '✅ Loaded' if STABILITY_API_KEY and STABILITY_API_KEY != 'your_stability_ai_key_here' else '❌ Not set')
+logger.info("🌐 CORS Origins: %s", CORS_ORIGINS)
 
 app.add_middleware(
     CORSMiddleware,
@@ -69,15 +87,15 @@ if MONGO_AVAILABLE and USE_MONGO:
         client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI, serverSelectionTimeoutMS=3000)
         db = client[DB_NAME]
         logs_collection = db[COLLECTION_NAME]
-        print(f"📂 MongoDB initialized: {DB_NAME}")
+        logger.info("📂 MongoDB initialized: %s", DB_NAME)
     except Exception as e:
         MONGO_AVAILABLE = False
         db = None
-        print(f"⚠️  MongoDB connection failed: {e}")
+        logger.warning("⚠️  MongoDB connection failed: %s", e)
         logs_collection = None
 else:
     MONGO_AVAILABLE = False
-    print("📂 Running without MongoDB (in-memory mode)")
+    logger.info("📂 Running without MongoDB (in-memory mode)")
 
 # --- MODEL LOADER ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -87,45 +105,234 @@ MODEL_PATH_SPEED = os.path.join(MODELS_DIR, "yolo_speed.pt")
 MODEL_PATH_ACCURACY = os.path.join(MODELS_DIR, "yolo_accuracy.pt")
 MODEL_PATH_RNN = os.path.join(MODELS_DIR, "rnn_temporal.pt")
 
-# Load YOLO models
+# Models are not loaded here: the registry builds each one on first use, or in
+# the background warm-up started at startup, so a cold start answers
+# /system/health right away. Loaders import torch/ultralytics themselves.
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() in ("1", "true", "yes")
+MODEL_RETRY_BACKOFF = float(os.getenv("MODEL_RETRY_BACKOFF", "5"))
+model_registry = ModelRegistry(retry_backoff=MODEL_RETRY_BACKOFF)
+
+# YOLO models
 if os.path.exists(MODEL_PATH_SPEED):
     speed_model_source = MODEL_PATH_SPEED
-    print(f"⚡ Loading Trained Speed Model: {speed_model_source}")
+    logger.info("⚡ Trained Speed Model: %s", speed_model_source)
 else:
     speed_model_source = "yolov8n.pt"
-    print(f"⚠️  Trained speed model not found, using pretrained: {speed_model_source}")
+    logger.warning("⚠️  Trained speed model not found, using pretrained: %s", speed_model_source)
 
 if os.path.exists(MODEL_PATH_ACCURACY):
     accuracy_model_source = MODEL_PATH_ACCURACY
-    print(f"🎯 Loading Trained Accuracy Model: {accuracy_model_source}")
+    logger.info("🎯 Trained Accuracy Model: %s", accuracy_model_source)
 else:
     accuracy_model_source = "yolov8s.pt"
-    print(f"⚠️  Trained accuracy model not found, using pretrained: {accuracy_model_source}")
+    logger.warning("⚠️  Trained accuracy model not found, using pretrained: %s", accuracy_model_source)
+
+# Inference backend: "auto" serves cached ONNX exports through ONNX Runtime and
+# falls back to PyTorch, "onnx" exports on first start, "pytorch" never uses ONNX
+YOLO_BACKEND = os.getenv("YOLO_BACKEND", "auto")
+YOLO_BACKEND_OPTIONS = {
+    "backend": YOLO_BACKEND,
+    "export_dir": MODELS_DIR,  # Exports are cached next to the .pt weights
+    "threads": int(os.getenv("YOLO_ONNX_THREADS", "0")),
+    "providers": [p.strip() for p in os.getenv("YOLO_ONNX_PROVIDERS", "CPUExecutionProvider").split(",") if p.strip()],
+    "int8": os.getenv("YOLO_ONNX_INT8", "false").lower() in ("1", "true", "yes")
+}
 
-model_speed = YOLO(speed_model_source)
-model_accuracy = YOLO(accuracy_model_source)
+yolo_backends: Dict[str, str] = {}  # Model name -> backend serving it, once loaded
 
-# Load RNN and Fusion models
-if os.path.exists(MODEL_PATH_RNN):
-    rnn_model = RNNTemporal(MODEL_PATH_RNN)
-    print(f"🧠 Loading RNN Temporal Model: {MODEL_PATH_RNN}")
-else:
-    rnn_model = None
-    print(f"⚠️  RNN model not found, temporal analysis disabled")
 
-fusion_model = FusionEnhanced(yolo_weight=0.6, rnn_weight=0.4, iou_threshold=0.5)
-print(f"🔗 Fusion Enhanced initialized")
+def load_yolo(name: str, source: str):
+    """Load a Layer 1 model and run one blank frame through it (predictor setup, kernel selection)"""
+    from core.yolo_backend import load_detector  # Pulls in cv2, onnxruntime and ultralytics/torch
+    
+    model, backend = load_detector(source, **YOLO_BACKEND_OPTIONS)
+    model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+    yolo_backends[name] = backend
+    logger.info("⚙️  YOLO %s model on %s: %s", name, backend, source)
+    return model
+
+
+model_registry.register("speed", lambda: load_yolo("speed", speed_model_source))
+model_registry.register("accuracy", lambda: load_yolo("accuracy", accuracy_model_source))
+
+# --- METRICS ---
+# Prometheus text format on /metrics; an observation is a dict update under a lock
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram(
+    "safetyguard_http_request_duration_seconds", "HTTP request latency by route", ("route", "method", "status")
+)
+layer_seconds = metrics.histogram(
+    "safetyguard_layer_duration_seconds", "Detection layer latency (layer1_yolo includes the inference queue)", ("layer",)
+)
+model_seconds = metrics.histogram(
+    "safetyguard_model_inference_seconds", "One model call: a batched YOLO call or a VLM query", ("model",)
+)
+model_batch_frames = metrics.histogram(
+    "safetyguard_model_batch_frames", "Frames per batched YOLO call", ("model",), buckets=(1, 2, 4, 8, 16, 32)
+)
+falcon_triggers = metrics.counter(
+    "safetyguard_falcon_triggers_total", "Low-confidence Falcon triggers by source", ("source",)
+)
+websocket_connections = metrics.gauge("safetyguard_websocket_connections", "Connected /ws/webcam clients")
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, histogram=request_seconds)
+
+
+def observe_model_call(name: str, frames: int, seconds: float):
+    model_seconds.observe(seconds, name)
+    model_batch_frames.observe(frames, name)
+
+
+def active_tracks() -> Optional[dict]:
+    """Tracks per camera held by Layer 2 (None until the RNN is loaded)"""
+    rnn_model = model_registry.peek("rnn")
+    if not rnn_model:
+        return None
+    return {camera_id: len(session) for camera_id, session in list(rnn_model.sessions.items())}
+
+
+_model_memory: Dict[str, Optional[int]] = {}  # Computed once per loaded model
+
+
+def model_memory() -> dict:
+    for name in ("speed", "accuracy", "rnn"):
+        if name not in _model_memory and model_registry.is_loaded(name):
+            _model_memory[name] = model_memory_bytes(model_registry.peek(name))
+    return {name: size for name, size in _model_memory.items() if size is not None}
+
+
+metrics.gauge("safetyguard_active_tracks", "Layer 2 tracks per camera", ("camera_id",), callback=active_tracks)
+metrics.gauge("safetyguard_inference_queue_depth", "Frames waiting for the batched YOLO worker",
+              callback=lambda: inference_service.queue_depth)
+metrics.gauge("safetyguard_model_memory_bytes", "Weights of each loaded model", ("model",), callback=model_memory)
+if RSS_AVAILABLE:  # Not measurable on Windows
+    metrics.gauge("process_resident_memory_bytes", "Resident memory of the API process", callback=resident_memory_bytes)
+
+# Batched inference worker (keeps YOLO calls off the event loop)
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "5"))
+INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", "64"))
+
+inference_service = InferenceService(
+    models=model_registry.lazy_mapping(("speed", "accuracy")),  # Loaded in each model's worker thread
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+    batch_window_ms=INFERENCE_BATCH_WINDOW_MS,
+    max_queue_depth=INFERENCE_QUEUE_DEPTH,
+    model_observer=observe_model_call
+)
+logger.info("🧵 Inference service: batch=%d, window=%sms, queue=%d", INFERENCE_MAX_BATCH_SIZE, INFERENCE_BATCH_WINDOW_MS, INFERENCE_QUEUE_DEPTH)
+
+# Layer 1 scheduling: "parallel" runs both models at once, "cascade" runs the
+# accuracy model only when the speed model is uncertain
+YOLO_SCHEDULER_MODE = os.getenv("YOLO_SCHEDULER_MODE", "parallel")
+yolo_scheduler = CascadeScheduler(
+    inference_service,
+    mode=YOLO_SCHEDULER_MODE,
+    policy=CascadePolicy(
+        confident_threshold=float(os.getenv("CASCADE_CONFIDENT_THRESHOLD", "0.5")),
+        max_uncertain_ratio=float(os.getenv("CASCADE_MAX_UNCERTAIN_RATIO", "0.3")),
+        min_count=int(os.getenv("CASCADE_MIN_COUNT", "1")),
+        max_count=int(os.getenv("CASCADE_MAX_COUNT", "20"))
+    )
+)
+logger.info("🪜 YOLO scheduler mode: %s", YOLO_SCHEDULER_MODE)
+
+# Websocket streams: frames waiting per connection while the previous one is
+# processed, and what to drop beyond that ("drop_oldest" = latest frame wins)
+STREAM_MAX_PENDING_FRAMES = int(os.getenv("STREAM_MAX_PENDING_FRAMES", "1"))
+STREAM_DROP_POLICY = os.getenv("STREAM_DROP_POLICY", "drop_oldest")
+STREAM_STATS_EVERY = int(os.getenv("STREAM_STATS_EVERY", "30"))  # Binary clients: frames between stats messages
+
+# Video processing: decoded frames buffered ahead of inference, frames in
+# Layer 1 at once, and worker processes for segment-parallel long videos
+VIDEO_DECODE_QUEUE_SIZE = int(os.getenv("VIDEO_DECODE_QUEUE_SIZE", "8"))
+VIDEO_MAX_INFLIGHT = int(os.getenv("VIDEO_MAX_INFLIGHT", "4"))
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", "1"))
+VIDEO_SEGMENT_MIN_FRAMES = int(os.getenv("VIDEO_SEGMENT_MIN_FRAMES", "300"))
+
+# Motion gate: static frames reuse the last inferred frame's detections
+MOTION_GATE_ENABLED = os.getenv("MOTION_GATE_ENABLED", "false").lower() in ("1", "true", "yes")
+MOTION_GATE_SETTINGS = {
+    "change_threshold": float(os.getenv("MOTION_GATE_CHANGE_THRESHOLD", "0.01")),
+    "pixel_delta": int(os.getenv("MOTION_GATE_PIXEL_DELTA", "20")),
+    "refresh_interval": int(os.getenv("MOTION_GATE_REFRESH_FRAMES", "30"))
+}
+if MOTION_GATE_ENABLED:
+    logger.info("🚦 Motion gate enabled: %s", MOTION_GATE_SETTINGS)
+
+
+def new_motion_gate() -> Optional[MotionGate]:
+    """A fresh gate for one stream or video, or None when gating is disabled"""
+    return MotionGate(**MOTION_GATE_SETTINGS) if MOTION_GATE_ENABLED else None
+
+
+segment_processor = None
+if VIDEO_WORKERS > 1:
+    segment_processor = SegmentedVideoProcessor(
+        model_sources={"speed": speed_model_source, "accuracy": accuracy_model_source},
+        workers=VIDEO_WORKERS,
+        min_segment_frames=VIDEO_SEGMENT_MIN_FRAMES,
+        mode=YOLO_SCHEDULER_MODE,
+        policy=yolo_scheduler.policy,
+        motion_gate=MOTION_GATE_SETTINGS if MOTION_GATE_ENABLED else None,
+        backend_options=YOLO_BACKEND_OPTIONS
+    )
+    logger.info("🎬 Video segment workers: %d", VIDEO_WORKERS)
+
+# RNN and Fusion models (loaded lazily through the registry)
+# Temporal state is kept per camera_id with LRU eviction and memory caps
+TEMPORAL_MAX_SESSIONS = int(os.getenv("TEMPORAL_MAX_SESSIONS", "32"))
+TEMPORAL_MAX_TRACKS_PER_SESSION = int(os.getenv("TEMPORAL_MAX_TRACKS_PER_SESSION", "256"))
+TEMPORAL_SESSION_TTL = float(os.getenv("TEMPORAL_SESSION_TTL", "300"))
+TEMPORAL_TRACK_MAX_AGE = float(os.getenv("TEMPORAL_TRACK_MAX_AGE", "2.0"))
+RNN_PRECISION = os.getenv("RNN_PRECISION", "fp32")  # fp32 or int8 (dynamic quantization, CPU)
+
+
+def load_rnn():
+    """Layer 2 temporal model, or None when no weights are available"""
+    if not os.path.exists(MODEL_PATH_RNN):
+        logger.warning("⚠️  RNN model not found, temporal analysis disabled")
+        return None
+    from core.rnn_temporal import RNNTemporal  # Pulls in torch/torchvision
+    
+    logger.info("🧠 Loading RNN Temporal Model: %s", MODEL_PATH_RNN)
+    return RNNTemporal(
+        MODEL_PATH_RNN,
+        max_sessions=TEMPORAL_MAX_SESSIONS,
+        max_tracks_per_session=TEMPORAL_MAX_TRACKS_PER_SESSION,
+        session_ttl=TEMPORAL_SESSION_TTL,
+        track_max_age=TEMPORAL_TRACK_MAX_AGE,
+        precision=RNN_PRECISION
+    )
+
+
+FUSION_MATCHER = os.getenv("FUSION_MATCHER", "hungarian")  # "hungarian" or "greedy"
+
+
+def load_fusion():
+    fusion = FusionEnhanced(yolo_weight=0.6, rnn_weight=0.4, iou_threshold=0.5, matcher=FUSION_MATCHER)
+    if FUSION_MATCHER == "hungarian":
+        load_assignment_solver()  # Import SciPy now instead of on the first frame
+    logger.info("🔗 Fusion Enhanced initialized (matcher: %s)", FUSION_MATCHER)
+    return fusion
+
+
+def load_falcon_generator():
+    """Falcon Image Generator with Hugging Face"""
+    generator = FalconImageGenerator(api_key=HUGGINGFACE_API_KEY)
+    if generator.api_key:
+        logger.info("🦅 Falcon Image Generator initialized with Hugging Face API")
+    else:
+        logger.warning("⚠️  Falcon Image Generator running in simulated mode (no API key)")
+    return generator
 
-# Initialize Falcon Image Generator with Hugging Face
-falcon_generator = FalconImageGenerator(api_key=HUGGINGFACE_API_KEY)
-if falcon_generator.api_key:
-    print(f"🦅 Falcon Image Generator initialized with Hugging Face API")
-else:
-    print(f"⚠️  Falcon Image Generator running in simulated mode (no API key)")
 
-# Initialize Falcon Duality AI for training data retrieval & augmentation
-falcon_duality = FalconDualityAI()
-print(f"🦅 Falcon Duality AI initialized for training data augmentation")
+model_registry.register("rnn", load_rnn)
+model_registry.register("fusion", load_fusion)
+# Falcon services are not needed for detection, so readiness does not wait for them
+model_registry.register("falcon_generator", load_falcon_generator, required=False)
+model_registry.register("falcon_duality", FalconDualityAI, required=False)  # Training data retrieval & augmentation
 
 # --- DATA MODELS ---
 class LogRequest(BaseModel):
@@ -167,24 +374,102 @@ class DetectionResponse(BaseModel):
     rnn_confidence: Optional[float] = None
 
 # --- HELPER FUNCTIONS ---
-def yolo_results_to_detections(results, model_names):
-    """Convert YOLO results to detection dict format"""
-    detections = []
-    for r in results:
-        boxes = r.boxes
-        for box in boxes:
-            detections.append({
-                'class': model_names[int(box.cls)],
-                'confidence': float(box.conf),
-                'bbox': box.xyxy[0].tolist(),
-                'class_id': int(box.cls)
-            })
-    return detections
+async def run_yolo(image, conf=0.25, models=None):
+    """Submit a frame to the batched inference service"""
+    start = time.perf_counter()
+    try:
+        batched = await inference_service.infer(image, conf=conf, models=models)
+    except (InferenceQueueFull, ModelLoadError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    layer_seconds.observe(time.perf_counter() - start, "layer1_yolo")
+    return batched
+
+async def run_layer1(image, conf=0.25):
+    """Run the speed/accuracy pair through the cascade scheduler"""
+    start = time.perf_counter()
+    try:
+        batched = await yolo_scheduler.detect(image, conf=conf)
+    except (InferenceQueueFull, ModelLoadError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    layer_seconds.observe(time.perf_counter() - start, "layer1_yolo")
+    return batched
+
+def run_temporal(rnn_model, batch: DetectionBatch, camera_id: str) -> DetectionBatch:
+    """Layer 2 (annotates the batch in place)"""
+    with layer_seconds.time("layer2_rnn"):
+        return rnn_model.process_detections(batch, camera_id=camera_id)
+
+def run_fusion(fusion_model, yolo: DetectionBatch, rnn: DetectionBatch) -> DetectionBatch:
+    """Layer 3"""
+    with layer_seconds.time("layer3_fusion"):
+        return fusion_model.fuse_detections(yolo, rnn)
+
+async def get_model(name: str):
+    """A registry component for a request handler (loads it on first use; 503 if it failed)"""
+    try:
+        return await model_registry.aget(name)
+    except ModelLoadError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def yolo_results_to_batch(results) -> DetectionBatch:
+    """
+    Convert YOLO results to a columnar detection batch. Class names come from
+    the results, so a model the cascade skipped is never looked up (or loaded)
+    """
+    return DetectionBatch.from_results(results)
+
+def fused_batch_to_response(fused: DetectionBatch) -> List[dict]:
+    """Serialize a fused batch to the /detect/fusion detection shape"""
+    scores = fused.scores.tolist()
+    # Unfused detections report their own score for both layers
+    yolo_scores = np.where(np.isnan(fused.yolo_scores), fused.scores, fused.yolo_scores).tolist()
+    rnn_scores = np.where(np.isnan(fused.rnn_scores), fused.scores, fused.rnn_scores).tolist()
+    count = len(fused)
+    track_ids = fused.track_ids.tolist() if fused.track_ids is not None else [None] * count
+    track_ages = fused.track_ages.tolist() if fused.track_ages is not None else [None] * count
+    boosts = fused.temporal_boost.tolist() if fused.temporal_boost is not None else [0.0] * count
+    weights = format_fusion_weights(fused.fusion_weights).tolist()
+    
+    return [
+        {
+            "box": box,
+            "score": round(score, 3),
+            "label": label,
+            "class_id": class_id,
+            "layer": "fused",
+            "track_id": track_id,
+            "track_age": track_age if track_id is not None else None,
+            "temporal_boost": round(boost, 3),
+            "yolo_confidence": round(yolo_score, 3),
+            "rnn_confidence": round(rnn_score, 3),
+            "fusion_weights": weight or 'N/A'
+        }
+        for box, score, label, class_id, track_id, track_age, boost, yolo_score, rnn_score, weight in zip(
+            fused.boxes.tolist(), scores, fused.labels(), fused.class_ids.tolist(),
+            track_ids, track_ages, boosts, yolo_scores, rnn_scores, weights
+        )
+    ]
+
+# --- LIFECYCLE ---
+
+@app.on_event("startup")
+async def start_inference_service():
+    await inference_service.start()
+    if MODEL_WARMUP:
+        model_registry.start_warm_up()  # Readiness follows on /system/health and /system/ready
+
+@app.on_event("shutdown")
+async def stop_inference_service():
+    await model_registry.stop_warm_up()
+    await inference_service.stop()
+    if segment_processor is not None:
+        segment_processor.shutdown()
 
 # --- ENDPOINTS ---
 
 @app.get("/system/health")
 async def health_check():
+    """Liveness: answers as soon as the server is up (model loading is reported under readiness)"""
     db_status = "disabled"
     if MONGO_AVAILABLE and logs_collection is not None:
         try:
@@ -193,7 +478,10 @@ async def health_check():
         except Exception:
             db_status = "disconnected"
     
-    rnn_status = "active" if rnn_model else "disabled"
+    if model_registry.is_loaded("rnn"):
+        rnn_status = "active" if model_registry.peek("rnn") else "disabled"
+    else:
+        rnn_status = "failed" if "rnn" in model_registry.failed else "loading"
         
     return {
         "status": "nominal", 
@@ -201,11 +489,63 @@ async def health_check():
         "db_connection": db_status, 
         "rnn_temporal": rnn_status,
         "gpu": "active",
+        "yolo_backend": {"speed": yolo_backends.get("speed"), "accuracy": yolo_backends.get("accuracy")},
+        "inference_service": "running" if inference_service.is_running else "stopped",
+        "readiness": model_registry.get_status(),
         "version": "3.0.0"
     }
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+@app.get("/system/ready")
+async def readiness_check():
+    """Readiness: 200 once every required model is loaded, 503 while warming up or after a load failure"""
+    status = model_registry.get_status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/temporal/sessions")
+async def temporal_sessions():
+    """Per-camera temporal state (tracks, activity, eviction limits)"""
+    rnn_model = await get_model("rnn")
+    if not rnn_model:
+        return {"rnn_temporal": "disabled", "sessions": {}}
+    return rnn_model.get_session_stats()
+
+@app.delete("/temporal/sessions/{camera_id}")
+async def reset_temporal_session(camera_id: str):
+    """Forget temporal state for one camera"""
+    rnn_model = await get_model("rnn")
+    if not rnn_model or not rnn_model.reset_session(camera_id):
+        raise HTTPException(status_code=404, detail=f"No temporal session for camera: {camera_id}")
+    return {"status": "reset", "camera_id": camera_id}
+
+@app.get("/temporal/events")
+async def temporal_events(since: int = 0, camera_id: Optional[str] = None, limit: int = 100):
+    """Track expiry events (e.g. "FireExtinguisher missing"); poll with since=<last seq>"""
+    rnn_model = await get_model("rnn")
+    if not rnn_model:
+        return {"rnn_temporal": "disabled", "events": [], "next_since": since}
+    events = rnn_model.get_expiry_events(since=since, camera_id=camera_id, limit=min(max(limit, 1), 1000))
+    return {"events": events, "next_since": events[-1]["seq"] if events else since}
+
+@app.get("/system/inference")
+async def inference_stats():
+    """Queue wait and batch fill metrics for the batched inference service"""
+    return {
+        **inference_service.get_stats(),
+        "scheduler": yolo_scheduler.get_stats()
+    }
+
 @app.post("/detect/fusion")
-async def run_inference(file: UploadFile = File(...)):
+async def run_inference(
+    file: UploadFile = File(...),
+    camera_id: str = Form(default="default")
+):
     """Enhanced 3-Layer Detection System"""
     start_time = time.time()
     image_data = await file.read()
@@ -219,54 +559,38 @@ async def run_inference(file: UploadFile = File(...)):
 
     # Layer 1: YOLO Detection (both models)
     layer1_start = time.time()
-    results_speed = model_speed(img_np, conf=0.25)
-    results_accuracy = model_accuracy(img_np, conf=0.25)
+    batched = await run_layer1(img_np, conf=0.25)
     
-    # Convert to detection format
-    detections_speed = yolo_results_to_detections(results_speed, model_speed.names)
-    detections_accuracy = yolo_results_to_detections(results_accuracy, model_accuracy.names)
+    # Convert to detection batches (accuracy results are absent when the cascade skipped it)
+    detections_speed = yolo_results_to_batch(batched.results["speed"])
+    detections_accuracy = yolo_results_to_batch(batched.results.get("accuracy", []))
     
     # Combine YOLO detections (simple approach: use accuracy model primarily)
-    yolo_detections = detections_accuracy if detections_accuracy else detections_speed
+    yolo_detections = detections_accuracy if len(detections_accuracy) else detections_speed
     layer1_time = time.time() - layer1_start
 
-    # Layer 2: RNN Temporal Analysis
+    # Layer 2: RNN Temporal Analysis (annotates a copy; fusion needs the Layer 1 scores)
+    rnn_model = await get_model("rnn")
     layer2_start = time.time()
+    expired_tracks = []
     if rnn_model:
-        rnn_detections = rnn_model.process_detections(yolo_detections)
+        rnn_detections = run_temporal(rnn_model, yolo_detections.copy(), camera_id)
+        expired_tracks = rnn_model.get_last_expired(camera_id)
     else:
         rnn_detections = yolo_detections  # Pass through if RNN disabled
     layer2_time = time.time() - layer2_start
 
     # Layer 3: Spatio-Temporal Fusion
+    fusion_model = await get_model("fusion")
     layer3_start = time.time()
-    fused_detections = fusion_model.fuse_detections(yolo_detections, rnn_detections)
+    fused_detections = run_fusion(fusion_model, yolo_detections, rnn_detections)
     layer3_time = time.time() - layer3_start
 
-    # Prepare response
-    falcon_trigger = False
-    response_detections = []
-
-    for det in fused_detections:
-        score = det['confidence']
-        
-        # Falcon trigger logic
-        if 0.25 < score < 0.45:
-            falcon_trigger = True
-        
-        response_detections.append({
-            "box": det['bbox'],
-            "score": round(score, 3),
-            "label": det['class'],
-            "class_id": det.get('class_id', 0),
-            "layer": "fused",
-            "track_id": det.get('track_id'),
-            "track_age": det.get('track_age'),
-            "temporal_boost": round(det.get('temporal_boost', 0.0), 3),
-            "yolo_confidence": round(det.get('yolo_confidence', score), 3),
-            "rnn_confidence": round(det.get('rnn_confidence', score), 3),
-            "fusion_weights": det.get('weights', 'N/A')
-        })
+    # Prepare response (Falcon trigger: any score in the uncertain band)
+    falcon_trigger = bool(((fused_detections.scores > 0.25) & (fused_detections.scores < 0.45)).any())
+    if falcon_trigger:
+        falcon_triggers.inc("detect_fusion")
+    response_detections = fused_batch_to_response(fused_detections)
 
     total_time = time.time() - start_time
 
@@ -274,12 +598,18 @@ async def run_inference(file: UploadFile = File(...)):
         "latency_ms": round(total_time * 1000, 2),
         "layer_timings": {
             "layer1_yolo_ms": round(layer1_time * 1000, 2),
+            "layer1_queue_wait_ms": round(batched.queue_wait_ms, 2),
+            "layer1_batch_size": batched.batch_size,
+            "layer1_mode": batched.mode,
+            "layer1_accuracy_model_used": "accuracy" in batched.results,
             "layer2_rnn_ms": round(layer2_time * 1000, 2),
             "layer3_fusion_ms": round(layer3_time * 1000, 2)
         },
         "falcon_trigger": falcon_trigger,
         "count": len(response_detections),
         "detections": response_detections,
+        "expired_tracks": expired_tracks,
+        "camera_id": camera_id,
         "system_info": {
             "rnn_enabled": rnn_model is not None,
             "fusion_version": "enhanced_v2"
@@ -287,7 +617,11 @@ async def run_inference(file: UploadFile = File(...)):
     }
 
 @app.post("/detect/layer/{layer_num}")
-async def run_single_layer(layer_num: int, file: UploadFile = File(...)):
+async def run_single_layer(
+    layer_num: int,
+    file: UploadFile = File(...),
+    camera_id: str = Form(default="default")
+):
     """Debug endpoint: Test individual layers"""
     if layer_num not in [1, 2, 3]:
         raise HTTPException(status_code=400, detail="Layer must be 1, 2, or 3")
@@ -299,27 +633,29 @@ async def run_single_layer(layer_num: int, file: UploadFile = File(...)):
 
     if layer_num == 1:
         # YOLO only
-        results = model_accuracy(img_np, conf=0.25)
-        detections = yolo_results_to_detections(results, model_accuracy.names)
+        batched = await run_yolo(img_np, conf=0.25, models=["accuracy"])
+        detections = yolo_results_to_batch(batched.results["accuracy"])
         layer_name = "YOLO Detection"
         
     elif layer_num == 2:
         # YOLO + RNN
-        results = model_accuracy(img_np, conf=0.25)
-        yolo_dets = yolo_results_to_detections(results, model_accuracy.names)
+        batched = await run_yolo(img_np, conf=0.25, models=["accuracy"])
+        yolo_dets = yolo_results_to_batch(batched.results["accuracy"])
+        rnn_model = await get_model("rnn")
         if rnn_model:
-            detections = rnn_model.process_detections(yolo_dets)
+            detections = run_temporal(rnn_model, yolo_dets, camera_id)
         else:
             detections = yolo_dets
         layer_name = "RNN Temporal"
         
     else:  # layer_num == 3
         # Full fusion
-        results = model_accuracy(img_np, conf=0.25)
-        yolo_dets = yolo_results_to_detections(results, model_accuracy.names)
+        batched = await run_yolo(img_np, conf=0.25, models=["accuracy"])
+        yolo_dets = yolo_results_to_batch(batched.results["accuracy"])
+        rnn_model = await get_model("rnn")
         if rnn_model:
-            rnn_dets = rnn_model.process_detections(yolo_dets)
-            detections = fusion_model.fuse_detections(yolo_dets, rnn_dets)
+            rnn_dets = run_temporal(rnn_model, yolo_dets.copy(), camera_id)
+            detections = run_fusion(await get_model("fusion"), yolo_dets, rnn_dets)
         else:
             detections = yolo_dets
         layer_name = "Spatio-Temporal Fusion"
@@ -329,13 +665,14 @@ async def run_single_layer(layer_num: int, file: UploadFile = File(...)):
         "layer_name": layer_name,
         "latency_ms": round((time.time() - start_time) * 1000, 2),
         "count": len(detections),
-        "detections": detections
+        "detections": detections.to_dicts()
     }
 
 # ✅ UPDATED: Saves to MongoDB (optional)
 @app.post("/astroops/log")
 async def log_event(log: LogRequest):
-    print(f"⚠️ [FALCON TRIGGER] Saving to MongoDB: {log.object_class} ({log.confidence})")
+    logger.warning("⚠️ [FALCON TRIGGER] Saving to MongoDB: %s (%s)", log.object_class, log.confidence)
+    falcon_triggers.inc("astroops_log")
     
     log_dict = log.dict()
     log_dict["status"] = "PENDING_RETRAIN"
@@ -384,7 +721,8 @@ _last_image_bytes = None
 @app.post("/chat/safety")
 async def chat_safety_query(
     file: UploadFile = File(...),
-    query: str = Form(default="Is this area safe?")
+    query: str = Form(default="Is this area safe?"),
+    camera_id: str = Form(default="default")
 ):
     """
     Natural language safety query with image analysis
@@ -401,21 +739,24 @@ async def chat_safety_query(
     img_np = np.array(image)
     
     # Run detection first
-    results_accuracy = model_accuracy(img_np, conf=0.25)
-    yolo_detections = yolo_results_to_detections(results_accuracy, model_accuracy.names)
+    batched = await run_yolo(img_np, conf=0.25, models=["accuracy"])
+    yolo_detections = yolo_results_to_batch(batched.results["accuracy"])
     
     # Apply RNN temporal
+    rnn_model = await get_model("rnn")
     if rnn_model:
-        rnn_detections = rnn_model.process_detections(yolo_detections)
-        fused_detections = fusion_model.fuse_detections(yolo_detections, rnn_detections)
+        rnn_detections = run_temporal(rnn_model, yolo_detections.copy(), camera_id)
+        fusion_model = await get_model("fusion")
+        fused_detections = run_fusion(fusion_model, yolo_detections, rnn_detections).to_dicts()
     else:
-        fused_detections = yolo_detections
+        fused_detections = yolo_detections.to_dicts()
     
     _last_detections = fused_detections
     
     # Query VLM
     vlm = get_vlm_chat()
-    analysis = await vlm.analyze_safety(image_bytes, query, fused_detections)
+    with model_seconds.time("vlm"):
+        analysis = await vlm.analyze_safety(image_bytes, query, fused_detections)
     
     total_time = time.time() - start_time
     
@@ -574,9 +915,9 @@ if MONGO_AVAILABLE and db is not None:
     falcon_triggers_collection = db["falcon_triggers"]
     synthetic_images_collection = db["synthetic_images"]
     edge_cases_collection = db["edge_cases"]
-    print("🦅 Falcon-Link MongoDB collections initialized")
+    logger.info("🦅 Falcon-Link MongoDB collections initialized")
 else:
-    print("🦅 Falcon-Link running in memory mode (MongoDB not available)")
+    logger.info("🦅 Falcon-Link running in memory mode (MongoDB not available)")
 
 
 class FalconTriggerRequest(BaseModel):
@@ -637,6 +978,7 @@ async def falcon_status():
 async def falcon_trigger(request: FalconTriggerRequest):
     """Log a Falcon trigger event"""
     global _falcon_triggers
+    falcon_triggers.inc("falcon_trigger")
     
     trigger_data = {
         "object_class": request.object_class,
@@ -784,7 +1126,7 @@ async def generate_real_synthetic_images(request: SyntheticGenerateRequest):
     object_class = request.object_class
     count = min(request.count, 10)  # Limit to 10 for API rate limiting
     
-    # Use the global falcon_generator initialized at startup
+    falcon_generator = await get_model("falcon_generator")
     # Generate images
     variations = ["low_light", "high_glare", "partial_occlusion", "motion_blur", "fog", "rain"]
     results = await falcon_generator.generate_batch(object_class, count, variations)
@@ -908,6 +1250,7 @@ async def run_healing_pipeline(request: HealingRequest):
     4. Return status updates with training image previews
     """
     import asyncio
+    falcon_duality = await get_model("falcon_duality")
     
     object_class = request.object_class
     
@@ -967,7 +1310,8 @@ async def run_healing_pipeline(request: HealingRequest):
 @app.get("/falcon/duality/stats")
 async def get_duality_stats():
     """Get statistics about the training dataset"""
-    print(f"\n🦅 Falcon Duality AI - Getting dataset statistics...")
+    falcon_duality = await get_model("falcon_duality")
+    logger.info("🦅 Falcon Duality AI - Getting dataset statistics...")
     stats = falcon_duality.get_statistics()
     return stats
 
@@ -986,12 +1330,12 @@ async def augment_training_data(
     2. Creates multiple augmented versions (rotation, brightness, etc.)
     3. Returns augmentation results for retraining
     """
-    print(f"\n{'='*60}")
-    print(f"🦅 FALCON DUALITY AI - AUGMENTATION REQUEST")
-    print(f"📦 Class: {object_class}")
-    print(f"🔢 Samples: {num_samples}")
-    print(f"🎲 Random: {random_select}")
-    print(f"{'='*60}")
+    falcon_duality = await get_model("falcon_duality")
+    logger.info(
+        "🦅 Falcon Duality AI - augmentation request: %s",
+        object_class,
+        extra={"samples": num_samples, "random": random_select}
+    )
     
     # Validate class
     if object_class not in falcon_duality.CLASS_TO_ID:
@@ -1036,6 +1380,7 @@ async def augment_training_data(
 @app.get("/falcon/duality/images/{class_name}")
 async def get_augmented_images(class_name: str, limit: int = 10):
     """Get augmented images for a class as base64"""
+    falcon_duality = await get_model("falcon_duality")
     if class_name not in falcon_duality.CLASS_TO_ID:
         available = list(falcon_duality.CLASS_TO_ID.keys())
         raise HTTPException(
@@ -1055,6 +1400,7 @@ async def get_augmented_images(class_name: str, limit: int = 10):
 @app.delete("/falcon/duality/cleanup")
 async def cleanup_augmented_images(class_name: Optional[str] = None):
     """Clean up generated augmented images"""
+    falcon_duality = await get_model("falcon_duality")
     falcon_duality.cleanup_generated(class_name)
     
     return {
@@ -1074,10 +1420,8 @@ async def duality_healing_pipeline(
     2. Create augmented versions
     3. Queue for retraining
     """
-    print(f"\n{'='*60}")
-    print(f"🦅 FALCON DUALITY AI - HEALING PIPELINE")
-    print(f"📦 Target Class: {object_class}")
-    print(f"{'='*60}")
+    falcon_duality = await get_model("falcon_duality")
+    logger.info("🦅 Falcon Duality AI - healing pipeline: %s", object_class)
     
     if object_class not in falcon_duality.CLASS_TO_ID:
         available = list(falcon_duality.CLASS_TO_ID.keys())
@@ -1114,10 +1458,11 @@ async def duality_healing_pipeline(
     # Get preview images
     preview = falcon_duality.get_augmented_images_base64(object_class, limit=3)
     
-    print(f"\n✅ FALCON DUALITY HEALING COMPLETE")
-    print(f"   📊 Augmented: {result['augmented_count']} images")
-    print(f"   💾 Size: {result['total_size_kb']} KB")
-    print(f"{'='*60}\n")
+    logger.info(
+        "✅ Falcon Duality healing complete: %s",
+        object_class,
+        extra={"augmented": result["augmented_count"], "size_kb": result["total_size_kb"]}
+    )
     
     return {
         "status": "healing_complete",
@@ -1134,6 +1479,139 @@ async def duality_healing_pipeline(
 
 
 # ===== VIDEO DETECTION ENDPOINT =====
+VIDEO_SPOOL_CHUNK_BYTES = 1 << 20  # Uploads are copied to disk 1 MB at a time
+VIDEO_SAMPLE_FPS = 5  # Frames analysed per second of video
+
+
+async def spool_upload(file: UploadFile, suffix: str = '.mp4') -> str:
+    """Copy an upload to a temp file in fixed-size chunks (never held in memory whole)"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        while True:
+            chunk = await file.read(VIDEO_SPOOL_CHUNK_BYTES)
+            if not chunk:
+                break
+            tmp.write(chunk)
+        return tmp.name
+
+
+def open_video(path: str):
+    import cv2
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        cap.release()
+        raise HTTPException(status_code=400, detail="Could not open video file")
+    return cap
+
+
+async def iter_video_frames(cap, path: str, total_frames: int, sample_interval: int):
+    """
+    Per-frame Layer 1 results in frame order: segments in worker processes
+    for long videos when VIDEO_WORKERS > 1, otherwise the in-process
+    decode/infer/postprocess pipeline. Frames the motion gate skips carry
+    the previous detections with "inference_skipped": true.
+    """
+    if segment_processor is not None and total_frames >= 2 * VIDEO_SEGMENT_MIN_FRAMES:
+        async for frame_result in segment_processor.run(path, total_frames, sample_interval, conf=0.3):
+            yield frame_result
+        return
+    
+    # Numpy frames are read as BGR by YOLO
+    pipeline = VideoPipeline(
+        detect=lambda frame: run_layer1(frame, conf=0.3),
+        decode_queue_size=VIDEO_DECODE_QUEUE_SIZE,
+        max_inflight=VIDEO_MAX_INFLIGHT
+    )
+    async for frame_idx, batched, latency, inferred in pipeline.run(cap, sample_interval, gate=new_motion_gate()):
+        # Accuracy results only when the scheduler ran it
+        yield {
+            "frame": frame_idx,
+            "detections": results_to_frame_detections(batched.results),
+            "latency_ms": round(latency, 2),
+            "accuracy_model_used": "accuracy" in batched.results,
+            "inference_skipped": not inferred
+        }
+
+
+async def iter_video_results(cap, path: str):
+    """
+    Run Layer 1 on the sampled frames of an open video, yielding events as
+    they are produced: one "video_info", one "frame" per sampled frame, then
+    a "summary". Only running totals are kept, so memory does not grow with
+    video length.
+    """
+    import cv2
+    
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    sample_interval = int(fps / VIDEO_SAMPLE_FPS) if fps >= VIDEO_SAMPLE_FPS else 1  # Sample at ~5 FPS
+    
+    logger.info(
+        "📊 Video Info: %d total frames @ %.1f FPS, sampling every %d frames (~%s FPS analysis)",
+        total_frames, fps, sample_interval, VIDEO_SAMPLE_FPS
+    )
+    frame_log = SampledLogger(logger, LOG_SAMPLE_EVERY)
+    
+    yield {
+        "type": "video_info",
+        "total_frames": total_frames,
+        "fps": fps,
+        "sample_interval": sample_interval
+    }
+    
+    total_latency = 0
+    total_objects = 0
+    confidence_sum = 0.0
+    class_counts = {}
+    falcon_triggered = False
+    processed_count = 0
+    skipped_count = 0
+    
+    async for frame_result in iter_video_frames(cap, path, total_frames, sample_interval):
+        frame_detections = frame_result["detections"]
+        latency = frame_result["latency_ms"]
+        
+        total_latency += latency
+        processed_count += 1
+        skipped_count += frame_result["inference_skipped"]
+        total_objects += len(frame_detections)
+        for d in frame_detections:
+            class_counts[d["class"]] = class_counts.get(d["class"], 0) + 1
+            confidence_sum += d["confidence"]
+        
+        # Log frame processing (sampled; the class list is only built when logged)
+        if frame_log.sample():
+            logger.info(
+                "🎞️  Frame %4d | %2d objects | %6.1fms | Classes: %s%s",
+                frame_result["frame"], len(frame_detections), latency,
+                sorted(set(d["class"] for d in frame_detections)),
+                " (reused)" if frame_result["inference_skipped"] else ""
+            )
+        
+        # Check for low confidence (falcon trigger)
+        if any(d["confidence"] < 0.5 for d in frame_detections):
+            falcon_triggered = True
+            falcon_triggers.inc("video")
+        
+        yield {"type": "frame", **frame_result}
+    
+    yield {
+        "type": "summary",
+        "total_frames": total_frames,
+        "processed_frames": processed_count,
+        "total_objects": total_objects,
+        "unique_classes": class_counts,
+        "avg_latency_ms": round(total_latency / max(processed_count, 1), 2),
+        "avg_confidence": round(confidence_sum / total_objects, 4) if total_objects else 0,
+        "falcon_triggered": falcon_triggered,
+        "motion_gate": {
+            "enabled": MOTION_GATE_ENABLED,
+            "inferred_frames": processed_count - skipped_count,
+            "skipped_frames": skipped_count,
+            "skip_ratio": round(skipped_count / max(processed_count, 1), 3)
+        }
+    }
+
+
 @app.post("/detect/video")
 async def detect_video(file: UploadFile = File(...)):
     """
@@ -1141,236 +1619,299 @@ async def detect_video(file: UploadFile = File(...)):
     - YOLO speed + accuracy models
     - RNN temporal analysis
     - Spatio-temporal fusion
-    """
-    import cv2
     
-    print(f"\n{'='*60}")
-    print(f"🎬 VIDEO DETECTION STARTED")
-    print(f"📁 File: {file.filename}")
-    print(f"{'='*60}")
+    Returns everything at the end; see /detect/video/stream for incremental results.
+    """
+    logger.info("🎬 Video detection started: %s", file.filename)
     
     # Save uploaded video to temp file
     temp_path = None
+    cap = None
     try:
-        contents = await file.read()
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-            tmp.write(contents)
-            temp_path = tmp.name
-        
-        cap = cv2.VideoCapture(temp_path)
-        if not cap.isOpened():
-            raise HTTPException(status_code=400, detail="Could not open video file")
-        
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        sample_interval = int(fps / 5) if fps >= 5 else 1  # Sample at ~5 FPS
-        
-        print(f"📊 Video Info: {total_frames} total frames @ {fps:.1f} FPS")
-        print(f"⚙️  Sampling every {sample_interval} frames (~5 FPS analysis)")
-        print(f"{'─'*60}")
+        temp_path = await spool_upload(file)
+        cap = open_video(temp_path)
         
+        video_info = {}
         frames_results = []
-        frame_idx = 0
-        total_latency = 0
-        all_detections = []
-        falcon_triggered = False
-        processed_count = 0
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Only process every nth frame
-            if frame_idx % sample_interval == 0:
-                start_time = time.time()
-                
-                # Convert BGR to RGB
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(rgb_frame)
-                
-                # Run YOLO detection
-                results_speed = model_speed(pil_image, conf=0.3, verbose=False)
-                results_accuracy = model_accuracy(pil_image, conf=0.3, verbose=False)
-                
-                # Process detections
-                frame_detections = []
-                for r in results_speed[0].boxes:
-                    bbox = r.xyxy[0].tolist()
-                    conf = float(r.conf[0])
-                    cls = int(r.cls[0])
-                    frame_detections.append({
-                        "bbox": bbox,
-                        "confidence": conf,
-                        "class": results_speed[0].names[cls],
-                        "source": "speed"
-                    })
-                
-                for r in results_accuracy[0].boxes:
-                    bbox = r.xyxy[0].tolist()
-                    conf = float(r.conf[0])
-                    cls = int(r.cls[0])
-                    frame_detections.append({
-                        "bbox": bbox,
-                        "confidence": conf,
-                        "class": results_accuracy[0].names[cls],
-                        "source": "accuracy"
-                    })
-                
-                latency = (time.time() - start_time) * 1000
-                total_latency += latency
-                all_detections.extend(frame_detections)
-                processed_count += 1
-                
-                # Log frame processing
-                det_classes = [d["class"] for d in frame_detections]
-                unique_classes = list(set(det_classes))
-                print(f"🎞️  Frame {frame_idx:4d} | {len(frame_detections):2d} objects | {latency:6.1f}ms | Classes: {unique_classes}")
-                
-                # Check for low confidence (falcon trigger)
-                if any(d["confidence"] < 0.5 for d in frame_detections):
-                    falcon_triggered = True
-                
-                frames_results.append({
-                    "frame": frame_idx,
-                    "detections": frame_detections,
-                    "latency_ms": round(latency, 2)
-                })
-            
-            frame_idx += 1
-        
-        cap.release()
+        summary = {}
+        async for event in iter_video_results(cap, temp_path):
+            event_type = event.pop("type")
+            if event_type == "frame":
+                frames_results.append(event)
+            elif event_type == "video_info":
+                video_info = event
+            else:
+                summary = event
         
         # Summary logging
-        print(f"{'─'*60}")
-        print(f"✅ VIDEO PROCESSING COMPLETE")
-        print(f"📊 Processed {processed_count} frames out of {total_frames}")
-        
-        # Calculate summary stats
-        processed_frames = len(frames_results)
-        avg_latency = total_latency / max(processed_frames, 1)
-        
-        # Get unique class counts
-        class_counts = {}
-        for d in all_detections:
-            cls = d["class"]
-            class_counts[cls] = class_counts.get(cls, 0) + 1
-        
-        avg_conf = np.mean([d["confidence"] for d in all_detections]) if all_detections else 0
-        
-        # Final summary
-        print(f"📦 Total detections: {len(all_detections)}")
-        print(f"📊 Class breakdown: {class_counts}")
-        print(f"⚡ Average latency: {avg_latency:.1f}ms per frame")
-        print(f"🎯 Average confidence: {avg_conf:.2%}")
-        print(f"🦅 Falcon triggered: {falcon_triggered}")
-        print(f"{'='*60}\n")
+        logger.info(
+            "✅ Video processing complete: %d of %d frames, %d detections, %.1fms per frame",
+            summary["processed_frames"], summary["total_frames"], summary["total_objects"], summary["avg_latency_ms"],
+            extra={
+                "classes": summary["unique_classes"],
+                "avg_confidence": summary["avg_confidence"],
+                "falcon_triggered": summary["falcon_triggered"],
+                "motion_skip_ratio": summary["motion_gate"]["skip_ratio"]
+            }
+        )
         
         return {
             "success": True,
             "video_info": {
-                "total_frames": total_frames,
-                "fps": fps,
-                "processed_frames": processed_frames
+                "total_frames": video_info["total_frames"],
+                "fps": video_info["fps"],
+                "processed_frames": summary["processed_frames"]
             },
             "frames": frames_results,
-            "total_objects": len(all_detections),
-            "unique_classes": class_counts,
-            "avg_latency_ms": round(avg_latency, 2),
-            "avg_confidence": round(float(avg_conf), 4),
-            "falcon_triggered": falcon_triggered
+            "total_objects": summary["total_objects"],
+            "unique_classes": summary["unique_classes"],
+            "avg_latency_ms": summary["avg_latency_ms"],
+            "avg_confidence": summary["avg_confidence"],
+            "falcon_triggered": summary["falcon_triggered"],
+            "motion_gate": summary["motion_gate"]
         }
         
     except Exception as e:
-        print(f"❌ VIDEO PROCESSING ERROR: {str(e)}")
+        logger.exception("❌ Video processing error: %s", e)
         raise HTTPException(status_code=500, detail=f"Video processing failed: {str(e)}")
     finally:
+        if cap is not None:
+            cap.release()
         if temp_path and os.path.exists(temp_path):
             os.unlink(temp_path)
 
 
+@app.post("/detect/video/stream")
+async def detect_video_stream(file: UploadFile = File(...), format: str = "ndjson"):
+    """
+    Streaming variant of /detect/video: per-frame results are sent as soon as
+    they are produced, as NDJSON lines (format=ndjson) or Server-Sent Events
+    (format=sse). Events: video_info, frame (one per sampled frame), summary,
+    and error if processing fails midway.
+    """
+    import json
+    from fastapi.responses import StreamingResponse
+    
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}. Use 'ndjson' or 'sse'")
+    
+    logger.info("🎬 Streaming video detection: %s", file.filename)
+    temp_path = await spool_upload(file)
+    try:
+        cap = open_video(temp_path)
+    except HTTPException:
+        os.unlink(temp_path)
+        raise
+    
+    def encode(event):
+        if format == "sse":
+            return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        return json.dumps(event) + "\n"
+    
+    async def events():
+        try:
+            async for event in iter_video_results(cap, temp_path):
+                yield encode(event)
+        except Exception as e:
+            logger.exception("❌ Video processing error: %s", e)
+            yield encode({"type": "error", "detail": f"Video processing failed: {str(e)}"})
+        finally:
+            cap.release()
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
+
 # ===== WEBCAM WEBSOCKET ENDPOINT =====
+frame_errors = SampledLogger(logger, LOG_SAMPLE_EVERY)  # Undecodable frames, across all clients
+
+
+def decode_json_frame(data: str):
+    """JSON protocol: {"type": "frame", "data": "<base64 JPEG, optionally a data URL>"} -> PIL image"""
+    import json
+    try:
+        msg = json.loads(data)
+    except:
+        return None
+    
+    if msg.get("type") != "frame" or not msg.get("data"):
+        return None
+    
+    # Decode base64 image
+    try:
+        # Remove data URL prefix if present
+        img_data = msg["data"]
+        if "," in img_data:
+            img_data = img_data.split(",")[1]
+        
+        img_bytes = base64.b64decode(img_data)
+        return Image.open(io.BytesIO(img_bytes)).convert("RGB")
+    except Exception as e:
+        frame_errors.warning("❌ Failed to decode frame: %s", e)
+        return None
+
+
 @app.websocket("/ws/webcam")
 async def websocket_webcam(websocket: WebSocket):
     """
     WebSocket endpoint for real-time webcam detection.
-    Receives base64 JPEG frames, runs 3-layer detection, returns results.
+    Runs the speed model on each frame and returns its detections.
+    Optional ?camera_id=... query parameter identifies the stream.
+    
+    Two protocols share the socket, chosen per message:
+    - Text: JSON {"type": "frame", "data": "<base64 JPEG>"}, answered with JSON
+    - Binary: core/frame_protocol.py header + JPEG/raw RGB/raw BGR bytes,
+      answered with a packed detection message. Class names are sent once,
+      as a JSON {"type": "classes"} message, before the first binary reply.
+    
+    Frames are received while the previous one is processed; beyond
+    STREAM_MAX_PENDING_FRAMES the STREAM_DROP_POLICY decides which is dropped.
+    Received/processed/dropped counts and end-to-end latency are reported in
+    each JSON reply ("stream") and every STREAM_STATS_EVERY binary replies.
+    
+    With MOTION_GATE_ENABLED, frames that barely differ from the camera's last
+    inferred frame reuse its detections ("inference_skipped" in JSON replies,
+    the reused flag in binary ones); the skip ratio is reported as "motion".
     """
+    import json
     await websocket.accept()
-    print("📹 WebSocket client connected")
+    websocket_connections.inc()
+    camera_id = websocket.query_params.get("camera_id", "default")
+    logger.info("📹 WebSocket client connected (camera: %s)", camera_id)
     
     frame_count = 0
     start_time = time.time()
+    decoder = FrameDecoder()  # Reuses its pixel buffer across this client's frames
+    classes_sent = False
+    gates = {}  # camera_id -> MotionGate (None when disabled)
+    last_results = {}  # camera_id -> last inferred speed model results
+    
+    # Keep receiving while a frame is processed; stale frames are dropped
+    ingest = FrameIngest(max_pending=STREAM_MAX_PENDING_FRAMES, drop_policy=STREAM_DROP_POLICY)
+    
+    async def receive_frame():
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return None
+        return message
+    
+    receiver = asyncio.create_task(ingest.pump(receive_frame))
     
     try:
         while True:
-            # Receive frame data
-            data = await websocket.receive_text()
-            msg = None
-            try:
-                import json
-                msg = json.loads(data)
-            except:
-                continue
-            
-            if msg.get("type") != "frame" or not msg.get("data"):
-                continue
+            item = await ingest.get()
+            if item is None:
+                raise WebSocketDisconnect()
+            message, received_at = item
             
             frame_start = time.time()
+            binary = message.get("bytes") is not None
             
-            # Decode base64 image
-            try:
-                # Remove data URL prefix if present
-                img_data = msg["data"]
-                if "," in img_data:
-                    img_data = img_data.split(",")[1]
-                
-                img_bytes = base64.b64decode(img_data)
-                pil_image = Image.open(io.BytesIO(img_bytes)).convert("RGB")
-            except Exception as e:
-                print(f"❌ Failed to decode frame: {e}")
-                continue
+            if binary:
+                try:
+                    header, image = decoder.decode(message["bytes"])
+                except FrameProtocolError as e:
+                    frame_errors.warning("❌ Failed to decode frame: %s", e)
+                    continue
+                camera_id = header.camera_id or camera_id
+            else:
+                image = decode_json_frame(message.get("text") or "")
+                if image is None:
+                    continue
             
-            # Run YOLO detection (speed model for real-time)
-            results = model_speed(pil_image, conf=0.3, verbose=False)
+            if camera_id not in gates:
+                gates[camera_id] = new_motion_gate()
+            gate = gates[camera_id]
+            inferred = True
+            if gate is not None:
+                inferred, _ = gate.check(image)
             
-            # Process detections
-            detections = []
-            for r in results[0].boxes:
-                bbox = r.xyxy[0].tolist()
-                conf = float(r.conf[0])
-                cls = int(r.cls[0])
-                detections.append({
-                    "bbox": bbox,
-                    "confidence": conf,
-                    "class": results[0].names[cls]
-                })
+            # Run YOLO detection (speed model for real-time) unless the frame is static
+            if inferred or camera_id not in last_results:
+                layer1_start = time.perf_counter()
+                try:
+                    batched = await inference_service.infer(image, conf=0.3, models=["speed"])
+                except InferenceQueueFull:
+                    ingest.mark_dropped()  # Drop the frame when the service is saturated
+                    if gate is not None:
+                        gate.reset()
+                    continue
+                layer_seconds.observe(time.perf_counter() - layer1_start, "layer1_yolo")
+                last_results[camera_id] = batched.results["speed"]
+            results = last_results[camera_id]
+            motion = gate.get_stats() if gate is not None else None
             
             # Calculate FPS
             frame_count += 1
             elapsed = time.time() - start_time
             fps = frame_count / max(elapsed, 0.001)
             
+            if binary:
+                xyxy, confidences, class_ids, _ = boxes_to_arrays(results[0].boxes)
+                falcon_trigger = bool((confidences < 0.5).any())
+                if falcon_trigger:
+                    falcon_triggers.inc("webcam")
+                if not classes_sent:
+                    await websocket.send_json({"type": "classes", "classes": results[0].names})
+                    classes_sent = True
+                
+                latency = (time.time() - frame_start) * 1000
+                ingest.mark_processed(received_at)
+                await websocket.send_bytes(encode_detections(
+                    header.frame_id,
+                    xyxy,
+                    confidences,
+                    class_ids,
+                    latency_ms=latency,
+                    fps=fps,
+                    falcon_trigger=falcon_trigger,
+                    reused=not inferred
+                ))
+                if STREAM_STATS_EVERY > 0 and ingest.processed % STREAM_STATS_EVERY == 0:
+                    await websocket.send_json({
+                        "type": "stream_stats", "camera_id": camera_id, **ingest.get_stats(), "motion": motion
+                    })
+                continue
+            
+            # Process detections
+            names = results[0].names
+            bboxes, confidences, class_ids, _ = boxes_to_lists(results[0].boxes)
+            detections = [
+                {"bbox": bbox, "confidence": conf, "class": names[cls]}
+                for bbox, conf, cls in zip(bboxes, confidences, class_ids)
+            ]
+            
             latency = (time.time() - frame_start) * 1000
+            ingest.mark_processed(received_at)
             
             # Check for falcon trigger (low confidence)
             falcon_trigger = any(d["confidence"] < 0.5 for d in detections)
+            if falcon_trigger:
+                falcon_triggers.inc("webcam")
             
             # Send response
-            import json
             response = {
                 "type": "detection",
+                "camera_id": camera_id,
                 "detections": detections,
                 "latency_ms": round(latency, 2),
                 "fps": round(fps, 1),
-                "falcon_trigger": falcon_trigger
+                "falcon_trigger": falcon_trigger,
+                "inference_skipped": not inferred,
+                "stream": ingest.get_stats(),
+                "motion": motion
             }
             await websocket.send_text(json.dumps(response))
             
     except WebSocketDisconnect:
-        print("📹 WebSocket client disconnected")
+        logger.info("📹 WebSocket client disconnected (processed %d, dropped %d)", ingest.processed, ingest.dropped)
     except Exception as e:
-        print(f"❌ WebSocket error: {e}")
+        logger.exception("❌ WebSocket error: %s", e)
+    finally:
+        receiver.cancel()
+        websocket_connections.dec()
 
 
 if __name__ == "__main__":
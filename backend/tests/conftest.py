@@ -0,0 +1,6 @@
+"""Tests import the backend the way main.py does (core.X)"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
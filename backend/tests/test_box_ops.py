@@ -0,0 +1,131 @@
+"""Vectorized box ops against the per-pair loops they replaced"""
+
+import numpy as np
+import pytest
+
+from core import box_ops
+from core.box_ops import as_boxes, batched_nms, best_match_indices, greedy_match, iou_matrix, nms
+
+
+# Reference implementations (the fusion loops before vectorization)
+
+def py_iou(box1, box2):
+    x1 = max(box1[0], box2[0])
+    y1 = max(box1[1], box2[1])
+    x2 = min(box1[2], box2[2])
+    y2 = min(box1[3], box2[3])
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+    area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
+    area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
+    union = area1 + area2 - intersection
+    return intersection / union if union > 0 else 0
+
+
+def py_nms(boxes, scores, iou_threshold):
+    dets = sorted(range(len(boxes)), key=lambda i: scores[i], reverse=True)
+    keep = []
+    while dets:
+        best = dets.pop(0)
+        keep.append(best)
+        dets = [d for d in dets if py_iou(boxes[best], boxes[d]) < iou_threshold]
+    return keep
+
+
+def py_batched_nms(boxes, scores, class_ids, iou_threshold):
+    keep = []
+    for cls in sorted(set(class_ids)):
+        idx = [i for i, c in enumerate(class_ids) if c == cls]
+        kept = py_nms([boxes[i] for i in idx], [scores[i] for i in idx], iou_threshold)
+        keep.extend(idx[k] for k in kept)
+    return keep
+
+
+def py_greedy_match(boxes_a, boxes_b, iou_threshold):
+    matched = set()
+    matches = []
+    for i, a in enumerate(boxes_a):
+        best_iou, best_idx = 0, -1
+        for j, b in enumerate(boxes_b):
+            if j in matched:
+                continue
+            iou = py_iou(a, b)
+            if iou > best_iou and iou > iou_threshold:
+                best_iou, best_idx = iou, j
+        if best_idx >= 0:
+            matched.add(best_idx)
+            matches.append((i, best_idx))
+    return matches
+
+
+def make_boxes(n, seed, image_size=640, num_classes=7):
+    """Clustered boxes so that NMS and matching have overlaps to resolve"""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0, image_size, size=(max(1, n // 4), 2))
+    picks = centers[rng.integers(0, len(centers), size=n)] + rng.normal(0, 12, size=(n, 2))
+    wh = rng.uniform(30, 120, size=(n, 2))
+    boxes = np.hstack([picks - wh / 2, picks + wh / 2])
+    return boxes, rng.uniform(0.25, 0.99, size=n), rng.integers(0, num_classes, size=n)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_iou_matrix_matches_pairwise_loop(seed):
+    a, _, _ = make_boxes(20, seed)
+    b, _, _ = make_boxes(15, seed + 100)
+    expected = [[py_iou(x, y) for y in b.tolist()] for x in a.tolist()]
+    np.testing.assert_allclose(iou_matrix(a, b), expected, rtol=1e-12, atol=1e-12)
+
+
+def test_iou_matrix_edge_cases():
+    assert iou_matrix([], [[0, 0, 1, 1]]).shape == (0, 1)
+    assert iou_matrix([[0, 0, 1, 1]], np.zeros((0, 4))).shape == (1, 0)
+    # Degenerate boxes have an empty union: IoU 0, not NaN
+    assert iou_matrix([[1, 1, 1, 1]], [[1, 1, 1, 1]])[0, 0] == 0
+    assert iou_matrix([[0, 0, 2, 2]], [[1, 1, 3, 3]])[0, 0] == pytest.approx(1 / 7)
+    assert as_boxes([1, 2, 3, 4]).shape == (1, 4)
+
+
+@pytest.mark.parametrize("n,seed", [(1, 0), (10, 1), (60, 2), (200, 3)])
+def test_nms_matches_loop(n, seed):
+    boxes, scores, _ = make_boxes(n, seed)
+    assert nms(boxes, scores, 0.45).tolist() == py_nms(boxes.tolist(), scores.tolist(), 0.45)
+
+
+def test_nms_large_sets_use_rowwise_path(monkeypatch):
+    boxes, scores, _ = make_boxes(300, 7)
+    dense = nms(boxes, scores, 0.5).tolist()
+    monkeypatch.setattr(box_ops, "DENSE_NMS_MAX_BOXES", 10)
+    assert nms(boxes, scores, 0.5).tolist() == dense == py_nms(boxes.tolist(), scores.tolist(), 0.5)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_batched_nms_matches_per_class_loop(seed):
+    boxes, scores, class_ids = make_boxes(120, seed)
+    keep = batched_nms(boxes, scores, class_ids, 0.45)
+    expected = py_batched_nms(boxes.tolist(), scores.tolist(), class_ids.tolist(), 0.45)
+    # The loop groups by class; the single pass orders by score
+    assert sorted(keep.tolist()) == sorted(expected)
+    assert np.all(np.diff(scores[keep]) <= 0)
+
+
+def test_batched_nms_never_suppresses_across_classes():
+    boxes = [[0, 0, 10, 10], [0, 0, 10, 10]]
+    assert sorted(batched_nms(boxes, [0.9, 0.8], [0, 1]).tolist()) == [0, 1]
+    assert batched_nms(boxes, [0.9, 0.8], [1, 1]).tolist() == [0]
+    assert batched_nms([], [], []).tolist() == []
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_greedy_match_matches_loop(seed):
+    a, _, _ = make_boxes(25, seed)
+    b = a[np.random.default_rng(seed).permutation(len(a))] + np.random.default_rng(seed).normal(0, 6, size=a.shape)
+    matches = greedy_match(iou_matrix(a, b), 0.5)
+    assert [(row, col) for row, col, _ in matches] == py_greedy_match(a.tolist(), b.tolist(), 0.5)
+    for row, col, iou in matches:
+        assert iou == pytest.approx(py_iou(a[row].tolist(), b[col].tolist()))
+
+
+def test_best_match_indices():
+    a = [[0, 0, 10, 10], [100, 100, 110, 110], [50, 50, 60, 60]]
+    b = [[49, 49, 60, 60], [1, 1, 10, 10]]
+    assert best_match_indices(a, b, default=-1).tolist() == [1, -1, 0]
+    assert best_match_indices(a, [], default=-1).tolist() == [-1, -1, -1]
@@ -0,0 +1,98 @@
+"""Cascade escalation policy and speed/accuracy scheduling modes"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from core.cascade_scheduler import CascadePolicy, CascadeScheduler
+from core.inference_service import InferenceService
+
+
+class _Tensor:
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class _Boxes:
+    def __init__(self, confidences):
+        self.conf = _Tensor(confidences)
+
+    def __len__(self):
+        return len(self.conf.values)
+
+
+class _Result:
+    def __init__(self, confidences):
+        self.boxes = _Boxes(confidences)
+
+
+class FakeModel:
+    """Every frame gets the same detections"""
+
+    def __init__(self, confidences):
+        self.confidences = confidences
+        self.frames = 0
+
+    def __call__(self, images, conf, verbose=False):
+        self.frames += len(images)
+        return [_Result(self.confidences) for _ in images]
+
+
+@pytest.mark.parametrize("confidences,expected", [
+    ([], (True, "too_few_detections")),
+    ([0.9] * 21, (True, "crowded_frame")),
+    ([0.9, 0.2, 0.3], (True, "low_confidence")),
+    ([0.9, 0.8, 0.7, 0.2], (False, "confident")),
+])
+def test_policy(confidences, expected):
+    assert CascadePolicy().should_escalate(np.asarray(confidences)) == expected
+
+
+def run(mode, speed_confidences):
+    speed, accuracy = FakeModel(speed_confidences), FakeModel([0.9])
+
+    async def scenario():
+        service = InferenceService({"speed": speed, "accuracy": accuracy}, batch_window_ms=0)
+        scheduler = CascadeScheduler(service, mode=mode)
+        try:
+            result = await scheduler.detect(np.zeros((4, 4, 3)))
+        finally:
+            await service.stop()
+        return result, scheduler.get_stats()
+
+    result, stats = asyncio.run(scenario())
+    return result, stats, speed, accuracy
+
+
+def test_cascade_skips_accuracy_on_confident_frames():
+    result, stats, speed, accuracy = run("cascade", [0.9, 0.95])
+    assert not result.escalated and result.reason == "confident"
+    assert set(result.results) == {"speed"}
+    assert (speed.frames, accuracy.frames) == (1, 0)
+    assert stats["escalation_rate"] == 0.0
+
+
+def test_cascade_escalates_uncertain_frames():
+    result, stats, speed, accuracy = run("cascade", [0.3])
+    assert result.escalated and result.reason == "low_confidence"
+    assert set(result.results) == {"speed", "accuracy"}
+    assert (speed.frames, accuracy.frames) == (1, 1)
+    assert stats["escalations"] == 1
+
+
+def test_parallel_runs_both_models():
+    result, _, speed, accuracy = run("parallel", [0.9])
+    assert set(result.results) == {"speed", "accuracy"}
+    assert (speed.frames, accuracy.frames) == (1, 1)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        CascadeScheduler(InferenceService({}), mode="serial")
@@ -0,0 +1,144 @@
+"""Column-wise YOLO detection extraction against the per-box loop"""
+
+import numpy as np
+import pytest
+import torch
+from ultralytics.engine.results import Boxes, Results
+
+from core.detections import DetectionBatch, boxes_to_arrays, boxes_to_lists, normalize_boxes
+
+NAMES = {0: "OxygenTank", 1: "NitrogenTank", 6: "FireExtinguisher"}
+
+
+def make_data(n, tracked=False, seed=0):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 500, size=(n, 2))
+    columns = [xy, xy + rng.uniform(10, 100, size=(n, 2))]
+    if tracked:
+        columns.append(np.arange(1, n + 1)[:, None])
+    columns += [rng.uniform(0.25, 1.0, size=(n, 1)), rng.choice(list(NAMES), size=(n, 1))]
+    return torch.tensor(np.hstack(columns), dtype=torch.float32)
+
+
+def per_box(boxes):
+    """How detections were read before: indexing the tensors box by box"""
+    rows = []
+    for box in boxes:
+        rows.append((
+            box.xyxy[0].tolist(),
+            float(box.conf[0]),
+            int(box.cls[0]),
+            int(box.id[0]) if box.is_track else None
+        ))
+    return rows
+
+
+@pytest.mark.parametrize("tracked", [False, True])
+def test_columns_match_per_box_loop(tracked):
+    boxes = Boxes(make_data(25, tracked), (640, 640))
+    xyxy, confidences, class_ids, track_ids = boxes_to_lists(boxes)
+
+    expected = per_box(boxes)
+    assert len(xyxy) == len(expected)
+    for row, (bbox, conf, cls, track) in enumerate(expected):
+        assert xyxy[row] == pytest.approx(bbox)
+        assert confidences[row] == pytest.approx(conf)
+        assert class_ids[row] == cls
+        assert (track_ids[row] if tracked else track_ids) == track
+
+
+def test_empty_boxes():
+    xyxy, confidences, class_ids, track_ids = boxes_to_arrays(Boxes(torch.zeros((0, 6)), (640, 640)))
+    assert xyxy.shape == (0, 4) and confidences.shape == (0,) and class_ids.shape == (0,)
+    assert track_ids is None
+
+
+def test_normalize_boxes():
+    xyxy = np.array([[64, 36, 320, 180]], dtype=np.float32)
+    np.testing.assert_allclose(normalize_boxes(xyxy, (360, 640)), [[0.1, 0.1, 0.5, 0.5]])
+
+
+# ============================================
+# DetectionBatch
+# ============================================
+
+def make_results(n, seed=0):
+    return Results(np.zeros((640, 640, 3), dtype=np.uint8), path="frame.jpg", names=NAMES, boxes=make_data(n, seed=seed))
+
+
+def test_batch_from_results_matches_layer1_dicts():
+    result = make_results(6)
+    batch = DetectionBatch.from_results([result])
+    expected = [
+        {'class': NAMES[cls], 'confidence': conf, 'bbox': bbox, 'class_id': cls}
+        for bbox, conf, cls, _ in per_box(result.boxes)
+    ]
+    rows = batch.to_dicts()
+    assert [set(row) for row in rows] == [set(row) for row in expected]
+    for row, want in zip(rows, expected):
+        assert (row['class'], row['class_id']) == (want['class'], want['class_id'])
+        assert row['confidence'] == pytest.approx(want['confidence'])
+        assert row['bbox'] == pytest.approx(want['bbox'])
+
+
+def test_empty_batches():
+    assert len(DetectionBatch.from_results([])) == 0
+    assert DetectionBatch.from_results([make_results(0)]).to_dicts() == []
+    assert DetectionBatch.empty(NAMES).names == NAMES
+
+
+def test_select_and_copy():
+    batch = DetectionBatch.from_results([make_results(5)])
+    batch.trends = np.array(['stable'] * 5, dtype=object)
+
+    picked = batch.select(np.array([3, 1]))
+    assert picked.scores.tolist() == batch.scores[[3, 1]].tolist()
+    assert picked.trends.tolist() == ['stable', 'stable']
+    assert picked.track_ids is None
+
+    copy = batch.copy()
+    copy.scores[0] = -1
+    assert batch.scores[0] != -1
+
+
+def test_layer_columns_only_appear_where_they_apply():
+    batch = DetectionBatch(
+        boxes=np.array([[0, 0, 10, 10], [20, 20, 30, 30], [40, 40, 50, 50]], dtype=np.float64),
+        scores=np.array([0.9, 0.8, 0.7]),
+        class_ids=np.array([0, 1, 6]),
+        names=NAMES,
+        track_ids=np.array(['OxygenTank_0_0', None, 'FireExtinguisher_0_0'], dtype=object),
+        track_ages=np.array([3, 0, 1]),
+        original_scores=np.array([0.85, 0.8, np.nan]),
+        fusion_source=np.array(['fused', 'yolo_only', 'rnn_only'], dtype=object),
+        yolo_scores=np.array([0.9, np.nan, np.nan]),
+        rnn_scores=np.array([0.8, np.nan, np.nan]),
+        ious=np.array([0.75, np.nan, np.nan]),
+        fusion_weights=np.array([[0.6, 0.4], [np.nan, np.nan], [np.nan, np.nan]])
+    )
+    fused, yolo_only, rnn_only = batch.to_dicts()
+
+    assert fused['track_id'] == 'OxygenTank_0_0' and fused['track_age'] == 3
+    assert fused['weights'] == "Y:0.60,R:0.40" and fused['iou'] == 0.75
+    # Untracked rows get neither a track id nor an age; NaN columns are left out
+    assert 'track_id' not in yolo_only and 'track_age' not in yolo_only
+    assert {'yolo_confidence', 'rnn_confidence', 'iou', 'weights'}.isdisjoint(yolo_only)
+    assert 'original_confidence' not in rnn_only
+    assert [row['fusion_source'] for row in (fused, yolo_only, rnn_only)] == ['fused', 'yolo_only', 'rnn_only']
+
+
+def test_fusion_output_matches_the_weighted_formula():
+    from core.fusion_enhanced import FusionEnhanced
+
+    yolo = DetectionBatch(boxes=np.array([[0, 0, 10, 10.]]), scores=np.array([0.9]), class_ids=np.array([0]), names=NAMES)
+    rnn = DetectionBatch(boxes=np.array([[0, 0, 10, 9.]]), scores=np.array([0.7]), class_ids=np.array([0]), names=NAMES)
+    rnn.track_ids = np.array(['OxygenTank_0_0'], dtype=object)
+
+    # Equal base weights stay equal after the IoU adjustment
+    row, = FusionEnhanced(yolo_weight=0.5, rnn_weight=0.5).fuse_detections(yolo, rnn).to_dicts()
+    assert row['fusion_source'] == 'fused'
+    assert row['confidence'] == pytest.approx(0.8)
+    assert row['bbox'] == pytest.approx([0, 0, 10, 9.5])
+    assert row['iou'] == pytest.approx(0.9)
+    assert row['weights'] == "Y:0.50,R:0.50"
+    assert row['track_id'] == 'OxygenTank_0_0'
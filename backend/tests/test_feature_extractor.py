@@ -0,0 +1,91 @@
+"""FeatureExtractor batched ROI crops against the per-box PIL path"""
+
+import numpy as np
+import pytest
+import torch
+
+from core.rnn_temporal import FeatureExtractor
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    # Randomly initialised, seeded backbone: deterministic and nothing to download
+    torch.manual_seed(0)
+    return FeatureExtractor(backbone='resnet18', pretrained=False)
+
+
+@pytest.fixture(scope="module")
+def image():
+    """Smooth colour gradients with mild noise (240x320 BGR)"""
+    y, x = np.mgrid[0:240, 0:320]
+    base = np.stack([(x * 0.7) % 256, (y * 0.9) % 256, ((x + y) * 0.4) % 256], axis=-1)
+    noise = np.random.default_rng(0).normal(0, 10, base.shape)
+    return (base + noise).clip(0, 255).astype(np.uint8)
+
+
+def cosine(a, b):
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def test_batch_matches_per_box_features(extractor, image):
+    boxes = [
+        [10, 20, 110, 90],          # Inside, wide
+        [100, 100, 103, 140],       # Tall and thin (upscaled)
+        [30.7, 40.2, 90.9, 200.5],  # Fractional, truncated like extract()
+        [0, 0, 320, 240],           # Whole frame (strong downscale)
+    ]
+    batch = extractor.extract_batch(image, boxes)
+    assert batch.shape == (4, extractor.feature_dim) and batch.dtype == np.float32
+
+    for row, bbox in zip(batch, boxes):
+        assert cosine(row, extractor.extract(image, bbox)) >= 0.9999
+
+
+def test_boxes_clipped_at_frame_borders(extractor, image):
+    clipped = [[-20, -10, 40, 50], [280, 200, 400, 300]]
+    inside = [[0, 0, 40, 50], [280, 200, 320, 240]]
+    batch = extractor.extract_batch(image, clipped)
+
+    np.testing.assert_allclose(batch, extractor.extract_batch(image, inside), rtol=1e-5, atol=1e-5)
+    for row, bbox in zip(batch, clipped):
+        assert cosine(row, extractor.extract(image, bbox)) >= 0.9999
+
+
+def test_zero_area_boxes_get_zero_rows(extractor, image):
+    boxes = [
+        [50, 60, 50, 90],      # Zero width
+        [10, 20, 110, 90],
+        [60, 80, 90, 80],      # Zero height
+        [400, 10, 450, 60],    # Entirely right of the frame
+        [100, 100, 140, 150],
+        [10.2, 10.9, 10.8, 40] # Empty after truncation to integers
+    ]
+    valid, crops = extractor.prepare_crops(image, boxes)
+    assert valid.tolist() == [1, 4]
+    assert crops.shape == (2, 3, extractor.crop_size, extractor.crop_size)
+
+    batch = extractor.extract_batch(image, boxes)
+    assert not batch[[0, 2, 3, 5]].any()
+    np.testing.assert_allclose(
+        batch[[1, 4]], extractor.extract_batch(image, [boxes[1], boxes[4]]), rtol=1e-5, atol=1e-5
+    )
+    assert not extractor.extract(image, boxes[0]).any()
+
+    # No valid box at all: no forward pass, all rows zero
+    valid, crops = extractor.prepare_crops(image, [boxes[0], boxes[3]])
+    assert len(valid) == 0 and crops.shape == (0, 3, extractor.crop_size, extractor.crop_size)
+    assert not extractor.extract_batch(image, [boxes[0], boxes[3]]).any()
+
+
+def test_empty_box_list(extractor, image):
+    features = extractor.extract_batch(image, [])
+    assert features.shape == (0, extractor.feature_dim) and features.dtype == np.float32
+    valid, crops = extractor.prepare_crops(image, [])
+    assert len(valid) == 0 and crops.shape[0] == 0
+
+
+def test_forward_chunks_match_one_pass(extractor, image, monkeypatch):
+    boxes = [[10 * i, 5 * i, 10 * i + 60, 5 * i + 80] for i in range(5)]
+    single_pass = extractor.extract_batch(image, boxes)
+    monkeypatch.setattr(extractor, "max_batch_size", 2)
+    np.testing.assert_allclose(extractor.extract_batch(image, boxes), single_pass, rtol=1e-5, atol=1e-5)
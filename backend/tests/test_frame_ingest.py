@@ -0,0 +1,85 @@
+"""FrameIngest backpressure: bounded pending frames and drop policies"""
+
+import asyncio
+
+import pytest
+
+from core.frame_ingest import FrameIngest
+
+
+def drain(ingest):
+    async def collect():
+        frames = []
+        while (item := await ingest.get()) is not None:
+            frames.append(item[0])
+        return frames
+    ingest.close()
+    return asyncio.run(collect())
+
+
+def test_latest_frame_wins():
+    ingest = FrameIngest(max_pending=1)
+    for frame in range(5):
+        ingest.put(frame)
+    assert drain(ingest) == [4]
+    assert (ingest.received, ingest.dropped) == (5, 4)
+
+
+def test_drop_oldest_keeps_the_newest_frames_in_order():
+    ingest = FrameIngest(max_pending=3, drop_policy='drop_oldest')
+    for frame in range(6):
+        ingest.put(frame)
+    assert drain(ingest) == [3, 4, 5]
+    assert ingest.dropped == 3
+
+
+def test_drop_newest_rejects_incoming_frames():
+    ingest = FrameIngest(max_pending=2, drop_policy='drop_newest')
+    assert [ingest.put(frame) for frame in range(4)] == [True, True, False, False]
+    assert drain(ingest) == [0, 1]
+    assert ingest.dropped == 2
+
+
+def test_slow_consumer_sees_only_fresh_frames():
+    """Frames arrive every 1 ms while each takes 10 ms to process"""
+    async def scenario():
+        ingest = FrameIngest(max_pending=1)
+        sent = iter(range(100))
+
+        async def receive():
+            await asyncio.sleep(0.001)
+            return next(sent, None)
+
+        pump = asyncio.create_task(ingest.pump(receive))
+        processed = []
+        while (item := await ingest.get()) is not None:
+            frame, received_at = item
+            await asyncio.sleep(0.01)
+            processed.append(frame)
+            ingest.mark_processed(received_at)
+        await pump
+        return ingest, processed
+
+    ingest, processed = asyncio.run(scenario())
+    assert processed == sorted(processed) and processed[-1] == 99
+    assert ingest.dropped > 50
+    assert ingest.received == 100 == ingest.processed + ingest.dropped
+    assert ingest.get_stats()['pending'] == 0
+
+
+def test_pump_closes_on_receive_error():
+    async def scenario():
+        ingest = FrameIngest()
+
+        async def receive():
+            raise ConnectionError("gone")
+
+        await ingest.pump(receive)
+        return ingest.closed, await ingest.get()
+
+    assert asyncio.run(scenario()) == (True, None)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        FrameIngest(drop_policy='block')
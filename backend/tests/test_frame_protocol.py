@@ -0,0 +1,101 @@
+"""Binary websocket frame protocol: encode/decode round-trips and validation"""
+
+import cv2
+import numpy as np
+import pytest
+
+from core.frame_protocol import (
+    ENCODING_BGR, ENCODING_JPEG, ENCODING_RGB, FRAME_HEADER, RESPONSE_HEADER,
+    FrameDecoder, FrameProtocolError, decode_detections, encode_detections, encode_frame, parse_frame_header
+)
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).integers(0, 255, size=(24, 32, 3), dtype=np.uint8)
+
+
+def test_header_round_trip():
+    message = encode_frame(4_000_000_000, b"xyz", encoding=ENCODING_BGR, camera_id="dock-3", width=640, height=480)
+    header, payload = parse_frame_header(message)
+    assert (header.frame_id, header.camera_id, header.encoding) == (4_000_000_000, "dock-3", ENCODING_BGR)
+    assert (header.width, header.height) == (640, 480)
+    assert bytes(payload) == b"xyz"
+    assert len(message) == FRAME_HEADER.size + 3
+
+
+def test_camera_id_is_truncated_to_16_bytes():
+    header, _ = parse_frame_header(encode_frame(1, b"", camera_id="c" * 40))
+    assert header.camera_id == "c" * 16
+
+
+def test_raw_bgr_and_rgb_decode_to_bgr(image):
+    decoder = FrameDecoder()
+    height, width = image.shape[:2]
+
+    _, bgr = decoder.decode(encode_frame(1, image.tobytes(), ENCODING_BGR, width=width, height=height))
+    np.testing.assert_array_equal(bgr, image)
+
+    rgb = image[:, :, ::-1].copy()
+    _, decoded = decoder.decode(encode_frame(2, rgb.tobytes(), ENCODING_RGB, width=width, height=height))
+    np.testing.assert_array_equal(decoded, image)
+
+
+def test_jpeg_decode():
+    # Smooth gradient: JPEG reproduces it closely (noise would not)
+    ramp = np.linspace(0, 255, 32, dtype=np.uint8)
+    image = np.dstack([np.tile(ramp, (24, 1))] * 3)
+    ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    assert ok
+    header, decoded = FrameDecoder().decode(encode_frame(7, jpeg.tobytes(), ENCODING_JPEG))
+    assert header.frame_id == 7
+    assert decoded.shape == image.shape
+    assert np.abs(decoded.astype(int) - image).mean() < 3  # Lossy
+
+
+@pytest.mark.parametrize("message,error", [
+    (b"AG\x01", "too short"),
+    (b"XX" + encode_frame(1, b"")[2:], "magic"),
+    (encode_frame(1, b"")[:2] + b"\x09" + encode_frame(1, b"")[3:], "version"),
+    (encode_frame(1, b"", encoding=9), "encoding"),
+])
+def test_malformed_headers_are_rejected(message, error):
+    with pytest.raises(FrameProtocolError, match=error):
+        parse_frame_header(message)
+
+
+def test_bad_payloads_are_rejected(image):
+    decoder = FrameDecoder()
+    with pytest.raises(FrameProtocolError):
+        decoder.decode(encode_frame(1, image.tobytes()[:-1], ENCODING_BGR, width=32, height=24))
+    with pytest.raises(FrameProtocolError):
+        decoder.decode(encode_frame(1, image.tobytes(), ENCODING_RGB))  # No size
+    with pytest.raises(FrameProtocolError):
+        decoder.decode(encode_frame(1, b"not a jpeg", ENCODING_JPEG))
+
+
+def test_detections_round_trip():
+    boxes = np.array([[1.5, 2.5, 30.0, 40.0], [100, 110, 120, 130]])
+    confidences = np.array([0.91, 0.42])
+    class_ids = np.array([6, 0])
+
+    message = encode_detections(12, boxes, confidences, class_ids, latency_ms=8.5, fps=29.5,
+                                falcon_trigger=True, reused=True)
+    assert len(message) == RESPONSE_HEADER.size + 22 * 2
+
+    decoded = decode_detections(message)
+    assert decoded['frame_id'] == 12
+    assert decoded['falcon_trigger'] and decoded['reused']
+    assert decoded['latency_ms'] == pytest.approx(8.5) and decoded['fps'] == pytest.approx(29.5)
+    np.testing.assert_allclose(decoded['boxes'], boxes, rtol=1e-6)
+    np.testing.assert_allclose(decoded['confidences'], confidences, rtol=1e-6)
+    assert decoded['class_ids'].tolist() == [6, 0]
+
+
+def test_empty_detections_round_trip():
+    decoded = decode_detections(encode_detections(3, np.zeros((0, 4)), np.zeros(0), np.zeros(0)))
+    assert decoded['frame_id'] == 3 and len(decoded['confidences']) == 0
+    assert not decoded['falcon_trigger'] and not decoded['reused']
+
+    with pytest.raises(FrameProtocolError):
+        decode_detections(b"XX" + encode_detections(3, np.zeros((0, 4)), np.zeros(0), np.zeros(0))[2:])
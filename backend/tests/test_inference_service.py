@@ -0,0 +1,121 @@
+"""InferenceService micro-batching, queue limits and shutdown"""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.inference_service import InferenceQueueFull, InferenceService
+
+
+class FakeModel:
+    """Returns (image, conf) per input and records the size of each call"""
+
+    def __init__(self, gate: threading.Event = None):
+        self.calls = []
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def __call__(self, images, conf, verbose=False):
+        self.calls.append(len(images))
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        return [(image, conf) for image in images]
+
+
+def test_concurrent_requests_share_one_batch():
+    async def scenario():
+        model = FakeModel()
+        service = InferenceService({"speed": model}, max_batch_size=8, batch_window_ms=50)
+        try:
+            results = await asyncio.gather(*[service.infer(i, conf=0.3) for i in range(5)])
+        finally:
+            await service.stop()
+        return model, results
+
+    model, results = asyncio.run(scenario())
+    assert model.calls == [5]
+    for i, result in enumerate(results):
+        assert result.results == {"speed": [(i, 0.3)]}
+        assert result.batch_size == 5
+
+
+def test_batches_are_capped_and_grouped_by_model_and_conf():
+    async def scenario():
+        speed, accuracy = FakeModel(), FakeModel()
+        service = InferenceService({"speed": speed, "accuracy": accuracy}, max_batch_size=3, batch_window_ms=20)
+        try:
+            requests = [service.infer(i, conf=0.25, models=["speed"]) for i in range(3)]
+            requests += [service.infer(10, conf=0.5)]
+            results = await asyncio.gather(*requests)
+        finally:
+            await service.stop()
+        return speed, accuracy, results
+
+    speed, accuracy, results = asyncio.run(scenario())
+    assert speed.calls == [3, 1]
+    assert accuracy.calls == [1]
+    assert [r.results["speed"] for r in results[:3]] == [[(i, 0.25)] for i in range(3)]
+    assert results[3].results == {"speed": [(10, 0.5)], "accuracy": [(10, 0.5)]}
+
+
+def test_model_error_fails_every_request_in_the_batch():
+    def broken(images, conf, verbose=False):
+        raise ValueError("boom")
+
+    async def scenario():
+        service = InferenceService({"speed": broken}, batch_window_ms=20)
+        try:
+            return await asyncio.gather(*[service.infer(i) for i in range(2)], return_exceptions=True)
+        finally:
+            await service.stop()
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_full_queue_rejects_new_requests():
+    gate = threading.Event()
+    model = FakeModel(gate)
+
+    async def scenario():
+        service = InferenceService({"speed": model}, max_batch_size=1, batch_window_ms=0, max_queue_depth=1)
+        first = asyncio.ensure_future(service.infer(0))
+        while not model.entered.is_set():  # First frame is in the model, off the queue
+            await asyncio.sleep(0.001)
+        second = asyncio.ensure_future(service.infer(1))
+        await asyncio.sleep(0)
+        with pytest.raises(InferenceQueueFull):
+            await service.infer(2)
+        gate.set()
+        await asyncio.gather(first, second)
+        rejected = service.get_stats()['requests_rejected']
+        await service.stop()
+        return rejected
+
+    try:
+        assert asyncio.run(scenario()) == 1
+    finally:
+        gate.set()
+
+
+def test_stop_fails_in_flight_and_queued_requests():
+    gate = threading.Event()
+    model = FakeModel(gate)
+
+    async def scenario():
+        service = InferenceService({"speed": model}, max_batch_size=1, batch_window_ms=0)
+        in_flight = asyncio.ensure_future(service.infer(0))
+        while not model.entered.is_set():
+            await asyncio.sleep(0.001)
+        queued = asyncio.ensure_future(service.infer(1))
+        await asyncio.sleep(0)
+        await service.stop()
+        return await asyncio.wait_for(asyncio.gather(in_flight, queued, return_exceptions=True), timeout=1)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        gate.set()
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
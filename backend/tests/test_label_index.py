@@ -0,0 +1,153 @@
+"""LabelIndex build, SQLite cache reuse and mtime invalidation"""
+
+import os
+import sqlite3
+
+import pytest
+
+from core import label_index
+from core.falcon_duality import FalconDualityAI
+from core.label_index import LabelIndex
+
+
+def write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def bump_mtime(directory):
+    """Directory mtimes can be coarse; make the change visible explicitly"""
+    stat = directory.stat()
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    root = tmp_path / "training" / "train" / "train2"
+    labels, images = root / "labels", root / "images"
+    write(labels / "a.txt", "0 0.5 0.5 0.1 0.1\n0 0.2 0.2 0.1 0.1\n3 0.1 0.1 0.1 0.1\n")
+    write(labels / "b.txt", "0 0.5 0.5 0.1 0.1\n\n")
+    write(labels / "c.txt", "6 0.5 0.5 0.1 0.1\n")
+    write(labels / "orphan.txt", "0 0.5 0.5 0.1 0.1\n")   # No image
+    write(labels / "bad.txt", "x 0.5 0.5 0.1 0.1\n")      # Unparseable
+    write(labels / "notes.md", "0 not a label\n")
+    for name in ("a.jpg", "a.png", "b.JPG", "c.jpeg", "bad.png", "orphan.gif"):
+        write(images / name)
+    return tmp_path, labels, images
+
+
+def counting_builds(monkeypatch):
+    builds = []
+    original = LabelIndex._build
+
+    def build(self, signature):
+        builds.append(signature)
+        original(self, signature)
+
+    monkeypatch.setattr(LabelIndex, "_build", build)
+    return builds
+
+
+def test_index_contents(dataset):
+    _, labels, images = dataset
+    index = LabelIndex(labels, images)
+
+    # .png is preferred over .jpg for the same stem, as the old extension probe did
+    assert index.images_with_class(0) == [images / "a.png", images / "b.JPG"]
+    assert index.images_with_class(6) == [images / "c.jpeg"]
+    assert index.images_with_class(5) == []
+    assert (index.image_count(0), index.instance_count(0)) == (2, 3)
+    assert (index.image_count(3), index.instance_count(3)) == (1, 1)
+    assert index.label_files == 5
+    assert index.index_path == labels.parent / "label_index.sqlite"
+
+
+def test_cache_is_reused_by_a_new_instance(dataset, monkeypatch):
+    _, labels, images = dataset
+    builds = counting_builds(monkeypatch)
+
+    first = LabelIndex(labels, images)
+    assert first.image_count(0) == 2
+    assert first.image_count(6) == 1  # Served from memory
+    second = LabelIndex(labels, images)
+    assert second.images_with_class(0) == first.images_with_class(0)
+    assert second.instance_count(0) == 3 and second.label_files == 5
+    assert len(builds) == 1
+
+
+def test_rebuild_when_directory_mtimes_change(dataset, monkeypatch):
+    _, labels, images = dataset
+    builds = counting_builds(monkeypatch)
+    index = LabelIndex(labels, images)
+    assert index.image_count(1) == 0
+
+    write(images / "d.png")
+    write(labels / "d.txt", "1 0.5 0.5 0.1 0.1\n")
+    bump_mtime(labels)
+    assert index.images_with_class(1) == [images / "d.png"]
+    assert len(builds) == 2
+
+    # A new image for an orphan label only changes the images directory
+    (images / "orphan.gif").rename(images / "orphan.png")
+    bump_mtime(images)
+    assert index.image_count(0) == 3
+    assert len(builds) == 3
+
+    # Another process sees the updated cache without rescanning
+    assert LabelIndex(labels, images).image_count(0) == 3
+    assert len(builds) == 3
+
+
+def test_in_place_edits_need_an_explicit_rebuild(dataset):
+    _, labels, images = dataset
+    index = LabelIndex(labels, images)
+    assert index.image_count(6) == 1
+
+    mtime = labels.stat().st_mtime_ns
+    write(labels / "c.txt", "2 0.5 0.5 0.1 0.1\n")
+    os.utime(labels, ns=(mtime, mtime))
+    assert index.image_count(6) == 1
+    index.rebuild()
+    assert (index.image_count(6), index.image_count(2)) == (0, 1)
+
+
+def test_stale_or_corrupt_cache_is_rebuilt(dataset, monkeypatch):
+    _, labels, images = dataset
+    LabelIndex(labels, images).image_count(0)
+    index_path = labels.parent / "label_index.sqlite"
+
+    monkeypatch.setattr(label_index, "INDEX_VERSION", label_index.INDEX_VERSION + 1)
+    builds = counting_builds(monkeypatch)
+    assert LabelIndex(labels, images).image_count(0) == 2
+    assert len(builds) == 1
+
+    index_path.write_bytes(b"not a database")
+    assert LabelIndex(labels, images).image_count(0) == 2
+    assert len(builds) == 2
+    with sqlite3.connect(index_path) as db:  # Replaced by a valid cache
+        assert db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] > 0
+
+
+def test_unwritable_cache_location_still_works(dataset):
+    _, labels, images = dataset
+    index = LabelIndex(labels, images, index_path=labels.parent / "missing" / "index.sqlite")
+    assert index.image_count(0) == 2
+    assert not (labels.parent / "missing").exists()
+
+
+def test_missing_dataset(tmp_path):
+    index = LabelIndex(tmp_path / "labels", tmp_path / "images")
+    assert index.images_with_class(0) == [] and index.instance_count(0) == 0
+
+
+def test_falcon_duality_uses_the_index(dataset):
+    base, _, images = dataset
+    falcon = FalconDualityAI(str(base))
+    assert falcon.find_images_with_class("OxygenTank") == [images / "a.png", images / "b.JPG"]
+    assert falcon.find_images_with_class("Unknown") == []
+
+    stats = falcon.get_statistics()
+    assert stats["class_counts"]["OxygenTank"] == 2
+    assert stats["instance_counts"]["OxygenTank"] == 3
+    assert stats["class_counts"]["FireExtinguisher"] == 1
+    assert stats["index"]["label_files"] == 5
@@ -0,0 +1,86 @@
+"""Optimal (Hungarian) vs greedy IoU matching, and the FusionEnhanced matchers"""
+
+import numpy as np
+import pytest
+
+from core import box_ops
+from core.box_ops import greedy_match, iou_matrix, optimal_match
+from core.detections import DetectionBatch
+from core.fusion_enhanced import FusionEnhanced
+
+# Row 0 overlaps both columns and greedily takes column 0, leaving row 1
+# (which only overlaps column 0) unmatched. The optimal assignment matches both.
+CONTESTED = np.array([
+    [0.90, 0.80],
+    [0.85, 0.00],
+])
+
+
+def total(matches):
+    return sum(iou for _, _, iou in matches)
+
+
+def test_greedy_depends_on_order_optimal_does_not():
+    assert [(r, c) for r, c, _ in greedy_match(CONTESTED, 0.5)] == [(0, 0)]
+    assert [(r, c) for r, c, _ in optimal_match(CONTESTED, 0.5)] == [(0, 1), (1, 0)]
+
+    flipped = CONTESTED[::-1]
+    assert [(r, c) for r, c, _ in greedy_match(flipped, 0.5)] == [(0, 0), (1, 1)]
+    assert [(r, c) for r, c, _ in optimal_match(flipped, 0.5)] == [(0, 0), (1, 1)]
+
+
+def test_optimal_never_matches_at_or_below_threshold():
+    iou = np.array([[0.5, 0.2], [0.1, 0.51]])
+    assert optimal_match(iou, 0.5) == [(1, 1, 0.51)]
+    assert optimal_match(np.zeros((0, 3)), 0.5) == []
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_optimal_total_iou_is_at_least_greedy(seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0, 200, size=(12, 2))
+    a = np.hstack([centers, centers + 40])
+    b = a[rng.permutation(len(a))] + rng.normal(0, 8, size=a.shape)
+    iou = iou_matrix(a, b)
+
+    greedy, optimal = greedy_match(iou, 0.3), optimal_match(iou, 0.3)
+    assert total(optimal) >= total(greedy) - 1e-9
+    assert len({c for _, c, _ in optimal}) == len(optimal)  # One-to-one
+    assert all(iou > 0.3 for _, _, iou in optimal)
+
+
+def test_optimal_falls_back_to_greedy_without_scipy(monkeypatch):
+    monkeypatch.setattr(box_ops, "load_assignment_solver", lambda: None)
+    assert optimal_match(CONTESTED, 0.5) == greedy_match(CONTESTED, 0.5)
+
+
+def batch(boxes, scores, class_ids):
+    return DetectionBatch(
+        boxes=np.asarray(boxes, dtype=np.float64),
+        scores=np.asarray(scores, dtype=np.float64),
+        class_ids=np.asarray(class_ids, dtype=np.int64),
+        names={0: "OxygenTank", 1: "FireAlarm"}
+    )
+
+
+def test_fusion_matchers_agree_on_unambiguous_input():
+    yolo = batch([[0, 0, 10, 10], [100, 100, 120, 120]], [0.9, 0.6], [0, 1])
+    rnn = batch([[1, 1, 10, 10], [300, 300, 320, 320]], [0.7, 0.5], [0, 1])
+
+    fused = [FusionEnhanced(matcher=m).fuse_detections(yolo, rnn) for m in ("hungarian", "greedy")]
+    for result in fused:
+        assert sorted(result.fusion_source.tolist()) == ["fused", "rnn_only", "yolo_only"]
+    np.testing.assert_allclose(fused[0].scores, fused[1].scores)
+    np.testing.assert_allclose(fused[0].boxes, fused[1].boxes)
+
+
+def test_fusion_only_matches_within_a_class():
+    yolo = batch([[0, 0, 10, 10]], [0.9], [0])
+    rnn = batch([[0, 0, 10, 10]], [0.8], [1])
+    fused = FusionEnhanced().fuse_detections(yolo, rnn)
+    assert sorted(fused.fusion_source.tolist()) == ["rnn_only", "yolo_only"]
+
+
+def test_unknown_matcher_is_rejected():
+    with pytest.raises(ValueError):
+        FusionEnhanced(matcher="auction")
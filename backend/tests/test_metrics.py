@@ -0,0 +1,151 @@
+"""Prometheus metric types, text exposition and the ASGI timing middleware"""
+
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from core import metrics as metrics_module
+from core.metrics import MetricsMiddleware, MetricsRegistry, model_memory_bytes, resident_memory_bytes
+
+
+def samples(registry):
+    """Sample lines of the exposition (no HELP/TYPE comments)"""
+    return [line for line in registry.render().splitlines() if not line.startswith("#")]
+
+
+def test_counter_and_labels():
+    registry = MetricsRegistry()
+    triggers = registry.counter("triggers_total", "Triggers", ("source",))
+    triggers.inc("webcam")
+    triggers.inc("webcam", amount=2)
+    triggers.inc('a "quoted"\nsource')
+
+    text = registry.render()
+    assert "# HELP triggers_total Triggers\n# TYPE triggers_total counter" in text
+    assert samples(registry) == [
+        'triggers_total{source="webcam"} 3',
+        'triggers_total{source="a \\"quoted\\"\\nsource"} 1',
+    ]
+    with pytest.raises(ValueError):
+        triggers.inc()  # Missing label
+
+
+def test_gauge_set_and_callbacks():
+    registry = MetricsRegistry()
+    depth = registry.gauge("queue_depth", "Depth")
+    depth.set(4)
+    depth.dec()
+    registry.gauge("tracks", "Tracks", ("camera_id",), callback=lambda: {"cam0": 2, "cam1": None})
+    registry.gauge("rss", "RSS", callback=lambda: None)
+
+    assert samples(registry) == ['queue_depth 3', 'tracks{camera_id="cam0"} 2']
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("layer",), buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 2.0):
+        latency.observe(value, "layer1")
+
+    assert samples(registry) == [
+        'latency_seconds_bucket{layer="layer1",le="0.01"} 2',
+        'latency_seconds_bucket{layer="layer1",le="0.1"} 3',
+        'latency_seconds_bucket{layer="layer1",le="1"} 3',
+        'latency_seconds_bucket{layer="layer1",le="+Inf"} 4',
+        'latency_seconds_sum{layer="layer1"} 2.065',
+        'latency_seconds_count{layer="layer1"} 4',
+    ]
+
+
+def test_histogram_time_observes_even_on_error():
+    registry = MetricsRegistry()
+    latency = registry.histogram("op_seconds", "Op")
+    with pytest.raises(RuntimeError):
+        with latency.time():
+            raise RuntimeError
+    assert 'op_seconds_count 1' in samples(registry)
+
+
+def test_failing_callback_does_not_break_the_scrape():
+    registry = MetricsRegistry()
+    registry.gauge("broken", "Broken", callback=lambda: 1 / 0)
+    registry.counter("ok_total", "Ok").inc()
+    assert samples(registry) == ['ok_total 1']
+    with pytest.raises(ValueError):
+        registry.counter("ok_total", "Again")
+
+
+def test_middleware_labels_route_template_method_and_status():
+    from fastapi import FastAPI, HTTPException
+    from fastapi.testclient import TestClient
+
+    registry = MetricsRegistry()
+    requests = registry.histogram("http_seconds", "Requests", ("route", "method", "status"))
+    app = FastAPI()
+
+    @app.get("/detect/layer/{layer_num}")
+    async def layer(layer_num: int):
+        if layer_num > 3:
+            raise HTTPException(status_code=404)
+        return {"layer": layer_num}
+
+    app.add_middleware(MetricsMiddleware, histogram=requests)
+    with TestClient(app) as client:
+        client.get("/detect/layer/1")
+        client.get("/detect/layer/2")
+        client.get("/detect/layer/9")
+        client.get("/nowhere")
+
+    counts = [line for line in samples(registry) if line.startswith("http_seconds_count")]
+    assert counts == [
+        'http_seconds_count{route="/detect/layer/{layer_num}",method="GET",status="200"} 2',
+        'http_seconds_count{route="/detect/layer/{layer_num}",method="GET",status="404"} 1',
+        'http_seconds_count{route="unmatched",method="GET",status="404"} 1',
+    ]
+
+
+def test_middleware_passes_other_scopes_through():
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(scope["type"])
+
+    registry = MetricsRegistry()
+    middleware = MetricsMiddleware(app, registry.histogram("h", "H", ("route", "method", "status")))
+    asyncio.run(middleware({"type": "websocket"}, None, None))
+    assert seen == ["websocket"] and samples(registry) == []
+
+
+def test_memory_helpers():
+    import torch
+
+    assert resident_memory_bytes() > 0
+    module = torch.nn.Linear(10, 4)  # 44 float32 parameters
+    assert model_memory_bytes(module) == 44 * 4
+    assert model_memory_bytes(type("Wrapper", (), {"model": module})()) == 44 * 4
+    assert model_memory_bytes(object()) is None
+
+
+def test_rss_without_proc_or_resource(monkeypatch):
+    def no_proc(*args, **kwargs):
+        raise OSError("no /proc")
+
+    monkeypatch.setattr(metrics_module, "open", no_proc, raising=False)
+    assert resident_memory_bytes() > 0  # Peak RSS fallback
+    monkeypatch.setattr(metrics_module, "RESOURCE_AVAILABLE", False)
+    assert resident_memory_bytes() is None
+
+
+def test_imports_without_the_resource_module():
+    """resource is Unix-only; the module (and so the app) must import without it"""
+    backend = Path(__file__).resolve().parent.parent
+    code = (
+        "import sys; sys.modules['resource'] = None; "
+        f"sys.path.insert(0, {str(backend)!r}); "
+        "import core.metrics as m; print(m.RESOURCE_AVAILABLE)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
@@ -0,0 +1,163 @@
+"""ModelRegistry lazy loading, readiness, warm-up and retry of failed loads"""
+
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from core.model_registry import ModelLoadError, ModelRegistry
+
+
+class FlakyLoader:
+    """Fails the first `failures` calls, then returns a value"""
+
+    def __init__(self, failures=0, value="model", delay=0.0):
+        self.failures = failures
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise OSError(f"transient failure {self.calls}")
+        return self.value
+
+
+def test_nothing_loads_until_first_use():
+    loader = FlakyLoader()
+    registry = ModelRegistry()
+    registry.register("speed", loader)
+    assert loader.calls == 0 and registry.peek("speed") is None and not registry.is_ready
+
+    assert registry.get("speed") == "model"
+    assert registry.get("speed") == "model"
+    assert loader.calls == 1 and registry.is_ready
+    assert registry.get_status()['components']['speed']['state'] == "ready"
+
+
+def test_concurrent_gets_load_once():
+    loader = FlakyLoader(delay=0.05)
+    registry = ModelRegistry()
+    registry.register("speed", loader)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("speed"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["model"] * 8 and loader.calls == 1
+
+
+def test_readiness_only_counts_required_components():
+    registry = ModelRegistry()
+    registry.register("speed", FlakyLoader())
+    registry.register("falcon", FlakyLoader(failures=99), required=False)
+    registry.get("speed")
+    with pytest.raises(ModelLoadError):
+        registry.get("falcon")
+    assert registry.is_ready and registry.failed == ["falcon"]
+
+
+def test_failed_load_fails_fast_then_retries_after_backoff():
+    loader = FlakyLoader(failures=2)
+    registry = ModelRegistry(retry_backoff=0.05)
+    registry.register("rnn", loader)
+
+    with pytest.raises(ModelLoadError, match="transient failure 1"):
+        registry.get("rnn")
+    with pytest.raises(ModelLoadError):  # Inside the backoff: no new attempt
+        registry.get("rnn")
+    assert loader.calls == 1
+    assert registry.get_status()['components']['rnn']['failures'] == 1
+
+    time.sleep(0.06)
+    with pytest.raises(ModelLoadError, match="transient failure 2"):
+        registry.get("rnn")
+
+    time.sleep(0.06)  # Backoff doubled to 0.1 s
+    with pytest.raises(ModelLoadError):
+        registry.get("rnn")
+    assert loader.calls == 2
+
+    time.sleep(0.05)
+    assert registry.get("rnn") == "model"
+    status = registry.get_status()['components']['rnn']
+    assert (status['state'], status['failures'], status['error']) == ("ready", 0, None)
+    assert registry.is_ready
+
+
+def test_backoff_is_capped():
+    registry = ModelRegistry(retry_backoff=1.0, max_retry_backoff=2.0)
+    registry.register("rnn", FlakyLoader(failures=99))
+    for _ in range(4):
+        registry._entries["rnn"].retry_at = 0.0  # Make the next get() retry
+        with pytest.raises(ModelLoadError):
+            registry.get("rnn")
+    assert registry.get_status()['components']['rnn']['retry_in_sec'] <= 2.0
+
+
+def test_warm_up_retries_until_ready():
+    loader = FlakyLoader(failures=2)
+
+    async def scenario():
+        registry = ModelRegistry(retry_backoff=0.02)
+        registry.register("speed", FlakyLoader())
+        registry.register("rnn", loader)
+        await asyncio.wait_for(registry.start_warm_up(), timeout=5)
+        return registry
+
+    registry = asyncio.run(scenario())
+    assert registry.is_ready and loader.calls == 3
+    assert registry.get_status()['time_to_ready_sec'] is not None
+
+
+def test_stop_warm_up_cancels_pending_retries():
+    async def scenario():
+        registry = ModelRegistry(retry_backoff=60)
+        registry.register("rnn", FlakyLoader(failures=99))
+        task = registry.start_warm_up()
+        await asyncio.sleep(0.05)
+        assert not task.done()  # Waiting for the backoff
+        await registry.stop_warm_up()
+        return task
+
+    assert asyncio.run(scenario()).cancelled()
+
+
+def test_lazy_mapping_loads_on_lookup_only():
+    loader = FlakyLoader()
+    registry = ModelRegistry()
+    registry.register("speed", loader)
+    mapping = registry.lazy_mapping(["speed"])
+    assert "speed" in mapping and list(mapping) == ["speed"] and loader.calls == 0
+    assert mapping["speed"] == "model" and loader.calls == 1
+    with pytest.raises(KeyError):
+        mapping["accuracy"]
+
+
+def test_duplicate_and_unknown_names():
+    registry = ModelRegistry()
+    registry.register("speed", FlakyLoader())
+    with pytest.raises(ValueError):
+        registry.register("speed", FlakyLoader())
+    with pytest.raises(KeyError):
+        registry.get("accuracy")
+
+
+def test_importing_the_api_loads_no_heavy_modules():
+    """Models, OpenCV and SciPy are imported when first used, not with main"""
+    code = (
+        "import sys, main; "
+        "print('heavy:', sorted(m for m in ('cv2', 'torch', 'torchvision', 'ultralytics', 'onnxruntime', 'scipy') "
+        "if m in sys.modules))"
+    )
+    backend = Path(__file__).resolve().parent.parent
+    output = subprocess.run([sys.executable, "-c", code], cwd=backend, capture_output=True, text=True, check=True)
+    assert "heavy: []" in output.stdout.splitlines()
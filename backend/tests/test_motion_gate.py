@@ -0,0 +1,65 @@
+"""MotionGate change detection, forced refresh and drift"""
+
+import numpy as np
+from PIL import Image
+
+from core.motion_gate import MotionGate
+
+
+def scene(value=100, box=None, size=(360, 640)):
+    """Flat gray BGR frame, optionally with a bright square at (x, y, side)"""
+    frame = np.full(size + (3,), value, dtype=np.uint8)
+    if box is not None:
+        x, y, side = box
+        frame[y:y + side, x:x + side] = 255
+    return frame
+
+
+def test_static_frames_are_skipped_until_something_moves():
+    gate = MotionGate(refresh_interval=0)
+    assert gate.check(scene()) == (True, "first_frame")
+    assert gate.check(scene()) == (False, "static")
+    assert gate.check(scene(value=105)) == (False, "static")  # Below pixel_delta
+    assert gate.check(scene(box=(100, 100, 80))) == (True, "motion")
+    assert gate.check(scene(box=(100, 100, 80))) == (False, "static")
+    assert gate.get_stats() == {'frames_seen': 5, 'frames_skipped': 3, 'skip_ratio': 0.6}
+
+
+def test_tiny_changes_stay_under_the_threshold():
+    gate = MotionGate(change_threshold=0.05, refresh_interval=0)
+    gate.check(scene())
+    assert gate.check(scene(box=(10, 10, 20)))[0] is False     # ~0.2% of the frame
+    assert gate.check(scene(box=(10, 10, 200)))[0] is True     # ~17%
+
+
+def test_refresh_forces_inference_every_n_frames():
+    gate = MotionGate(refresh_interval=3)
+    reasons = [gate.check(scene())[1] for _ in range(7)]
+    assert reasons == ["first_frame", "static", "static", "refresh", "static", "static", "refresh"]
+
+
+def test_drift_is_measured_against_the_last_inferred_frame():
+    gate = MotionGate(refresh_interval=0)
+    gate.check(scene(value=100))
+    # Each step is below pixel_delta, but the total drift is not
+    results = [gate.check(scene(value=100 + 8 * step))[0] for step in range(1, 5)]
+    assert results == [False, False, True, False]
+
+
+def test_reset_and_resolution_change_restart_the_reference():
+    gate = MotionGate()
+    gate.check(scene())
+    gate.reset()
+    assert gate.check(scene()) == (True, "first_frame")
+    gate = MotionGate(thumbnail_size=(32, 18))
+    gate.check(scene())
+    assert gate.check(scene(size=(720, 1280)))[0] is False  # Same thumbnail size
+
+
+def test_pil_and_grayscale_inputs():
+    gate = MotionGate(refresh_interval=0)
+    gate.check(Image.fromarray(scene()))
+    assert gate.check(Image.fromarray(scene()))[1] == "static"
+    gray = MotionGate(refresh_interval=0)
+    gray.check(scene()[:, :, 0])
+    assert gray.check(scene(box=(0, 0, 300))[:, :, 0])[1] == "motion"
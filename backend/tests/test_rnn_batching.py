@@ -0,0 +1,120 @@
+"""RNNInferenceEngine batched per-frame forward against per-track forwards"""
+
+from collections import deque
+
+import numpy as np
+import pytest
+import torch
+
+from core.rnn_temporal import MultiTaskTemporalRNN, RNNInferenceEngine, TemporalBuffer
+
+FEATURE_DIM = 32
+SEQUENCE_LENGTH = 16
+
+
+class StubExtractor:
+    """Features looked up by bbox, so each track gets its own known sequence"""
+
+    def __init__(self):
+        self.feature_dim = FEATURE_DIM
+        self.features = {}
+
+    def extract_batch(self, frame, bboxes):
+        return np.stack([self.features[tuple(b)] for b in bboxes]) if bboxes else np.zeros((0, FEATURE_DIM), np.float32)
+
+
+def reference_sequence(history):
+    """The old deque buffer: zeros prepended, oldest first, last 16 frames"""
+    window = list(history)[-SEQUENCE_LENGTH:]
+    pad = [np.zeros(FEATURE_DIM, np.float32)] * (SEQUENCE_LENGTH - len(window))
+    return np.stack(pad + window)
+
+
+def reference_temporal(model, history, labels):
+    """Per-track forward as process_detections ran it before batching"""
+    with torch.no_grad():
+        outputs = model(torch.FloatTensor(reference_sequence(history)).unsqueeze(0))
+    probs = torch.softmax(outputs['activity_logits'], dim=-1)
+    return {
+        'activity': labels[probs.argmax().item()],
+        'activity_confidence': float(probs.max().item()),
+        'anomaly_score': float(outputs['anomaly_scores'].item()),
+        'tracking_embedding': outputs['tracking_embeddings'].numpy()[0].tolist()
+    }
+
+
+@pytest.fixture
+def engine():
+    engine = RNNInferenceEngine(feature_backbone='resnet18', feature_pretrained=False)
+    engine.feature_extractor = StubExtractor()
+    torch.manual_seed(0)
+    engine.model = MultiTaskTemporalRNN(feature_dim=FEATURE_DIM).eval()
+    return engine
+
+
+def test_temporal_buffer_matches_the_old_deque():
+    buffer, history = TemporalBuffer(SEQUENCE_LENGTH), deque(maxlen=SEQUENCE_LENGTH)
+    rng = np.random.default_rng(0)
+    for step in range(1, 40):
+        features = rng.normal(size=FEATURE_DIM).astype(np.float32)
+        buffer.add_frame(features)
+        history.append(features)
+        np.testing.assert_array_equal(buffer.get_sequence(), reference_sequence(history))
+        np.testing.assert_array_equal(buffer.latest(), features)
+        assert buffer.is_ready() == (step >= SEQUENCE_LENGTH // 2)
+
+
+def test_batched_forward_matches_per_track_forwards(engine):
+    rng = np.random.default_rng(1)
+    # Tracks join at different frames and one leaves: histories below the
+    # readiness threshold, padded, exactly full and wrapped around the ring
+    first_frame = {1: 0, 2: 3, 3: 10, 4: 15, 5: 24}
+    last_frame = {1: 29, 2: 25, 3: 29, 4: 29, 5: 29}
+    histories = {t: [] for t in first_frame}
+    batch_sizes = set()
+
+    for frame_idx in range(30):
+        active = [t for t in first_frame if first_frame[t] <= frame_idx <= last_frame[t]]
+        detections = [{'track_id': -1, 'bbox': [0, 0, 5, 5]}]  # Untracked: never buffered
+        for t in active:
+            bbox = [t, frame_idx, t + 10, frame_idx + 10]
+            features = rng.normal(size=FEATURE_DIM).astype(np.float32)
+            engine.feature_extractor.features[tuple(bbox)] = features
+            histories[t].append(features)
+            detections.append({'track_id': t, 'bbox': bbox})
+
+        results = engine.process_detections(None, detections)
+        assert results[0]['temporal']['activity'] == 'no_tracking'
+
+        ready = 0
+        for det in results[1:]:
+            history = histories[det['track_id']]
+            if len(history) < SEQUENCE_LENGTH // 2:
+                assert det['temporal']['activity'] == 'buffering'
+                continue
+            expected = reference_temporal(engine.model, history, engine.activity_labels)
+            actual = det['temporal']
+            assert actual['activity'] == expected['activity']
+            assert actual['activity_confidence'] == pytest.approx(expected['activity_confidence'], abs=1e-6)
+            assert actual['anomaly_score'] == pytest.approx(expected['anomaly_score'], abs=1e-6)
+            np.testing.assert_allclose(actual['tracking_embedding'], expected['tracking_embedding'], atol=1e-6)
+            ready += 1
+        batch_sizes.add(ready)
+
+    assert batch_sizes >= {1, 2, 3, 4}
+    assert len(histories[1]) > SEQUENCE_LENGTH
+
+
+def test_staging_pool_rows_beyond_the_batch_are_ignored(engine):
+    buffers = []
+    for t in range(5):
+        buffer = TemporalBuffer(SEQUENCE_LENGTH)
+        for step in range(8 + 3 * t):
+            buffer.add_frame(np.full(FEATURE_DIM, t + step / 100, np.float32))
+        buffers.append(buffer)
+
+    engine._sequence_batch(buffers)           # Leaves stale rows in the pool
+    batch = engine._sequence_batch(buffers[3:])
+    assert batch.shape == (2, SEQUENCE_LENGTH, FEATURE_DIM)
+    for row, buffer in zip(batch.numpy(), buffers[3:]):
+        np.testing.assert_array_equal(row, buffer.get_sequence())
@@ -0,0 +1,86 @@
+"""RNNTemporal track expiry events and RNNInferenceEngine track cleanup"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from core import rnn_temporal
+from core.detections import DetectionBatch
+from core.rnn_temporal import RNNTemporal
+
+NAMES = {0: "OxygenTank", 1: "FireAlarm"}
+
+
+def frame(*detections):
+    """DetectionBatch from (class_id, x1, y1, x2, y2, confidence) tuples"""
+    rows = np.array(detections, dtype=np.float64).reshape(-1, 6)
+    return DetectionBatch(boxes=rows[:, 1:5], scores=rows[:, 5], class_ids=rows[:, 0].astype(np.int64), names=NAMES)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rnn_temporal, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def test_tracks_expire_after_max_age_with_one_event_each(clock):
+    temporal = RNNTemporal(track_max_age=2.0)
+    temporal.process_detections(frame((0, 10, 10, 50, 50, 0.8), (1, 300, 300, 340, 340, 0.6)))
+
+    clock.value += 1.0
+    temporal.process_detections(frame((0, 10, 10, 50, 50, 0.8)))
+    assert temporal.get_last_expired() == []
+
+    clock.value += 1.5  # FireAlarm last seen 2.5 s ago, OxygenTank 1.5 s ago
+    temporal.process_detections(frame((0, 10, 10, 50, 50, 0.8)))
+    expired = temporal.get_last_expired()
+    assert [e["message"] for e in expired] == ["FireAlarm missing"]
+    assert expired[0]["track_age"] == 1
+    assert expired[0]["bbox"] == [300, 300, 340, 340]
+    assert len(temporal.get_session().tracks) == 1
+
+    # Already expired tracks are not reported again
+    clock.value += 0.5
+    temporal.process_detections(frame((0, 10, 10, 50, 50, 0.8)))
+    assert temporal.get_last_expired() == []
+
+
+def test_expiry_stream_pages_by_sequence_and_camera(clock):
+    temporal = RNNTemporal(track_max_age=1.0)
+    for camera in ("cam0", "cam1"):
+        temporal.process_detections(frame((0, 10, 10, 50, 50, 0.8)), camera_id=camera)
+    clock.value += 5.0
+    for camera in ("cam0", "cam1"):
+        temporal.process_detections(frame((1, 300, 300, 340, 340, 0.6)), camera_id=camera)
+
+    events = temporal.get_expiry_events()
+    assert [(e["seq"], e["camera_id"]) for e in events] == [(1, "cam0"), (2, "cam1")]
+    assert temporal.get_expiry_events(since=1) == events[1:]
+    assert temporal.get_expiry_events(camera_id="cam0") == events[:1]
+    assert temporal.get_expiry_events(limit=1) == events[:1]
+
+
+def test_cleanup_drops_all_streaming_state_of_dead_tracks(tmp_path, monkeypatch):
+    from core.rnn_temporal import RNNInferenceEngine
+
+    # Session cleanup needs no real backbone; nothing may be downloaded
+    monkeypatch.setenv("TORCH_HOME", str(tmp_path))
+    engine = RNNInferenceEngine(
+        mode='streaming', resync_interval=4, feature_backbone='mobilenet_v3_small', feature_pretrained=False
+    )
+    assert not any(tmp_path.iterdir())
+    image = np.random.default_rng(0).integers(0, 255, size=(120, 160, 3), dtype=np.uint8)
+
+    for _ in range(12):
+        detections = [{'track_id': t, 'bbox': [10 + 40 * t, 10, 40 + 40 * t, 60]} for t in (1, 2)]
+        results = engine.process_detections(image, detections)
+    assert {d['temporal']['activity'] for d in results} <= set(engine.activity_labels)
+    assert set(engine.track_states) == set(engine.steps_since_sync) == {1, 2}
+
+    engine.cleanup_old_tracks([2])
+    assert set(engine.object_buffers) == set(engine.track_states) == set(engine.steps_since_sync) == {2}
+
+    engine.cleanup_old_tracks([])
+    assert not engine.object_buffers and not engine.track_states and not engine.steps_since_sync
@@ -0,0 +1,102 @@
+"""TrackStore ring buffers, rolling statistics and slot management"""
+
+from collections import deque
+
+import numpy as np
+import pytest
+
+from core.track_store import TrackStore
+
+
+def trend_reference(values, window):
+    """(increasing, decreasing) steps within the last `window` values"""
+    recent = list(values)[-window:]
+    steps = list(zip(recent, recent[1:]))
+    return sum(b > a for a, b in steps), sum(b < a for a, b in steps)
+
+
+@pytest.mark.parametrize("history_length", [1, 3, 5])
+def test_rolling_stats_match_the_window(history_length):
+    rng = np.random.default_rng(history_length)
+    store = TrackStore(history_length=history_length, initial_capacity=2)
+    tracks = [f"t{i}" for i in range(4)]
+    windows = {t: deque(maxlen=history_length) for t in tracks}
+
+    for step in range(40):
+        # A varying subset of tracks per frame
+        frame = [t for t in tracks if rng.random() < 0.7] or tracks[:1]
+        slots = np.array([store.touch(t)[0] for t in frame])
+        confidences = rng.uniform(0, 1, size=len(frame))
+        counts = store.push_detections(slots, confidences, float(step), np.zeros((len(frame), 4)))
+        for t, c in zip(frame, confidences):
+            windows[t].append(c)
+
+        count, mean, variance = store.confidence_stats(slots)
+        assert counts.tolist() == count.tolist() == [len(windows[t]) for t in frame]
+        np.testing.assert_allclose(mean, [np.mean(windows[t]) for t in frame], atol=1e-12)
+        np.testing.assert_allclose(variance, [np.var(windows[t]) for t in frame], atol=1e-12)
+
+
+@pytest.mark.parametrize("window", [2, 5])
+def test_trend_counts_match_the_window(window):
+    rng = np.random.default_rng(window)
+    store = TrackStore(trend_window=window)
+    slots = np.array([store.touch("a")[0], store.touch("b")[0]])
+    history = {0: [], 1: []}
+
+    for _ in range(30):
+        # Rounded values so that equal neighbours (no step) happen too
+        values = np.round(rng.uniform(0, 1, size=2), 1)
+        store.push_trend(slots, values)
+        for i, v in enumerate(values):
+            history[i].append(v)
+
+        pushed, up, down = store.trend_counts(slots)
+        assert pushed.tolist() == [len(history[0])] * 2
+        for i in range(2):
+            assert (up[i], down[i]) == trend_reference(history[i], window)
+
+
+def test_slots_grow_and_are_recycled():
+    store = TrackStore(max_tracks=8, initial_capacity=2)
+    slots = [store.touch(f"t{i}")[0] for i in range(5)]
+    assert slots == [0, 1, 2, 3, 4]
+    assert store.capacity == 8
+
+    store.push_detections(np.array([slots[1]]), np.array([0.9]), 1.0, np.zeros((1, 4)))
+    assert store.remove("t1") and not store.remove("t1")
+    assert "t1" not in store and len(store) == 4
+
+    # The freed slot is reused with its state cleared
+    slot, evicted = store.touch("new")
+    assert (slot, evicted) == (slots[1], None)
+    assert store.confidence_stats(np.array([slot]))[0].tolist() == [0]
+    assert np.isnan(store.ema[slot])
+
+
+def test_full_store_evicts_least_recently_updated():
+    store = TrackStore(max_tracks=3)
+    for t in ("a", "b", "c"):
+        store.touch(t)
+    store.touch("a")  # "b" is now the oldest
+
+    slot, evicted = store.touch("d")
+    assert evicted == "b"
+    assert [t for t, _ in store.items()] == ["c", "a", "d"]
+    assert len(store) == 3
+
+
+
+def test_expired_stops_at_first_live_track():
+    store = TrackStore()
+    for t, when in (("a", 1.0), ("b", 2.0), ("c", 5.0)):
+        slot, _ = store.touch(t)
+        store.push_detections(np.array([slot]), np.array([0.5]), when, np.zeros((1, 4)))
+
+    assert [t for t, _ in store.expired(2.5)] == ["a", "b"]
+    assert store.expired(0.5) == []
+
+    # Updating a track moves it to the back of the expiry order
+    slot, _ = store.touch("a")
+    store.push_detections(np.array([slot]), np.array([0.5]), 6.0, np.zeros((1, 4)))
+    assert [t for t, _ in store.expired(5.5)] == ["b", "c"]
@@ -0,0 +1,150 @@
+"""VideoPipeline ordering, motion-gate reuse and decoder shutdown"""
+
+import asyncio
+import threading
+import time
+
+import anyio
+import numpy as np
+
+from core.video_pipeline import VideoPipeline, read_next_sampled_frame
+
+
+class FakeCapture:
+    """
+    cv2.VideoCapture stand-in: frame i is a constant image of value i.
+    Grabs from `slow_from` on take `slow_seconds`; release() records whether
+    a grab/retrieve was still running.
+    """
+
+    def __init__(self, frames, slow_from=None, slow_seconds=0.0):
+        self.frames = frames
+        self.slow_from = slow_from
+        self.slow_seconds = slow_seconds
+        self.position = 0
+        self.reading = threading.Lock()
+        self.released_while_reading = None
+
+    def grab(self):
+        with self.reading:
+            if self.slow_from is not None and self.position >= self.slow_from:
+                time.sleep(self.slow_seconds)
+            if self.position >= self.frames:
+                return False
+            self.position += 1
+            return True
+
+    def retrieve(self):
+        with self.reading:
+            return True, np.full((4, 4, 3), self.position - 1, dtype=np.uint8)
+
+    def release(self):
+        self.released_while_reading = self.reading.locked()
+
+
+async def detect(frame):
+    await asyncio.sleep(0.001)
+    return int(frame[0, 0, 0])
+
+
+def collect(pipeline, cap, **kwargs):
+    async def run():
+        return [item async for item in pipeline.run(cap, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_read_next_sampled_frame_skips_without_retrieving():
+    cap = FakeCapture(10)
+    assert read_next_sampled_frame(cap, 1, 4)[0] == 4
+    assert read_next_sampled_frame(cap, 5, 4, end_frame=7) == (7, None)
+
+
+def test_results_come_back_in_frame_order():
+    results = collect(VideoPipeline(detect, decode_queue_size=2, max_inflight=3), FakeCapture(20), sample_interval=3)
+    assert [(idx, result) for idx, result, _, _ in results] == [(i, i) for i in range(0, 20, 3)]
+    assert all(inferred for *_, inferred in results)
+
+
+def test_static_frames_reuse_the_last_result():
+    class EveryOtherFrame:
+        def __init__(self):
+            self.calls = 0
+
+        def check(self, frame):
+            self.calls += 1
+            return self.calls % 2 == 1, 0.0
+
+    results = collect(VideoPipeline(detect), FakeCapture(6), sample_interval=1, gate=EveryOtherFrame())
+    assert [(result, inferred) for _, result, _, inferred in results] == [
+        (0, True), (0, False), (2, True), (2, False), (4, True), (4, False)
+    ]
+
+
+def test_closing_early_waits_for_the_decoder_before_release():
+    # The decoder is inside a 1.3 s grab when the consumer stops
+    cap = FakeCapture(100, slow_from=2, slow_seconds=1.3)
+
+    async def first_then_stop():
+        stream = VideoPipeline(detect, decode_queue_size=1, max_inflight=1).run(cap, sample_interval=1)
+        async for frame_idx, *_ in stream:
+            break
+        await stream.aclose()
+        cap.release()
+        return frame_idx
+
+    assert asyncio.run(first_then_stop()) == 0
+    assert cap.released_while_reading is False
+    assert not any(t.name == "video-decode" for t in threading.enumerate())
+
+
+async def ticker(ticks, interval=0.01):
+    while True:
+        await asyncio.sleep(interval)
+        ticks.append(time.perf_counter())
+
+
+def test_closing_mid_stream_keeps_the_event_loop_responsive():
+    cap = FakeCapture(100, slow_from=2, slow_seconds=1.0)
+
+    async def close_while_decoding():
+        ticks = []
+        clock = asyncio.create_task(ticker(ticks))
+        stream = VideoPipeline(detect, decode_queue_size=1, max_inflight=1).run(cap, sample_interval=1)
+        await stream.__anext__()
+        await asyncio.sleep(0.05)  # Decoder is now inside the slow grab
+        started = time.perf_counter()
+        await stream.aclose()
+        closed = time.perf_counter()
+        cap.release()
+        clock.cancel()
+        return [t for t in ticks if started <= t <= closed], closed - started
+
+    ticks_while_closing, closing_seconds = asyncio.run(close_while_decoding())
+    assert closing_seconds > 0.5                    # Really waited for the decoder
+    assert len(ticks_while_closing) >= 20           # ...while other tasks kept running
+    assert max(np.diff(ticks_while_closing)) < 0.2
+    assert cap.released_while_reading is False
+
+
+def test_cancelled_consumer_still_waits_for_the_decoder():
+    # Starlette cancels a streaming response through anyio, which re-delivers
+    # the cancellation on every await until the task leaves the scope
+    cap = FakeCapture(100, slow_from=2, slow_seconds=1.0)
+
+    async def consume_until_timeout():
+        ticks = []
+        seen = []
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(ticker, ticks)
+            with anyio.move_on_after(0.3):
+                async for frame_idx, *_ in VideoPipeline(detect, decode_queue_size=1, max_inflight=1).run(cap, sample_interval=1):
+                    seen.append(frame_idx)
+            cap.release()
+            tg.cancel_scope.cancel()
+        return seen, ticks
+
+    seen, ticks = anyio.run(consume_until_timeout)
+    assert seen == [0, 1]
+    assert cap.released_while_reading is False
+    assert not any(t.name == "video-decode" for t in threading.enumerate())
+    assert len(ticks) >= 40 and max(np.diff(ticks)) < 0.2
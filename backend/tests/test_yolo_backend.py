@@ -0,0 +1,169 @@
+"""ONNX Runtime YOLO backend: letterbox, output decoding and parity with ultralytics"""
+
+import numpy as np
+import pytest
+import torch
+from ultralytics.data.augment import LetterBox
+from ultralytics.utils import ops
+
+from core import yolo_backend
+from core.yolo_backend import OnnxYOLO, letterbox, scale_boxes_to_image
+
+# (height, width): landscape and portrait HD, plus sizes with rounded scales
+# and odd padding (split unevenly between the two sides)
+SHAPES = [(720, 1280), (1280, 720), (481, 641), (333, 200), (300, 201), (201, 300)]
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("auto", [True, False])
+def test_letterbox_matches_ultralytics(shape, auto):
+    image = np.random.default_rng(0).integers(0, 255, size=(*shape, 3), dtype=np.uint8)
+    ours = letterbox(image, (640, 640), auto=auto, stride=32)
+    np.testing.assert_array_equal(ours, LetterBox((640, 640), auto=auto, stride=32)(image=image))
+    if auto:
+        assert ours.shape[0] % 32 == 0 and ours.shape[1] % 32 == 0 and max(ours.shape[:2]) == 640
+    else:
+        assert ours.shape[:2] == (640, 640)
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("auto", [True, False])
+def test_letterbox_rescale_round_trip(shape, auto):
+    """A white rectangle found in the letterboxed input maps back onto itself"""
+    height, width = shape
+    box = np.array([width * 0.21, height * 0.37, width * 0.68, height * 0.83]).round()
+    image = np.zeros((*shape, 3), dtype=np.uint8)
+    x1, y1, x2, y2 = box.astype(int)
+    image[y1:y2, x1:x2] = 255
+
+    padded = letterbox(image, (640, 640), auto=auto)
+    ys, xs = np.nonzero(padded[..., 0] > 127)
+    found = np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]], dtype=np.float64)
+
+    restored = scale_boxes_to_image(found.copy(), padded.shape[:2], shape)[0]
+    pixel = max(height, width) / 640  # One input pixel in image pixels
+    np.testing.assert_allclose(restored, box, atol=1.5 * pixel)
+    np.testing.assert_allclose(restored, ops.scale_boxes(padded.shape[:2], found.copy(), shape)[0], atol=1e-3)
+
+
+def test_scale_boxes_clips_to_the_image():
+    boxes = np.array([[-10.0, -10.0, 700.0, 700.0]])
+    restored = scale_boxes_to_image(boxes, (384, 640), (720, 1280))
+    assert restored is boxes
+    np.testing.assert_allclose(restored, [[0, 0, 1280, 720]])
+
+
+# ============================================
+# Output decoding
+# ============================================
+
+def decoder(end2end=False, iou=0.7, max_det=300):
+    """OnnxYOLO with only the attributes _postprocess reads (no session)"""
+    model = OnnxYOLO.__new__(OnnxYOLO)
+    model.end2end, model.iou, model.max_det = end2end, iou, max_det
+    return model
+
+
+def raw_output(rows, num_classes=3):
+    """(4 + nc, N) like the exported head from (cx, cy, w, h, class, score) rows"""
+    output = np.zeros((4 + num_classes, len(rows)), dtype=np.float32)
+    for i, (cx, cy, w, h, cls, score) in enumerate(rows):
+        output[:4, i] = cx, cy, w, h
+        output[4:, i] = score / 10       # Other classes score lower
+        output[4 + cls, i] = score
+    return output
+
+
+def test_raw_output_is_decoded_and_suppressed_per_class():
+    rows = [
+        (100, 100, 40, 20, 0, 0.9),   # Kept
+        (102, 101, 40, 20, 0, 0.8),   # Same class, IoU ~0.87 with the first: suppressed
+        (102, 101, 40, 20, 2, 0.7),   # Same place, other class: kept (NMS class offset)
+        (300, 50, 10, 30, 1, 0.6),    # Kept
+        (200, 200, 50, 50, 1, 0.2),   # Below conf
+    ]
+    detections = decoder()._postprocess(raw_output(rows), conf=0.25)
+    assert detections.dtype == np.float32 and detections.shape == (3, 6)
+    np.testing.assert_allclose(detections, [
+        [80, 90, 120, 110, 0.9, 0],
+        [82, 91, 122, 111, 0.7, 2],
+        [295, 35, 305, 65, 0.6, 1],
+    ], atol=1e-5)
+
+
+def test_raw_output_limits_and_empty_results():
+    rows = [(50 * i, 50, 20, 20, 0, 0.5 + i / 100) for i in range(10)]
+    detections = decoder(max_det=4)._postprocess(raw_output(rows), conf=0.25)
+    np.testing.assert_allclose(detections[:, 4], [0.59, 0.58, 0.57, 0.56], atol=1e-6)
+
+    empty = decoder()._postprocess(raw_output(rows), conf=0.95)
+    assert empty.shape == (0, 6)
+
+
+def test_end2end_output_is_only_filtered():
+    prediction = np.array([
+        [10, 10, 50, 50, 0.9, 1],
+        [12, 12, 52, 52, 0.8, 1],  # Overlapping: the model already ran NMS, so kept
+        [0, 0, 0, 0, 0.0, 0],      # Padding rows up to max_det
+        [0, 0, 0, 0, 0.0, 0],
+    ], dtype=np.float32)
+    detections = decoder(end2end=True)._postprocess(prediction, conf=0.25)
+    np.testing.assert_array_equal(detections, prediction[:2])
+
+
+# ============================================
+# Parity with the PyTorch path
+# ============================================
+
+@pytest.fixture(scope="module")
+def tiny_models(tmp_path_factory):
+    """A randomly initialised YOLOv8n (nothing downloaded) as .pt and its ONNX export"""
+    if not yolo_backend.ONNXRUNTIME_AVAILABLE:
+        pytest.skip("onnxruntime is not installed")
+    pytest.importorskip("onnx")
+    from ultralytics import YOLO
+
+    directory = tmp_path_factory.mktemp("yolo")
+    torch.manual_seed(0)
+    model = YOLO("yolov8n.yaml")
+    # Spread the class biases so a random model yields confident, overlapping boxes
+    generator = torch.Generator().manual_seed(0)
+    with torch.no_grad():
+        for branch in model.model.model[-1].cv3:
+            branch[-1].bias.copy_(torch.randn(branch[-1].bias.shape, generator=generator) * 2 - 2)
+    weights = str(directory / "tiny.pt")
+    model.save(weights)
+
+    onnx_path = yolo_backend.export_onnx(weights, str(directory), imgsz=320)
+    return YOLO(weights), OnnxYOLO(onnx_path, threads=1)
+
+
+def sorted_rows(boxes):
+    """(N, 6) rows ordered by confidence, then class and position (ties may swap)"""
+    rows = np.concatenate([boxes.xyxy.numpy(), boxes.conf.numpy()[:, None], boxes.cls.numpy()[:, None]], axis=1)
+    return rows[np.lexsort((rows[:, 0].round(1), rows[:, 5], -rows[:, 4].round(5)))]
+
+
+@pytest.mark.parametrize("batch_shapes", [
+    [(180, 320)],                 # Landscape, rectangular letterbox
+    [(320, 180)],                 # Portrait
+    [(181, 320)],                 # Odd padding
+    [(180, 320), (180, 320)],     # Batched, same shape
+    [(180, 320), (240, 240)],     # Mixed shapes: square letterbox
+])
+def test_onnx_matches_pytorch_boxes_and_scores(tiny_models, batch_shapes):
+    torch_model, onnx_model = tiny_models
+    rng = np.random.default_rng(len(batch_shapes))
+    images = [rng.integers(0, 255, size=(*shape, 3), dtype=np.uint8) for shape in batch_shapes]
+
+    expected = torch_model(images, conf=0.25, imgsz=320, verbose=False)
+    actual = onnx_model(images, conf=0.25)
+    assert onnx_model.names == torch_model.names
+
+    for image, want, got in zip(images, expected, actual):
+        assert got.orig_shape == image.shape[:2]
+        assert len(want.boxes) > 10 and len(got.boxes) == len(want.boxes)
+        want_rows, got_rows = sorted_rows(want.boxes), sorted_rows(got.boxes)
+        np.testing.assert_allclose(got_rows[:, :4], want_rows[:, :4], atol=1e-2)
+        np.testing.assert_allclose(got_rows[:, 4], want_rows[:, 4], atol=1e-5)
+        np.testing.assert_array_equal(got_rows[:, 5], want_rows[:, 5])
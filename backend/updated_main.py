@@ -6,6 +6,8 @@ import numpy as np
 from typing import List, Dict
 import asyncio
 import json
+import logging
+import os
 from pathlib import Path
 import sys
 
@@ -14,51 +16,57 @@ backend_dir = Path(__file__).parent.absolute()
 project_root = backend_dir.parent
 models_dir = backend_dir / "models"
 
-print("=" * 60)
-print("🚀 Initializing AstroGuard Vision Agent...")
-print("=" * 60)
-print(f"\n📂 Project Root: {project_root}")
-print(f"📂 Backend Dir: {backend_dir}")
-print(f"📂 Models Dir: {models_dir}")
+# Add backend to path for imports
+sys.path.insert(0, str(backend_dir))
+
+# Logging (LOG_LEVEL, LOG_FORMAT): handlers only enqueue, a background thread writes
+from core.logging_setup import configure_logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+logger.info("🚀 Initializing AstroGuard Vision Agent...")
+logger.info("📂 Project Root: %s", project_root)
+logger.info("📂 Backend Dir: %s", backend_dir)
+logger.info("📂 Models Dir: %s", models_dir)
 
 # Check if models directory exists
 if not models_dir.exists():
-    print(f"\n❌ ERROR: Models directory not found: {models_dir}")
-    print("   Creating directory...")
+    logger.error("❌ Models directory not found: %s - creating it", models_dir)
     models_dir.mkdir(parents=True, exist_ok=True)
 
 # Model paths
 yolo_speed_path = models_dir / "yolo_speed.pt"
 rnn_model_path = models_dir / "rnn_temporal.pt"
+# ROI feature backbone; must match the one the RNN was trained on
+feature_backbone = os.getenv("FEATURE_BACKBONE", "resnet50")
+feature_int8_path = models_dir / f"feature_{feature_backbone}.int8.pt"  # From scripts/quantize_rnn_models.py
 
-print(f"\n📝 YOLO Path: {yolo_speed_path}")
-print(f"📝 RNN Path: {rnn_model_path}")
+logger.info("📝 YOLO Path: %s", yolo_speed_path)
+logger.info("📝 RNN Path: %s", rnn_model_path)
 
 # Check if models exist
 if not yolo_speed_path.exists():
-    print(f"\n❌ ERROR: YOLO model not found at {yolo_speed_path}")
+    logger.error("❌ YOLO model not found at %s", yolo_speed_path)
     # Try to find it in training directory
     training_yolo = project_root / "training" / "runs" / "nano" / "astroguard_speed" / "weights" / "best.pt"
     if training_yolo.exists():
-        print(f"✅ Found YOLO in training dir, copying...")
+        logger.info("✅ Found YOLO in training dir, copying...")
         import shutil
         shutil.copy(training_yolo, yolo_speed_path)
-        print(f"✅ Copied to {yolo_speed_path}")
+        logger.info("✅ Copied to %s", yolo_speed_path)
     else:
-        print(f"   Training model not found at: {training_yolo}")
-        print("   Run: python training/train_nano.py")
+        logger.error("Training model not found at: %s - run: python training/train_nano.py", training_yolo)
         sys.exit(1)
 
 if not rnn_model_path.exists():
-    print(f"\n❌ ERROR: RNN model not found at {rnn_model_path}")
-    print("   Run: python training/train_rnn.py")
+    logger.error("❌ RNN model not found at %s - run: python training/train_rnn.py", rnn_model_path)
     sys.exit(1)
 
-# Add backend to path for imports
-sys.path.insert(0, str(backend_dir))
-
 from core.fusion_enhanced import SpatioTemporalFusion
 from core.rnn_temporal import RNNInferenceEngine
+from core.frame_ingest import FrameIngest
+from core.detections import boxes_to_arrays, boxes_to_lists, normalize_boxes
+from concurrent.futures import ThreadPoolExecutor
 
 app = FastAPI(title="AstroGuard Vision Agent API")
 
@@ -72,49 +80,45 @@ app.add_middleware(
 )
 
 # Initialize Models
-print("\n" + "=" * 60)
-print("🔧 Loading Models...")
-print("=" * 60)
+logger.info("🔧 Loading Models...")
 
 try:
-    print("\n  ├─ Loading YOLO Speed Model...")
+    logger.info("├─ Loading YOLO Speed Model...")
     yolo_speed = YOLO(str(yolo_speed_path))
-    print("  ✅ YOLO loaded successfully")
+    logger.info("✅ YOLO loaded successfully")
 except Exception as e:
-    print(f"  ❌ Failed to load YOLO: {e}")
-    import traceback
-    traceback.print_exc()
+    logger.exception("❌ Failed to load YOLO: %s", e)
     sys.exit(1)
 
 try:
-    print("  ├─ Loading RNN Temporal Engine...")
+    logger.info("├─ Loading RNN Temporal Engine...")
     rnn_engine = RNNInferenceEngine(
         model_path=str(rnn_model_path),
-        device="cpu"  # Change to "cuda" if GPU available
+        device="cpu",  # Change to "cuda" if GPU available
+        mode=os.getenv("RNN_INFERENCE_MODE", "window"),
+        resync_interval=int(os.getenv("RNN_RESYNC_INTERVAL", "16")),
+        rnn_precision=os.getenv("RNN_PRECISION", "fp32"),
+        feature_precision=os.getenv("FEATURE_EXTRACTOR_PRECISION", "fp32"),
+        feature_int8_path=str(feature_int8_path),
+        feature_backbone=feature_backbone
     )
-    print("  ✅ RNN loaded successfully")
+    logger.info("✅ RNN loaded successfully")
 except Exception as e:
-    print(f"  ❌ Failed to load RNN: {e}")
-    import traceback
-    traceback.print_exc()
+    logger.exception("❌ Failed to load RNN: %s", e)
     sys.exit(1)
 
 try:
-    print("  └─ Initializing Spatio-Temporal Fusion...")
+    logger.info("└─ Initializing Spatio-Temporal Fusion...")
     fusion_engine = SpatioTemporalFusion(
         iou_threshold=0.5,
         temporal_weight=0.3
     )
-    print("  ✅ Fusion engine initialized")
+    logger.info("✅ Fusion engine initialized")
 except Exception as e:
-    print(f"  ❌ Failed to initialize fusion: {e}")
-    import traceback
-    traceback.print_exc()
+    logger.exception("❌ Failed to initialize fusion: %s", e)
     sys.exit(1)
 
-print("\n" + "=" * 60)
-print("✅ AstroGuard Online!")
-print("=" * 60)
+logger.info("✅ AstroGuard Online!")
 
 
 @app.get("/")
@@ -140,6 +144,11 @@ async def health():
             "yolo_speed": "loaded",
             "rnn_temporal": "loaded",
             "fusion": "ready"
+        },
+        "feature_backbone": rnn_engine.feature_extractor.backbone,
+        "precision": {
+            "rnn": rnn_engine.rnn_precision,
+            "feature_extractor": rnn_engine.feature_extractor.precision
         }
     }
 
@@ -160,15 +169,11 @@ async def detect_image(file: UploadFile = File(...)):
     results = yolo_speed(frame, verbose=False)[0]
     
     # Extract detections
-    detections = []
-    for box in results.boxes:
-        det = {
-            'bbox': box.xyxy[0].cpu().numpy().tolist(),
-            'confidence': float(box.conf[0]),
-            'class_id': int(box.cls[0]),
-            'class_name': results.names[int(box.cls[0])]
-        }
-        detections.append(det)
+    bboxes, confidences, class_ids, _ = boxes_to_lists(results.boxes)
+    detections = [
+        {'bbox': bbox, 'confidence': conf, 'class_id': cls, 'class_name': results.names[cls]}
+        for bbox, conf, cls in zip(bboxes, confidences, class_ids)
+    ]
     
     return {
         "detections": detections,
@@ -176,93 +181,131 @@ async def detect_image(file: UploadFile = File(...)):
     }
 
 
+# Frames waiting per connection while the previous one is processed, and what
+# to drop beyond that ("drop_oldest" = latest frame wins)
+STREAM_MAX_PENDING_FRAMES = int(os.getenv("STREAM_MAX_PENDING_FRAMES", "1"))
+STREAM_DROP_POLICY = os.getenv("STREAM_DROP_POLICY", "drop_oldest")
+
+# Tracking, RNN and fusion state is shared, so frames are processed one at a
+# time on a worker thread (keeps the event loop free to receive)
+stream_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream")
+
+
+def process_stream_frame(data: bytes, frame_count: int):
+    """Decode one JPEG frame and run tracking, RNN and fusion (worker thread)"""
+    nparr = np.frombuffer(data, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    
+    if frame is None:
+        return None
+    
+    h, w = frame.shape[:2]
+    
+    # Step 1: YOLO Speed Detection with Tracking
+    results = yolo_speed.track(frame, persist=True, verbose=False)[0]
+    
+    # Step 2: Extract detections with tracking IDs (-1 when the tracker gave none)
+    xyxy, confidences, class_ids, track_ids = boxes_to_arrays(results.boxes)
+    if track_ids is None:
+        track_ids = np.full(len(class_ids), -1, dtype=np.int64)
+    class_ids = class_ids.tolist()
+    yolo_detections = [
+        {
+            'bbox': bbox,
+            'bbox_normalized': bbox_normalized,
+            'confidence': conf,
+            'class_id': cls,
+            'class_name': results.names[cls],
+            'track_id': track_id
+        }
+        for bbox, bbox_normalized, conf, cls, track_id in zip(
+            xyxy.tolist(), normalize_boxes(xyxy, results.boxes.orig_shape).tolist(),
+            confidences.tolist(), class_ids, track_ids.tolist()
+        )
+    ]
+    
+    # Step 3: RNN Temporal Processing
+    enhanced_detections = rnn_engine.process_detections(frame, yolo_detections)
+    
+    # Step 4: Spatio-Temporal Fusion
+    if len(enhanced_detections) > 0:
+        boxes_list = [[d['bbox_normalized'] for d in enhanced_detections]]
+        scores_list = [[d['confidence'] for d in enhanced_detections]]
+        labels_list = [[d['class_id'] for d in enhanced_detections]]
+        
+        fused_metadata = fusion_engine.fuse_detections(
+            boxes_list, 
+            scores_list, 
+            labels_list, 
+            enhanced_detections,
+            (h, w)
+        )
+    else:
+        fused_metadata = []
+    
+    # Step 5: Cleanup old tracks
+    active_track_ids = [d['track_id'] for d in enhanced_detections if d['track_id'] != -1]
+    rnn_engine.cleanup_old_tracks(active_track_ids)
+    
+    # Step 6: Build results
+    alerts = [m for m in fused_metadata if m.get('alert')]
+    
+    return {
+        "frame_id": frame_count,
+        "timestamp": frame_count / 30.0,
+        "detections": fused_metadata,
+        "detection_count": len(fused_metadata),
+        "alerts": alerts,
+        "alert_count": len(alerts)
+    }
+
+
 @app.websocket("/stream")
 async def video_stream(websocket: WebSocket):
     """
     Real-time video stream processing with RNN temporal reasoning
+    
+    Frames keep being received while one is processed; stale frames are
+    dropped (STREAM_DROP_POLICY) and each response carries the stream's
+    received/processed/dropped counts and end-to-end latency.
     """
     await websocket.accept()
     
     frame_count = 0
+    ingest = FrameIngest(max_pending=STREAM_MAX_PENDING_FRAMES, drop_policy=STREAM_DROP_POLICY)
+    receiver = asyncio.create_task(ingest.pump(websocket.receive_bytes))
+    loop = asyncio.get_running_loop()
     
     try:
-        print("📹 WebSocket client connected")
+        logger.info("📹 WebSocket client connected")
         
         while True:
-            # Receive frame from frontend
-            data = await websocket.receive_bytes()
-            nparr = np.frombuffer(data, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Newest frame from frontend
+            item = await ingest.get()
+            if item is None:
+                raise WebSocketDisconnect()
+            data, received_at = item
             
-            if frame is None:
+            response = await loop.run_in_executor(stream_executor, process_stream_frame, data, frame_count + 1)
+            if response is None:
                 continue
             
             frame_count += 1
-            h, w = frame.shape[:2]
-            
-            # Step 1: YOLO Speed Detection with Tracking
-            results = yolo_speed.track(frame, persist=True, verbose=False)[0]
-            
-            # Step 2: Extract detections with tracking IDs
-            yolo_detections = []
-            for box in results.boxes:
-                track_id = int(box.id[0]) if box.id is not None else -1
-                
-                det = {
-                    'bbox': box.xyxy[0].cpu().numpy().tolist(),
-                    'bbox_normalized': box.xyxyn[0].cpu().numpy().tolist(),
-                    'confidence': float(box.conf[0]),
-                    'class_id': int(box.cls[0]),
-                    'class_name': results.names[int(box.cls[0])],
-                    'track_id': track_id
-                }
-                yolo_detections.append(det)
-            
-            # Step 3: RNN Temporal Processing
-            enhanced_detections = rnn_engine.process_detections(frame, yolo_detections)
-            
-            # Step 4: Spatio-Temporal Fusion
-            if len(enhanced_detections) > 0:
-                boxes_list = [[d['bbox_normalized'] for d in enhanced_detections]]
-                scores_list = [[d['confidence'] for d in enhanced_detections]]
-                labels_list = [[d['class_id'] for d in enhanced_detections]]
-                
-                fused_metadata = fusion_engine.fuse_detections(
-                    boxes_list, 
-                    scores_list, 
-                    labels_list, 
-                    enhanced_detections,
-                    (h, w)
-                )
-            else:
-                fused_metadata = []
-            
-            # Step 5: Cleanup old tracks
-            active_track_ids = [d['track_id'] for d in enhanced_detections if d['track_id'] != -1]
-            rnn_engine.cleanup_old_tracks(active_track_ids)
-            
-            # Step 6: Send results back
-            alerts = [m for m in fused_metadata if m.get('alert')]
-            
-            response = {
-                "frame_id": frame_count,
-                "timestamp": frame_count / 30.0,
-                "detections": fused_metadata,
-                "detection_count": len(fused_metadata),
-                "alerts": alerts,
-                "alert_count": len(alerts)
-            }
+            ingest.mark_processed(received_at)
+            response["stream"] = ingest.get_stats()
             
             await websocket.send_json(response)
             
     except WebSocketDisconnect:
-        print("📹 WebSocket client disconnected")
+        logger.info("📹 WebSocket client disconnected (processed %d, dropped %d)", ingest.processed, ingest.dropped)
     except Exception as e:
-        print(f"❌ WebSocket error: {e}")
+        logger.exception("❌ WebSocket error: %s", e)
         try:
             await websocket.close()
         except:
             pass
+    finally:
+        receiver.cancel()
 
 
 @app.post("/train/trigger")
@@ -270,7 +313,7 @@ async def trigger_retraining(failure_type: str, severity: str = "medium"):
     """
     Trigger AstroOps self-healing pipeline
     """
-    print(f"🔄 Retraining triggered: {failure_type} (severity: {severity})")
+    logger.info("🔄 Retraining triggered: %s (severity: %s)", failure_type, severity)
     
     return {
         "status": "retraining_triggered",
@@ -287,12 +330,8 @@ async def trigger_retraining(failure_type: str, severity: str = "medium"):
 
 if __name__ == "__main__":
     import uvicorn
-    print("\n" + "=" * 60)
-    print("🌐 Starting Uvicorn Server...")
-    print("=" * 60)
-    print(f"\n  📍 URL: http://0.0.0.0:8000")
-    print(f"  📚 Docs: http://0.0.0.0:8000/docs")
-    print(f"  🔧 Health: http://0.0.0.0:8000/health")
-    print(f"\n  Press CTRL+C to quit\n")
+    logger.info("🌐 Starting Uvicorn Server...")
+    logger.info("📍 URL: http://0.0.0.0:8000 | 📚 Docs: http://0.0.0.0:8000/docs | 🔧 Health: http://0.0.0.0:8000/health")
+    logger.info("Press CTRL+C to quit")
     
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
\ No newline at end of file
@@ -0,0 +1,465 @@
+"""
+End-to-end benchmark of the 3-layer detection pipeline on synthetic frame streams
+Run: python scripts/benchmarks/bench_pipeline.py [--stages extract temporal fusion layers api]
+         [--resolution 1280x720] [--objects 10] [--cameras 4] [--frames 100]
+         [--output results.json] [--compare earlier_results.json]
+
+Stages (each runs in a fresh process so its RSS is its own):
+- extract:  YOLO Results -> DetectionBatch (what main.yolo_results_to_batch does)
+- temporal: RNNTemporal.process_detections
+- fusion:   FusionEnhanced.fuse_detections
+- layers:   extract -> temporal -> fusion, as /detect/fusion chains them after YOLO
+- api:      POST --endpoint (default /detect/fusion) in-process with JPEG frames,
+            one client per camera sending concurrently; needs the YOLO weights
+
+Every camera sees the same number of objects drifting across its frame, with
+box jitter, confidence noise and missed detections. Results (p50/p95/p99
+latency, throughput, RSS, commit and machine info) are written as JSON to
+--output (default scripts/benchmarks/results/pipeline_<commit>.json);
+--compare prints the change against an earlier file and exits with status 1
+when a stage's p95 latency regressed by more than --max-regression percent.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add project root to path
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+# psutil (optional - /proc and getrusage are used without it)
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+STAGES = ('extract', 'temporal', 'fusion', 'layers', 'api')
+
+# Same classes as the trained YOLO models (core/falcon_duality.py)
+CLASS_NAMES = {
+    0: "OxygenTank", 1: "NitrogenTank", 2: "FirstAidBox", 3: "FireAlarm",
+    4: "SafetySwitchPanel", 5: "EmergencyPhone", 6: "FireExtinguisher"
+}
+
+# Settings read by backend/main.py that change what the api stage measures
+RECORDED_ENV_PREFIXES = ('YOLO_', 'INFERENCE_', 'CASCADE_', 'FUSION_', 'RNN_', 'TEMPORAL_', 'MOTION_GATE_')
+
+
+# ============================================
+# Synthetic frame streams
+# ============================================
+
+class SyntheticStream:
+    """Objects drifting across each camera's frame, with detection noise and misses"""
+
+    def __init__(self, width: int, height: int, objects: int, cameras: int,
+                 seed: int = 0, miss_rate: float = 0.05):
+        self.width, self.height = width, height
+        self.cameras = [f"cam{i}" for i in range(cameras)]
+        self.miss_rate = miss_rate
+        self.rng = np.random.default_rng(seed)
+
+        size = min(width, height)
+        self.centers = {c: self.rng.uniform((0, 0), (width, height), size=(objects, 2)) for c in self.cameras}
+        self.velocities = {c: self.rng.normal(0, 3, size=(objects, 2)) for c in self.cameras}  # px/frame
+        self.sizes = {c: self.rng.uniform(0.05, 0.2, size=(objects, 2)) * size for c in self.cameras}
+        self.class_ids = {c: self.rng.integers(0, len(CLASS_NAMES), size=objects) for c in self.cameras}
+        self.base_scores = {c: self.rng.uniform(0.3, 0.95, size=objects) for c in self.cameras}
+        self.background = self.rng.integers(60, 120, size=(height, width, 3), dtype=np.uint8)
+
+    def step(self, camera: str):
+        """Advance a camera by one frame; returns its (boxes, scores, class_ids) detections"""
+        centers, velocities = self.centers[camera], self.velocities[camera]
+        centers += velocities
+        # Bounce off the frame edges
+        for axis, limit in ((0, self.width), (1, self.height)):
+            out = (centers[:, axis] < 0) | (centers[:, axis] > limit)
+            velocities[out, axis] *= -1
+            np.clip(centers[:, axis], 0, limit, out=centers[:, axis])
+
+        n = len(centers)
+        half = self.sizes[camera] / 2 + self.rng.normal(0, 2, size=(n, 2))
+        boxes = np.hstack([centers - half, centers + half])
+        boxes[:, 0::2] = boxes[:, 0::2].clip(0, self.width)
+        boxes[:, 1::2] = boxes[:, 1::2].clip(0, self.height)
+        scores = (self.base_scores[camera] + self.rng.normal(0, 0.05, size=n)).clip(0.05, 0.99)
+
+        seen = self.rng.random(n) >= self.miss_rate
+        return boxes[seen], scores[seen], self.class_ids[camera][seen]
+
+    def frames(self, count: int):
+        """count frames per camera, interleaved: (camera_id, boxes, scores, class_ids)"""
+        for _ in range(count):
+            for camera in self.cameras:
+                yield (camera, *self.step(camera))
+
+    def render(self, boxes: np.ndarray, class_ids: np.ndarray) -> np.ndarray:
+        """BGR frame with a filled rectangle per object"""
+        frame = self.background.copy()
+        for (x1, y1, x2, y2), class_id in zip(boxes.astype(int).tolist(), class_ids.tolist()):
+            color = tuple(int(v) for v in np.random.default_rng(class_id).integers(0, 255, size=3))
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness=-1)
+        return frame
+
+
+# ============================================
+# Measurement
+# ============================================
+
+def rss_mb() -> float:
+    """Current resident set size"""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss / 2**20
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (0 where the resource module is unavailable)"""
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS, KiB on Linux
+
+
+def summarize(latencies_ms, wall_s: float) -> dict:
+    latencies = np.asarray(latencies_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'frames': len(latencies),
+        'latency_ms': {
+            'mean': round(float(latencies.mean()), 4),
+            'p50': round(float(p50), 4),
+            'p95': round(float(p95), 4),
+            'p99': round(float(p99), 4),
+            'max': round(float(latencies.max()), 4)
+        },
+        'throughput_fps': round(len(latencies) / wall_s, 2) if wall_s > 0 else None
+    }
+
+
+def run_sync(stream: SyntheticStream, args, prepare, run) -> dict:
+    """Time run(*prepare(frame)) over the stream's frames; prepare is not timed"""
+    warmup = args.warmup * len(stream.cameras)
+    latencies = []
+    wall = 0.0
+    for i, frame in enumerate(stream.frames(args.frames)):
+        inputs = prepare(frame)
+        start = time.perf_counter()
+        run(*inputs)
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            latencies.append(elapsed * 1000)
+            wall += elapsed
+    return summarize(latencies, wall)
+
+
+# ============================================
+# Stages
+# ============================================
+
+def make_results(boxes, scores, class_ids, orig_img):
+    """ultralytics Results holding the given detections"""
+    import torch
+    from ultralytics.engine.results import Results
+    data = torch.from_numpy(np.column_stack([boxes, scores, class_ids]).astype(np.float32))
+    return Results(orig_img, path="", names=CLASS_NAMES, boxes=data)
+
+
+def layer_models(args):
+    from backend.core.fusion_enhanced import FusionEnhanced
+    from backend.core.rnn_temporal import RNNTemporal
+    temporal = RNNTemporal(max_sessions=max(32, args.cameras))
+    fusion = FusionEnhanced(matcher=args.matcher)
+    return temporal, fusion
+
+
+def bench_extract(stream: SyntheticStream, args) -> dict:
+    from backend.core.detections import DetectionBatch
+    orig_img = np.zeros((stream.height, stream.width, 3), dtype=np.uint8)
+    return run_sync(
+        stream, args,
+        prepare=lambda f: ([make_results(*f[1:], orig_img)],),
+        run=lambda results: DetectionBatch.from_results(results, CLASS_NAMES)
+    )
+
+
+def to_batch(boxes, scores, class_ids):
+    from backend.core.detections import DetectionBatch
+    return DetectionBatch(boxes=boxes, scores=scores, class_ids=class_ids.astype(np.int64), names=CLASS_NAMES)
+
+
+def bench_temporal(stream: SyntheticStream, args) -> dict:
+    temporal, _ = layer_models(args)
+    return run_sync(
+        stream, args,
+        prepare=lambda f: (to_batch(*f[1:]), f[0]),
+        run=lambda batch, camera: temporal.process_detections(batch, camera_id=camera)
+    )
+
+
+def bench_fusion(stream: SyntheticStream, args) -> dict:
+    temporal, fusion = layer_models(args)
+
+    def prepare(frame):
+        yolo = to_batch(*frame[1:])
+        return yolo, temporal.process_detections(yolo.copy(), camera_id=frame[0])
+
+    return run_sync(stream, args, prepare, fusion.fuse_detections)
+
+
+def bench_layers(stream: SyntheticStream, args) -> dict:
+    from backend.core.detections import DetectionBatch
+    temporal, fusion = layer_models(args)
+    orig_img = np.zeros((stream.height, stream.width, 3), dtype=np.uint8)
+
+    def run(results, camera):
+        yolo = DetectionBatch.from_results(results, CLASS_NAMES)
+        rnn = temporal.process_detections(yolo.copy(), camera_id=camera)
+        fusion.fuse_detections(yolo, rnn).to_dicts()
+
+    return run_sync(
+        stream, args,
+        prepare=lambda f: ([make_results(*f[1:], orig_img)], f[0]),
+        run=run
+    )
+
+
+def bench_api(stream: SyntheticStream, args) -> dict:
+    """The FastAPI app in-process over ASGI: one concurrent client per camera"""
+    import httpx
+
+    # main.py imports its modules as core.*, relative to backend/
+    sys.path.insert(0, str(ROOT / "backend"))
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        start = time.perf_counter()
+        import main
+        import_s = time.perf_counter() - start
+
+    # Pre-encode every camera's frames so the clients only upload
+    uploads = {camera: [] for camera in stream.cameras}
+    for camera, boxes, _, class_ids in stream.frames(args.frames):
+        ok, jpeg = cv2.imencode(".jpg", stream.render(boxes, class_ids), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        uploads[camera].append(jpeg.tobytes())
+
+    latencies, layer_timings = [], {}
+
+    async def client(http, camera):
+        for i, jpeg in enumerate(uploads[camera]):
+            start = time.perf_counter()
+            response = await http.post(
+                args.endpoint,
+                files={"file": ("frame.jpg", jpeg, "image/jpeg")},
+                data={"camera_id": camera}
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+            response.raise_for_status()
+            if i < args.warmup:
+                continue
+            latencies.append(elapsed)
+            for key, value in response.json().get("layer_timings", {}).items():
+                if key.endswith("_ms"):
+                    layer_timings.setdefault(key, []).append(value)
+
+    async def run():
+        with quiet:
+            async with main.app.router.lifespan_context(main.app):
+                start = time.perf_counter()
+                await main.model_registry.warm_up()
+                ready_s = time.perf_counter() - start
+                if not main.model_registry.is_ready:
+                    raise RuntimeError(f"Models failed to load: {main.model_registry.failed}")
+
+                transport = httpx.ASGITransport(app=main.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+                    start = time.perf_counter()
+                    await asyncio.gather(*(client(http, camera) for camera in stream.cameras))
+                    wall = time.perf_counter() - start
+        return ready_s, wall
+
+    ready_s, wall = asyncio.run(run())
+    # Wall time includes the warm-up requests; count them in the throughput too
+    result = summarize(latencies, wall)
+    result['throughput_fps'] = round(args.frames * len(stream.cameras) / wall, 2)
+    result['startup_s'] = {'import': round(import_s, 2), 'models_ready': round(ready_s, 2)}
+    result['server_layer_ms'] = {
+        key: {'p50': round(float(np.percentile(v, 50)), 3), 'p95': round(float(np.percentile(v, 95)), 3)}
+        for key, v in layer_timings.items()
+    }
+    return result
+
+
+BENCHMARKS = {
+    'extract': bench_extract,
+    'temporal': bench_temporal,
+    'fusion': bench_fusion,
+    'layers': bench_layers,
+    'api': bench_api,
+}
+
+
+def run_stage(stage: str, args: argparse.Namespace) -> dict:
+    """One stage in the calling process (run_isolated calls it in a fresh one)"""
+    width, height = args.resolution
+    stream = SyntheticStream(width, height, args.objects, args.cameras, seed=args.seed)
+    rss_start = rss_mb()
+    result = BENCHMARKS[stage](stream, args)
+    result['rss_mb'] = {'start': round(rss_start, 1), 'end': round(rss_mb(), 1), 'peak': round(peak_rss_mb(), 1)}
+    return result
+
+
+def run_isolated(stage: str, args: argparse.Namespace) -> dict:
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_stage, (stage, args))
+
+
+# ============================================
+# Reporting
+# ============================================
+
+def git_info() -> dict:
+    def git(*cmd):
+        return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    try:
+        return {'commit': git("rev-parse", "HEAD") or None, 'dirty': bool(git("status", "--porcelain", "-uno"))}
+    except OSError:
+        return {'commit': None, 'dirty': None}
+
+
+def machine_info() -> dict:
+    info = {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__
+    }
+    with contextlib.suppress(ImportError):
+        import torch
+        info['torch'] = torch.__version__
+        info['torch_threads'] = torch.get_num_threads()
+    return info
+
+
+def print_results(results: dict):
+    print("=" * 84)
+    print(f"🏁 Pipeline benchmark ({results['config']['resolution']}, {results['config']['objects']} objects, "
+          f"{results['config']['cameras']} cameras, ms per frame)")
+    print("=" * 84)
+    print(f"{'stage':<10}{'frames':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'fps':>11}{'peak RSS MB':>14}")
+    print("-" * 84)
+    for stage, r in results['stages'].items():
+        lat = r['latency_ms']
+        print(f"{stage:<10}{r['frames']:>8}{lat['p50']:>10.3f}{lat['p95']:>10.3f}{lat['p99']:>10.3f}"
+              f"{lat['max']:>10.3f}{r['throughput_fps']:>11.1f}{r['rss_mb']['peak']:>14.1f}")
+        for key, timing in r.get('server_layer_ms', {}).items():
+            print(f"{'':<10}{key:<28} p50 {timing['p50']:.3f}  p95 {timing['p95']:.3f}")
+    print("-" * 84)
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> bool:
+    """Print the change per stage; False if any p95 regressed beyond max_regression percent"""
+    def change(new, old):
+        return 100.0 * (new - old) / old if old else 0.0
+
+    print(f"📊 vs {(baseline.get('git') or {}).get('commit') or 'baseline'}")
+    if baseline.get('config') != results['config']:
+        print("   ⚠️  Configurations differ, deltas are not like for like")
+
+    passed = True
+    for stage, r in results['stages'].items():
+        old = baseline.get('stages', {}).get(stage)
+        if old is None:
+            continue
+        p50 = change(r['latency_ms']['p50'], old['latency_ms']['p50'])
+        p95 = change(r['latency_ms']['p95'], old['latency_ms']['p95'])
+        fps = change(r['throughput_fps'], old['throughput_fps'])
+        rss = change(r['rss_mb']['peak'], old['rss_mb']['peak'])
+        regressed = p95 > max_regression
+        passed &= not regressed
+        print(f"   {'❌' if regressed else '✅'} {stage:<10} p50 {p50:+7.1f}%  p95 {p95:+7.1f}%  "
+              f"fps {fps:+7.1f}%  peak RSS {rss:+6.1f}%")
+    return passed
+
+
+def parse_resolution(value: str):
+    try:
+        width, height = (int(v) for v in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected WIDTHxHEIGHT, got {value}")
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=['extract', 'temporal', 'fusion', 'layers'])
+    parser.add_argument('--resolution', type=parse_resolution, default=(1280, 720), help="WIDTHxHEIGHT")
+    parser.add_argument('--objects', type=int, default=10, help="Objects per camera")
+    parser.add_argument('--cameras', type=int, default=4)
+    parser.add_argument('--frames', type=int, default=100, help="Frames per camera")
+    parser.add_argument('--warmup', type=int, default=5, help="Leading frames per camera left out of the statistics")
+    parser.add_argument('--matcher', default='hungarian', help="FusionEnhanced matcher for the layer stages")
+    parser.add_argument('--endpoint', default='/detect/fusion', help="api stage endpoint")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help="Default: scripts/benchmarks/results/pipeline_<commit>.json")
+    parser.add_argument('--compare', type=Path, help="Earlier results file to compare against")
+    parser.add_argument('--max-regression', type=float, default=10.0, help="Allowed p95 increase, percent")
+    parser.add_argument('--verbose', action='store_true', help="Show the app's startup output (api stage)")
+    args = parser.parse_args()
+
+    results = {
+        'benchmark': 'pipeline',
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git': git_info(),
+        'machine': machine_info(),
+        'config': {
+            'resolution': f"{args.resolution[0]}x{args.resolution[1]}",
+            'objects': args.objects,
+            'cameras': args.cameras,
+            'frames': args.frames,
+            'warmup': args.warmup,
+            'matcher': args.matcher,
+            'endpoint': args.endpoint,
+            'seed': args.seed,
+            'env': {k: v for k, v in sorted(os.environ.items()) if k.startswith(RECORDED_ENV_PREFIXES)}
+        },
+        'stages': {}
+    }
+    for stage in args.stages:
+        print(f"⏱️  {stage}...", flush=True)
+        results['stages'][stage] = run_isolated(stage, args)
+
+    print_results(results)
+
+    output = args.output or RESULTS_DIR / f"pipeline_{(results['git']['commit'] or 'unknown')[:10]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"💾 Results: {output}")
+
+    if args.compare:
+        if not compare(results, json.loads(args.compare.read_text()), args.max_regression):
+            print(f"❌ p95 latency regressed by more than {args.max_regression}%")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Export the YOLO models to ONNX (cached in backend/models) and compare CPU latency
+Run: python scripts/export_yolo_onnx.py [--int8] [--threads 4] [--benchmark 20]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from backend.core.yolo_backend import OnnxYOLO, export_onnx
+
+MODELS_DIR = Path(__file__).resolve().parents[1] / "backend" / "models"
+
+
+def time_model(model, image, runs: int) -> float:
+    """Median latency (ms) of single-frame inference after one warm-up call"""
+    model(image, conf=0.25, verbose=False)
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model(image, conf=0.25, verbose=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", nargs="+", default=["yolo_speed.pt", "yolo_accuracy.pt"])
+    parser.add_argument("--int8", action="store_true", help="Also write the dynamically quantized INT8 export")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads (0 = all cores)")
+    parser.add_argument("--benchmark", type=int, default=0, metavar="RUNS", help="Compare PyTorch and ONNX latency")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")  # Messages from backend.core
+
+    image = (np.random.default_rng(0).random((480, 640, 3)) * 255).astype(np.uint8)
+    for name in args.models:
+        weights = MODELS_DIR / name
+        if not weights.exists():
+            print(f"⚠️  {weights} not found, skipping")
+            continue
+
+        exports = [export_onnx(str(weights), str(MODELS_DIR))]
+        if args.int8:
+            exports.append(export_onnx(str(weights), str(MODELS_DIR), int8=True))
+        for path in exports:
+            print(f"✅ {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+        if args.benchmark:
+            from ultralytics import YOLO
+
+            print(f"   pytorch: {time_model(YOLO(str(weights)), image, args.benchmark):7.1f} ms")
+            for path in exports:
+                model = OnnxYOLO(path, threads=args.threads)
+                print(f"   {Path(path).name}: {time_model(model, image, args.benchmark):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Calibrate the INT8 Layer 2 models and check them against fp32
+Run: python scripts/quantize_rnn_models.py --images <dir the RNN dataset was built from>
+
+- RNN: dynamically quantized at load time (RNN_PRECISION=int8); this script
+  only checks it against the fp32 model on the val sequences.
+- Feature backbone (--backbone, default resnet50): statically quantized with
+  activation ranges calibrated on the train sequences' crops, checked on the
+  val crops and saved to backend/models/feature_<backbone>.int8.pt
+  (FEATURE_EXTRACTOR_PRECISION=int8).
+
+Exits with status 1 (and saves nothing) if a check exceeds its tolerance.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+# Add project root to path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from backend.core.quantization import calibrate_backbone, save_quantized_backbone
+from backend.core.rnn_temporal import DEFAULT_FEATURE_BACKBONE, FEATURE_BACKBONES, FeatureExtractor, load_rnn_model
+
+DATASET_DIR = ROOT / "training" / "rnn_dataset"
+MODELS_DIR = ROOT / "backend" / "models"
+
+
+def load_sequences(path: Path) -> list:
+    # Sequences hold numpy arrays, so weights_only loading does not apply
+    return torch.load(path, weights_only=False)
+
+
+def run_rnn(model, features: torch.Tensor, batch_size: int = 64) -> dict:
+    """Concatenated outputs over all sequences"""
+    outputs = defaultdict(list)
+    with torch.no_grad():
+        for start in range(0, len(features), batch_size):
+            for key, value in model(features[start:start + batch_size]).items():
+                outputs[key].append(value.reshape(value.shape[0] if value.dim() else 1, -1))
+    return {key: torch.cat(values) for key, values in outputs.items()}
+
+
+def cosine(a: torch.Tensor, b: torch.Tensor) -> torch.Tensor:
+    return torch.nn.functional.cosine_similarity(a, b, dim=1)
+
+
+def check_rnn(weights: Path, sequences: list, args) -> bool:
+    """Dynamic INT8 RNN vs fp32 on the val sequences"""
+    features = torch.from_numpy(np.stack([s['features'] for s in sequences])).float()
+    labels = torch.tensor([s['activity_label'] for s in sequences])
+
+    results = {}
+    for precision in ('fp32', 'int8'):
+        model = load_rnn_model(str(weights), 'cpu', precision)
+        start = time.perf_counter()
+        results[precision] = run_rnn(model, features)
+        elapsed = (time.perf_counter() - start) * 1000 / len(features)
+        accuracy = 100.0 * (results[precision]['activity_logits'].argmax(1) == labels).float().mean().item()
+        print(f"   {precision}: activity accuracy {accuracy:6.2f}%  ({elapsed:.2f} ms/sequence)")
+        results[precision]['accuracy'] = accuracy
+
+    fp32, int8 = results['fp32'], results['int8']
+    agreement = (fp32['activity_logits'].argmax(1) == int8['activity_logits'].argmax(1)).float().mean().item()
+    anomaly_diff = (fp32['anomaly_scores'] - int8['anomaly_scores']).abs().max().item()
+    embedding_cos = cosine(fp32['tracking_embeddings'], int8['tracking_embeddings']).min().item()
+    accuracy_drop = fp32['accuracy'] - int8['accuracy']
+    print(f"   activity agreement {agreement:.4f} | max anomaly diff {anomaly_diff:.4f} | "
+          f"min embedding cosine {embedding_cos:.4f}")
+
+    passed = accuracy_drop <= args.max_accuracy_drop and agreement >= args.min_agreement
+    print(f"   {'✅' if passed else '❌'} accuracy drop {accuracy_drop:.2f} pts "
+          f"(max {args.max_accuracy_drop}), agreement min {args.min_agreement}")
+    return passed
+
+
+def crop_batches(extractor: FeatureExtractor, sequences: list, images_dir: Path, limit: int, batch_size: int = 32):
+    """Backbone inputs at the sequences' detection boxes, grouped per source image"""
+    boxes_by_image = defaultdict(list)
+    for sequence in sequences[:limit]:
+        boxes_by_image[sequence['image_source']].append(sequence['metadata']['bbox'])
+
+    crops = []
+    for name, boxes in boxes_by_image.items():
+        frame = cv2.imread(str(images_dir / name))
+        if frame is None:
+            continue
+        crops.append(extractor.prepare_crops(frame, boxes)[1])
+    if not crops:
+        return []
+    crops = torch.cat(crops)
+    return [crops[start:start + batch_size] for start in range(0, len(crops), batch_size)]
+
+
+def features_of(model, batches: list) -> torch.Tensor:
+    with torch.no_grad():
+        return torch.cat([model(batch).flatten(1) for batch in batches])
+
+
+def quantize_backbone(train: list, val: list, args) -> bool:
+    """Calibrate the static INT8 backbone, compare it with fp32 and save it if it passes"""
+    extractor = FeatureExtractor(device='cpu', backbone=args.backbone)
+    calibration = crop_batches(extractor, train, args.images, args.calibration_samples)
+    evaluation = crop_batches(extractor, val, args.images, args.calibration_samples)
+    if not calibration or not evaluation:
+        print(f"   ❌ No crops found - are the dataset's source images in {args.images}?")
+        return False
+    print(f"   Calibrating on {sum(len(b) for b in calibration)} crops, "
+          f"checking on {sum(len(b) for b in evaluation)}")
+
+    quantized = calibrate_backbone(extractor.model, calibration)
+
+    timings = {}
+    for precision, model in (('fp32', extractor.model), ('int8', quantized)):
+        start = time.perf_counter()
+        features = features_of(model, evaluation)
+        timings[precision] = (features, (time.perf_counter() - start) * 1000 / len(features))
+        print(f"   {precision}: {timings[precision][1]:.1f} ms/crop")
+
+    similarity = cosine(timings['fp32'][0], timings['int8'][0])
+    passed = similarity.mean().item() >= args.min_feature_cosine
+    print(f"   {'✅' if passed else '❌'} feature cosine mean {similarity.mean():.4f} "
+          f"(min {args.min_feature_cosine}), worst {similarity.min():.4f}")
+
+    if passed:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        save_quantized_backbone(quantized, str(args.output), args.backbone)
+        print(f"   💾 Saved {args.output}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", type=Path, default=DATASET_DIR, help="prepare_rnn_dataset.py output")
+    parser.add_argument("--rnn", type=Path, default=MODELS_DIR / "rnn_temporal.pt", help="fp32 RNN weights")
+    parser.add_argument("--images", type=Path, help="Source images of the dataset (needed for the backbone)")
+    parser.add_argument("--backbone", default=DEFAULT_FEATURE_BACKBONE, choices=list(FEATURE_BACKBONES))
+    parser.add_argument("--output", type=Path, help="Default: backend/models/feature_<backbone>.int8.pt")
+    parser.add_argument("--calibration-samples", type=int, default=512, help="Sequences (crops) per split")
+    parser.add_argument("--max-accuracy-drop", type=float, default=1.0, help="Activity accuracy, percentage points")
+    parser.add_argument("--min-agreement", type=float, default=0.98, help="Share of identical activity predictions")
+    parser.add_argument("--min-feature-cosine", type=float, default=0.98, help="Mean fp32/int8 feature similarity")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")  # Messages from backend.core
+    args.output = args.output or MODELS_DIR / f"feature_{args.backbone}.int8.pt"
+
+    if not (args.dataset / "val_sequences.pt").exists():
+        print(f"❌ Dataset not found at {args.dataset} - run training/prepare_rnn_dataset.py.py first")
+        sys.exit(1)
+    train = load_sequences(args.dataset / "train_sequences.pt")
+    val = load_sequences(args.dataset / "val_sequences.pt")
+
+    passed = True
+    print(f"🧠 RNN (dynamic INT8) on {len(val)} val sequences")
+    if args.rnn.exists():
+        passed &= check_rnn(args.rnn, val, args)
+    else:
+        print(f"   ⚠️  {args.rnn} not found, skipping")
+
+    print(f"🖼️  {args.backbone} backbone (static INT8)")
+    if args.images:
+        passed &= quantize_backbone(train, val, args)
+    else:
+        print("   ⚠️  --images not given, skipping (calibration needs the dataset's source images)")
+
+    if not passed:
+        print("❌ INT8 accuracy regression exceeds tolerance")
+        sys.exit(1)
+    print("✅ INT8 models within tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,7 @@ import random
 
 # Add backend to path
 sys.path.append(str(Path(__file__).parent.parent))
-from backend.core.rnn_temporal import FeatureExtractor
+from backend.core.rnn_temporal import DEFAULT_FEATURE_BACKBONE, FEATURE_BACKBONES, FeatureExtractor
 
 
 class SyntheticTemporalAugmenter:
@@ -111,7 +111,8 @@ def create_temporal_dataset_from_images(
     output_dir: str,
     sequence_length: int = 16,
     device: str = 'cpu',
-    max_images: int = None
+    max_images: int = None,
+    backbone: str = DEFAULT_FEATURE_BACKBONE
 ):
     """
     Create temporal dataset from static images with synthetic sequences
@@ -123,6 +124,7 @@ def create_temporal_dataset_from_images(
         sequence_length: Number of frames per sequence
         device: 'cpu' or 'cuda'
         max_images: Limit number of images to process (None = all)
+        backbone: Feature backbone (serve with the same FEATURE_BACKBONE)
     """
     
     output_path = Path(output_dir)
@@ -132,10 +134,11 @@ def create_temporal_dataset_from_images(
     print("🚀 Initializing RNN Dataset Preparation (Image-Based)")
     print(f"  ├─ Images Dir: {images_dir}")
     print(f"  ├─ YOLO Model: {yolo_model_path}")
+    print(f"  ├─ Feature Backbone: {backbone}")
     print(f"  └─ Output: {output_dir}\n")
     
     yolo = YOLO(yolo_model_path)
-    feature_extractor = FeatureExtractor(device=device)
+    feature_extractor = FeatureExtractor(device=device, backbone=backbone)
     augmenter = SyntheticTemporalAugmenter(sequence_length=sequence_length)
     
     # Get image files
@@ -201,7 +204,7 @@ def create_temporal_dataset_from_images(
                     sequences_data.append({
                         'sequence_id': sequence_id,
                         'image_source': img_path.name,
-                        'features': np.stack(features_list),  # (16, 2048)
+                        'features': np.stack(features_list),  # (16, feature_dim)
                         'activity_label': activity_label,     # 0-4
                         'anomaly_label': anomaly_label,       # 0 or 1
                         'metadata': {
@@ -253,7 +256,8 @@ def create_temporal_dataset_from_images(
             'train_sequences': len(train_data),
             'val_sequences': len(val_data),
             'sequence_length': sequence_length,
-            'feature_dim': 2048,
+            'feature_dim': feature_extractor.feature_dim,
+            'feature_backbone': backbone,
             'activity_labels': ['stationary', 'being_moved', 'obstructed', 'missing', 'normal'],
             'source': 'synthetic_from_images',
             'total_images_processed': len(image_files),
@@ -310,6 +314,8 @@ if __name__ == '__main__':
     parser.add_argument('--output', default='training/rnn_dataset', help='Output directory')
     parser.add_argument('--device', default='cpu', help='Device (cpu/cuda)')
     parser.add_argument('--max-images', type=int, default=None, help='Max images to process')
+    parser.add_argument('--backbone', default=DEFAULT_FEATURE_BACKBONE, choices=list(FEATURE_BACKBONES),
+                       help='Feature backbone (smaller ones give smaller features and dataset files)')
     
     args = parser.parse_args()
     
@@ -318,5 +324,6 @@ if __name__ == '__main__':
         yolo_model_path=args.yolo,
         output_dir=args.output,
         device=args.device,
-        max_images=args.max_images
+        max_images=args.max_images,
+        backbone=args.backbone
     )
\ No newline at end of file
@@ -26,10 +26,15 @@ class TemporalSequenceDataset(Dataset):
     def __len__(self):
         return len(self.data)
     
+    @property
+    def feature_dim(self) -> int:
+        """Per-frame feature size (depends on the backbone the dataset was prepared with)"""
+        return len(self.data[0]['features'][0])
+    
     def __getitem__(self, idx):
         item = self.data[idx]
         
-        features = torch.FloatTensor(item['features'])  # (16, 2048)
+        features = torch.FloatTensor(item['features'])  # (16, feature_dim)
         activity_label = torch.LongTensor([item['activity_label']])[0]
         anomaly_label = torch.FloatTensor([item['anomaly_label']])
         
@@ -152,9 +157,10 @@ def main():
     print(f"  ├─ Train sequences: {len(train_dataset)}")
     print(f"  └─ Val sequences: {len(val_dataset)}")
     
-    # Initialize model
-    print("\n🔧 Initializing Multi-Task RNN...")
-    model = MultiTaskTemporalRNN().to(device)
+    # Initialize model (input size follows the dataset's feature backbone)
+    feature_dim = train_dataset.feature_dim
+    print(f"\n🔧 Initializing Multi-Task RNN ({feature_dim}-dim features)...")
+    model = MultiTaskTemporalRNN(feature_dim=feature_dim).to(device)
     
     # Optimizer
     optimizer = optim.AdamW(model.parameters(), lr=0.001, weight_decay=0.01)